@@ -0,0 +1,298 @@
+"""
+⚽ BETTING MODEL — HISTORICAL BACKTEST
+
+Replays Football-Data seasons week by week against their bookmaker odds.
+
+FOR EVERY WEEK OF A SEASON:
+
+1. Refit Dixon-Coles ratings on matches played before the week starts (no lookahead)
+1. Score the week's fixtures with analyse_slate (batched model, MIN_ODDS filter, tiers)
+1. Drop value bets in the NO BET tier, as the live slate does when you place bets
+1. Stake the rest at half-Kelly of the bankroll at the start of the week
+1. Settle on the result; CLV against the closing odds when the CSV has them
+
+Markets: 1X2 and Over 2.5, using the first odds column present (Bet365, then
+Pinnacle, then the market average); closing odds come from the
+Pinnacle/average closing columns.
+
+REPORTS: ROI, max drawdown, CLV, Brier score, ROI/CLV per confidence tier and a
+calibration table over every scored fixture. Seasons and leagues run in parallel worker processes.
+
+HOW TO RUN:
+python backtest.py                          # Last 3 seasons of every league
+python backtest.py --league EPL --seasons 5
+python backtest.py --offline                # Cached CSVs only
+"""
+
+import os
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import betting_model_v4_pro as bm
+import data_pipeline as dp
+import dc_fitter as dc
+
+# ============================================================
+
+# CONFIG
+
+# ============================================================
+
+BANKROLL = 100.0
+SEASONS = 3
+MIN_TEAM_GAMES = 3     # Both teams need this many prior matches before we bet on them
+MIN_LEAGUE_GAMES = 60  # Ratings need this much history before the first bet
+NO_BET = bm.confidence_tier(0)  # Value bets in this tier are never staked
+
+# market: (taken odds columns, closing odds columns) — first present column wins
+ODDS_COLUMNS = {
+    "Home Win": (("B365H", "PSH", "AvgH"), ("PSCH", "AvgCH", "B365CH")),
+    "Draw": (("B365D", "PSD", "AvgD"), ("PSCD", "AvgCD", "B365CD")),
+    "Away Win": (("B365A", "PSA", "AvgA"), ("PSCA", "AvgCA", "B365CA")),
+    "Over 2.5 Goals": (("B365>2.5", "P>2.5", "Avg>2.5"), ("PC>2.5", "AvgC>2.5", "B365C>2.5")),
+}
+
+# MatchProbs field and outcome test for each market
+MARKETS = {
+    "Home Win": ("home_win", lambda hg, ag: hg > ag),
+    "Draw": ("draw", lambda hg, ag: hg == ag),
+    "Away Win": ("away_win", lambda hg, ag: hg < ag),
+    "Over 2.5 Goals": ("over_2_5", lambda hg, ag: hg + ag > 2.5),
+}
+
+CAL_BINS = np.linspace(0, 100, 11)
+
+# ============================================================
+
+# REPLAY
+
+# ============================================================
+
+def _first_col(df, options):
+    return next((c for c in options if c in df.columns), None)
+
+def _prepare(df):
+    cols = dp._find_cols(df)
+    df = df.dropna(subset=["HomeTeam", "AwayTeam", cols["home_goals"], cols["away_goals"]]).copy()
+    df["_date"] = pd.to_datetime(df["Date"], dayfirst=True, format="mixed", errors="coerce")
+    df = df.dropna(subset=["_date"])
+    df["_hg"], df["_ag"] = df[cols["home_goals"]].astype(int), df[cols["away_goals"]].astype(int)
+    return df.sort_values("_date", kind="stable")
+
+def run_season(league_key, history, season, cal=None, half_life=dc.HALF_LIFE_DAYS, bankroll=BANKROLL):
+    """
+    Replay one season. history = earlier matches (may be empty), used only as prior data.
+    Returns {"bets": [...], "scored": [(prob %, won), ...], "bankroll": [...weekly]}.
+    """
+    cal = {} if cal is None else cal  # Uncalibrated by default — the live calibration would leak the future
+    history, season = _prepare(history) if len(history) else history, _prepare(season)
+    odds_cols = {m: (_first_col(season, taken), _first_col(season, closing)) for m, (taken, closing) in ODDS_COLUMNS.items()}
+
+    bets, scored, curve = [], [], [bankroll]
+    params = None
+    weeks = season["_date"].dt.to_period("W-SUN")
+    for week, fixtures in season.groupby(weeks, sort=True):
+        start = week.start_time
+        past = pd.concat([history, season[season["_date"] < start]]) if len(history) else season[season["_date"] < start]
+        if len(past) < MIN_LEAGUE_GAMES:
+            continue
+        params = dc.fit_league(past, prev=params, ref_date=start, half_life=half_life)
+        XG = dc.to_xg(params, league_key)
+        games = pd.concat([past["HomeTeam"], past["AwayTeam"]]).value_counts()
+
+        odds, rows = {}, {}
+        for row in fixtures.to_dict("records"):  # Records, not itertuples: odds columns like "B365>2.5" aren't identifiers
+            home, away = row["HomeTeam"], row["AwayTeam"]
+            if games.get(home, 0) < MIN_TEAM_GAMES or games.get(away, 0) < MIN_TEAM_GAMES or (home, away) in rows:
+                continue
+            odds[(home, away)] = {m: (None, float(row[c])) for m, (c, _) in odds_cols.items()
+                                  if c and pd.notna(row[c]) and row[c] > 1}
+            rows[(home, away)] = row
+        if not rows:
+            continue
+
+        matches, value_bets = bm.analyse_slate(list(rows), odds, XG=XG, cal=cal)
+        value_bets = [vb for vb in value_bets if vb.tier != NO_BET]
+        for m in matches:
+            row = rows[(m.home, m.away)]
+            for field, won in MARKETS.values():
+                scored.append((getattr(m, field), bool(won(row["_hg"], row["_ag"]))))
+
+        week_bank = curve[-1]
+        pnl_week = 0.0
+        # Stakes come off the bank at the start of the week; scale down if the week's bets would exceed it
+        scale = min(1.0, 100 / sum(vb.half_kelly for vb in value_bets)) if value_bets else 1.0
+        for vb in value_bets:
+            row = rows[(vb.home, vb.away)]
+            won = MARKETS[vb.market][1](row["_hg"], row["_ag"])
+            stake = week_bank * vb.half_kelly / 100 * scale
+            pnl = stake * (vb.odds - 1) if won else -stake
+            close_col = odds_cols[vb.market][1]
+            closing = float(row[close_col]) if close_col and pd.notna(row[close_col]) and row[close_col] > 1 else None
+            bets.append({
+                "date": row["_date"].strftime("%Y-%m-%d"), "league": league_key,
+                "home": vb.home, "away": vb.away, "market": vb.market,
+                "prob": vb.prob, "raw_prob": vb.raw_prob, "odds": vb.odds, "closing_odds": closing, "tier": vb.tier,
+                "stake": stake, "pnl": pnl, "won": bool(won),
+            })
+            pnl_week += pnl
+        curve.append(week_bank + pnl_week)
+
+    return {"bets": bets, "scored": scored, "bankroll": curve}
+
+# ============================================================
+
+# REPORTING
+
+# ============================================================
+
+def max_drawdown(curve):
+    """Largest peak-to-trough fall of a bankroll curve, as a fraction of the peak"""
+    curve = np.asarray(curve, dtype=float)
+    if len(curve) == 0:
+        return 0.0
+    peaks = np.maximum.accumulate(curve)
+    return float(((peaks - curve) / peaks).max())
+
+def calibration_table(scored):
+    """[(bin low %, bin high %, n, mean predicted %, hit rate %)] over 10% bins"""
+    if not scored:
+        return []
+    probs, won = np.array(scored, dtype=float).T
+    idx = np.clip(np.digitize(probs, CAL_BINS) - 1, 0, len(CAL_BINS) - 2)
+    table = []
+    for b in range(len(CAL_BINS) - 1):
+        sel = idx == b
+        if sel.any():
+            table.append((float(CAL_BINS[b]), float(CAL_BINS[b + 1]), int(sel.sum()), float(probs[sel].mean()), float(won[sel].mean() * 100)))
+    return table
+
+def tier_table(bets):
+    """[(tier, bets, staked, pnl, roi, clv or None)], strongest tier first"""
+    table = []
+    for tier in sorted({b["tier"] for b in bets}, key=lambda t: -t.count("⭐")):
+        sel = [b for b in bets if b["tier"] == tier]
+        staked, pnl = sum(b["stake"] for b in sel), sum(b["pnl"] for b in sel)
+        clv = [b["odds"] / b["closing_odds"] - 1 for b in sel if b["closing_odds"]]
+        table.append((tier, len(sel), staked, pnl, pnl / staked if staked else 0.0, float(np.mean(clv)) if clv else None))
+    return table
+
+def summarize(result):
+    bets, scored = result["bets"], result["scored"]
+    staked = sum(b["stake"] for b in bets)
+    pnl = sum(b["pnl"] for b in bets)
+    clv = [b["odds"] / b["closing_odds"] - 1 for b in bets if b["closing_odds"]]
+    probs, won = (np.array(scored, dtype=float).T if scored else (np.array([]), np.array([])))
+    return {
+        "bets": len(bets),
+        "hit_rate": sum(b["won"] for b in bets) / len(bets) if bets else 0.0,
+        "staked": staked,
+        "pnl": pnl,
+        "roi": pnl / staked if staked else 0.0,
+        "final_bank": result["bankroll"][-1],
+        "max_drawdown": max_drawdown(result["bankroll"]),
+        "clv": float(np.mean(clv)) if clv else None,
+        "brier": float(np.mean((probs / 100 - won) ** 2)) if len(probs) else None,
+        "scored": len(scored),
+    }
+
+# ============================================================
+
+# PARALLEL DRIVER
+
+# ============================================================
+
+def _season_job(args):
+    league_key, label, history, season, half_life = args
+    try:
+        return league_key, label, run_season(league_key, history, season, half_life=half_life), None
+    except Exception as e:
+        return league_key, label, None, str(e)[:80]
+
+def run_backtest(frames, half_life=dc.HALF_LIFE_DAYS, workers=None):
+    """
+    frames: {league: [(season label, DataFrame), ...] oldest first}. Every season is
+    replayed with all earlier seasons as history, one worker process per job.
+    Returns ({(league, season): result}, {(league, season): error}).
+    """
+    jobs = []
+    for league_key, seasons in frames.items():
+        for n, (label, df) in enumerate(seasons):
+            earlier = [d for _, d in seasons[:n]]
+            history = pd.concat(earlier, ignore_index=True) if earlier else pd.DataFrame()
+            jobs.append((league_key, label, history, df, half_life))
+    workers = min(len(jobs), workers or os.cpu_count() or 1) or 1
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            done = list(pool.map(_season_job, jobs))
+    else:
+        done = [_season_job(j) for j in jobs]
+    results = {(k, label): r for k, label, r, err in done if r is not None}
+    errors = {(k, label): err for k, label, r, err in done if r is None}
+    return results, errors
+
+def merge(results):
+    """All jobs' bets and scored probabilities as one result; bankroll = BANKROLL plus cumulative P&L in date order"""
+    bets = [b for r in results for b in r["bets"]]
+    scored = [s for r in results for s in r["scored"]]
+    curve = [BANKROLL]
+    for b in sorted(bets, key=lambda b: b["date"]):
+        curve.append(curve[-1] + b["pnl"])
+    return {"bets": bets, "scored": scored, "bankroll": curve}
+
+def load_seasons(league_key, seasons=SEASONS):
+    """[(season code, DataFrame)] oldest first, via the pipeline's cached fetch"""
+    out = []
+    for url in reversed(dc.season_urls(dp.LEAGUES[league_key]["fd_url"], seasons)):
+        df, _ = dp._download_fd_csv(league_key, url)
+        if df is not None:
+            out.append((url.split("/")[-2], df))
+    return out
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Walk-forward backtest on Football-Data odds")
+    parser.add_argument("--league", help="Single league (e.g. EPL)")
+    parser.add_argument("--seasons", type=int, default=SEASONS, help="Seasons to replay per league")
+    parser.add_argument("--half-life", type=float, default=dc.HALF_LIFE_DAYS, help="Rating time-decay half-life in days")
+    parser.add_argument("--offline", action="store_true", help="Use cached CSVs only")
+    args = parser.parse_args()
+
+    dp.OFFLINE = args.offline
+    leagues = [args.league] if args.league else list(dp.LEAGUES)
+    frames = {k: load_seasons(k, args.seasons) for k in leagues}
+    results, errors = run_backtest({k: v for k, v in frames.items() if v}, args.half_life)
+
+    print("=" * 70)
+    print("  📈 WALK-FORWARD BACKTEST (half-Kelly, uncalibrated)")
+    print("=" * 70)
+    print(f"  {'League':<14} {'Season':<7} {'Bets':>5} {'ROI':>8} {'MaxDD':>7} {'CLV':>7} {'Brier':>6} {'Bank':>8}")
+    for (league_key, label), r in sorted(results.items()):
+        s = summarize(r)
+        clv = f"{s['clv']*100:+.1f}%" if s["clv"] is not None else "-"
+        brier = f"{s['brier']:.3f}" if s["brier"] is not None else "-"
+        print(f"  {league_key:<14} {label:<7} {s['bets']:>5} {s['roi']*100:>+7.1f}% {s['max_drawdown']*100:>6.1f}% "
+              f"{clv:>7} {brier:>6} {s['final_bank']:>8.1f}")
+    for (league_key, label), err in errors.items():
+        print(f"  {league_key:<14} {label:<7} ❌ {err}")
+    missing = [k for k in leagues if not frames[k]]
+    if missing:
+        print(f"  No data: {', '.join(missing)}")
+
+    if results:
+        total = merge(results.values())
+        s = summarize(total)
+        clv = f" | CLV {s['clv']*100:+.1f}%" if s["clv"] is not None else ""
+        print(f"\n  ALL: {s['bets']} bets | ROI {s['roi']*100:+.1f}% | hit {s['hit_rate']*100:.1f}%"
+              f" | max DD {s['max_drawdown']*100:.1f}%{clv}")
+        print("\n  BY TIER")
+        print(f"  {'Tier':<18} {'Bets':>5} {'Staked':>8} {'P&L':>8} {'ROI':>8} {'CLV':>7}")
+        for tier, n, staked, pnl, roi, tclv in tier_table(total["bets"]):
+            tclv = f"{tclv*100:+.1f}%" if tclv is not None else "-"
+            print(f"  {tier:<18} {n:>5} {staked:>8.1f} {pnl:>+8.1f} {roi*100:>+7.1f}% {tclv:>7}")
+        print(f"\n  CALIBRATION (all scored fixtures, {s['scored']} probabilities)")
+        print(f"  {'Bin':<10} {'N':>6} {'Pred':>7} {'Actual':>7}")
+        for lo, hi, n, pred, act in calibration_table(total["scored"]):
+            print(f"  {lo:>3.0f}-{hi:<3.0f}%   {n:>6} {pred:>6.1f}% {act:>6.1f}%")
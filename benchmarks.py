@@ -0,0 +1,541 @@
+"""
+⚽ BETTING MODEL — HOT-PATH BENCHMARKS
+
+Times the model and pipeline hot paths against checked-in fixtures
+(bench_fixtures/) — no network, no live data files — and compares each
+result with the stored baseline.
+
+MEASURED PER BENCHMARK:
+
+1. Seconds per item (median of `repeat` x SAMPLES short timed samples) and items per second
+1. Peak Python heap during one run (tracemalloc)
+1. Change against bench_fixtures/baseline.json — a run fails (exit 1) when a
+   benchmark is slower than baseline by more than its THRESHOLDS entry, or
+   its peak memory grew by more than MEMORY_THRESHOLD. Speed is compared as a
+   ratio to a fixed reference loop timed alongside every sample, so a CPU
+   that runs slower for the whole run doesn't read as a regression
+
+STARTUP entries time a fresh interpreter instead (best of `repeat` runs):
+importing the model or the pipeline, or one cli.py command end to end, with
+the child's max RSS as its peak.
+
+Timings are machine-specific: record a fresh baseline (--save-baseline)
+when moving the suite to another machine.
+
+HOW TO RUN:
+python benchmarks.py                   # Run everything, compare with the baseline
+python benchmarks.py --only build_M    # Benchmarks whose name contains "build_M"
+python benchmarks.py --only import cli  # Startup: import times and CLI commands
+python benchmarks.py --save-baseline   # Record the current numbers as the baseline
+python benchmarks.py --make-fixtures   # Regenerate bench_fixtures/ (deterministic)
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+import betting_model_v4_pro as bm
+import data_pipeline as dp
+import fbref_parser
+import snapshots
+
+# ============================================================
+
+# CONFIG
+
+# ============================================================
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.path.join(ROOT, "bench_fixtures")
+BASELINE_FILE = os.path.join(FIXTURES_DIR, "baseline.json")
+XG_FIXTURE = os.path.join(FIXTURES_DIR, "xg_data.json")
+SLATE_FIXTURE = os.path.join(FIXTURES_DIR, "slate.json")
+FBREF_FIXTURE = os.path.join(FIXTURES_DIR, "fbref_shooting.html")
+FD_SEASONS = ("2223", "2324", "2425")  # E0_<season>.csv, one file per season
+FD_LEAGUE = "EPL"
+
+SLATE_SIZE = 300
+SEED = 7
+
+REPEAT = 5         # Rounds per benchmark (runs per STARTUP entry, where the best one counts)
+SAMPLES = 8        # Timed samples per round; the median of all of them counts
+MIN_SAMPLE = 0.01  # Seconds — calls per sample are scaled up to at least this
+DEFAULT_THRESHOLD = 0.30  # Fail when time per item (relative to the reference) grows by more than 30%
+MICRO_THRESHOLD = 0.50  # Microsecond-scale calls: cache and branch-predictor luck is a bigger share
+THRESHOLDS = {
+    "build_M": MICRO_THRESHOLD,
+    "build_M_batch": MICRO_THRESHOLD,
+    "wdl_ou_btts": MICRO_THRESHOLD,
+    "cprob": MICRO_THRESHOLD,
+    "analyse_v4": 0.50,        # Mostly print formatting into a buffer — noisier
+    "analyse_slate": MICRO_THRESHOLD,
+    "team_stats": MICRO_THRESHOLD,
+    "fbref_teams_xg": 0.40,
+    "json_load_xg_cached": MICRO_THRESHOLD,
+    "json_save_xg": 0.50,      # fsync-bound, depends on the disk
+}
+STARTUP_THRESHOLD = 0.50  # Fresh-interpreter timings (STARTUP) swing more with the OS
+MEMORY_THRESHOLD = 0.50   # Fail when peak memory grows by more than 50%
+MEMORY_FLOOR_KB = 64      # ... and by more than this much (tiny peaks are noise)
+
+# ============================================================
+
+# FIXTURES — deterministic, regenerate with --make-fixtures
+
+# ============================================================
+
+def _fd_season(teams, season, rng):
+    """One double round-robin season in Football-Data CSV layout"""
+    start = date(2000 + int(season[:2]), 8, 12)
+    strength = {t: rng.normal(0, 0.3) for t in teams}
+    rows = []
+    for rnd, (home, away) in enumerate((h, a) for h in teams for a in teams if h != a):
+        hxg = np.exp(0.3 + strength[home] - strength[away] * 0.8)
+        axg = np.exp(0.05 + strength[away] - strength[home] * 0.8)
+        hg, ag = rng.poisson(hxg), rng.poisson(axg)
+        p = np.array([0.45, 0.27, 0.28]) * rng.uniform(0.9, 1.1, 3)
+        h_odds, d_odds, a_odds = np.round(1.05 / (p / p.sum()), 2)
+        rows.append({
+            "Div": "E0",
+            "Date": (start + timedelta(days=rnd // 10 * 7)).strftime("%d/%m/%Y"),
+            "Time": "15:00", "HomeTeam": home, "AwayTeam": away,
+            "FTHG": hg, "FTAG": ag, "FTR": "H" if hg > ag else "D" if hg == ag else "A",
+            "HS": rng.poisson(13), "AS": rng.poisson(11), "HST": rng.poisson(5), "AST": rng.poisson(4),
+            "HF": rng.poisson(11), "AF": rng.poisson(11), "HC": rng.poisson(5.5), "AC": rng.poisson(4.5),
+            "HY": rng.poisson(1.8), "AY": rng.poisson(2.0), "HR": rng.binomial(1, 0.06), "AR": rng.binomial(1, 0.07),
+            "B365H": h_odds, "B365D": d_odds, "B365A": a_odds,
+            "B365>2.5": round(rng.uniform(1.6, 2.4), 2), "B365<2.5": round(rng.uniform(1.6, 2.4), 2),
+            "PSCH": round(h_odds * rng.uniform(0.95, 1.05), 2), "PSCD": d_odds, "PSCA": a_odds,
+        })
+    return pd.DataFrame(rows)
+
+def _fbref_table(table_id, teams, rng, against=False, commented=False):
+    head = "".join(f'<th data-stat="{s}">{s}</th>' for s in ("team", "players_used", "minutes_90s", "goals",
+                                                                "shots", "shots_on_target", "xg", "npxg"))
+    rows = []
+    for n, team in enumerate(teams):
+        if n == len(teams) // 2:  # FBref repeats the header mid-table
+            rows.append(f'<tr class="thead">{head}</tr>')
+        xg = rng.uniform(25, 80)
+        name = f"vs {team}" if against else team
+        rows.append(
+            f'<tr><th scope="row" class="left" data-stat="team"><a href="/en/squads/{n:08x}/">{name}</a></th>'
+            f'<td data-stat="players_used">{rng.integers(20, 32)}</td><td data-stat="minutes_90s">38.0</td>'
+            f'<td data-stat="goals">{rng.integers(25, 95)}</td><td data-stat="shots">{rng.integers(350, 700)}</td>'
+            f'<td data-stat="shots_on_target">{rng.integers(110, 250)}</td>'
+            f'<td data-stat="xg">{xg:.1f}</td><td data-stat="npxg">{xg * 0.9:.1f}</td></tr>')
+    table = (f'<div class="table_container"><table class="stats_table" id="{table_id}">'
+             f'<thead><tr>{head}</tr></thead><tbody>{"".join(rows)}</tbody></table></div>')
+    return f'<div id="all_{table_id}"><!--\n{table}\n--></div>' if commented else table
+
+def _fbref_page(teams, rng):
+    """A squad shooting page: the "for" table inline, everything else in comments, plus page weight"""
+    nav = "".join(f'<li><a href="/en/comps/{n}/">Competition {n}</a></li>' for n in range(600))
+    parts = ["<!DOCTYPE html><html><head><title>Squad Shooting</title></head><body>",
+             f'<div id="header"><ul>{nav}</ul></div>',
+             _fbref_table("stats_squads_shooting_for", teams, rng)]
+    for kind in ("passing", "possession", "defense", "misc"):
+        parts.append(_fbref_table(f"stats_squads_{kind}_for", teams, rng, commented=True))
+    parts.append(_fbref_table("stats_squads_shooting_against", teams, rng, against=True, commented=True))
+    parts.append(f'<div id="footer"><ul>{nav}</ul></div></body></html>')
+    return "\n".join(parts)
+
+def make_fixtures(path=FIXTURES_DIR, seed=SEED):
+    """Write every fixture into `path` — same seed, same bytes"""
+    rng = np.random.default_rng(seed)
+    os.makedirs(path, exist_ok=True)
+    teams = [f"Team {chr(65 + k)}" for k in range(20)]
+    for season in FD_SEASONS:
+        _fd_season(teams, season, rng).to_csv(os.path.join(path, f"E0_{season}.csv"), index=False)
+
+    with open(os.path.join(path, os.path.basename(FBREF_FIXTURE)), "w") as f:
+        f.write(_fbref_page(teams, rng))
+
+    # The live file's shape: the model's teams plus pipeline-written synthetic leagues
+    xg = {team: dict(v) for team, v in bm.DEFAULT_XG.items()}
+    for k in range(400):
+        xg[f"Club {k:03d}"] = {"xG_h": round(rng.uniform(0.8, 2.4), 2), "xG_a": round(rng.uniform(0.6, 2.0), 2),
+                               "xGA_h": round(rng.uniform(0.7, 2.0), 2), "xGA_a": round(rng.uniform(0.8, 2.3), 2),
+                               "league": f"League {k // 20}", "form": list(rng.choice(list("WDL"), 5)),
+                               "last_updated": "2025-05-25 09:00", "source": "FBref+FD"}
+    with open(os.path.join(path, os.path.basename(XG_FIXTURE)), "w") as f:
+        json.dump(xg, f, indent=2)
+
+    # analyse_v4 needs corner data, so the slate only uses the model's own teams
+    model_teams = sorted(t for t in bm.DEFAULT_XG if t in bm.CORNER_DATA)
+    slate = []
+    for _ in range(SLATE_SIZE):
+        home, away = rng.choice(model_teams, 2, replace=False)
+        odds = {f"{home} Win": [0.0, round(rng.uniform(1.3, 5.0), 2)],
+                "Draw": [0.0, round(rng.uniform(3.0, 4.5), 2)],
+                f"{away} Win": [0.0, round(rng.uniform(1.3, 6.0), 2)],
+                "Over 2.5 Goals": [0.0, round(rng.uniform(1.5, 2.3), 2)],
+                "BTTS Yes": [0.0, round(rng.uniform(1.5, 2.1), 2)],
+                "Corners Over 9.5": [round(rng.uniform(40, 60), 1), round(rng.uniform(1.7, 2.1), 2)]}
+        slate.append({"home": str(home), "away": str(away), "odds": odds})
+    with open(os.path.join(path, os.path.basename(SLATE_FIXTURE)), "w") as f:
+        json.dump(slate, f, indent=1)
+
+class Fixtures:
+    """Fixture data, loaded once per run"""
+
+    def __init__(self, path=FIXTURES_DIR):
+        self.path = path
+        with open(os.path.join(path, os.path.basename(SLATE_FIXTURE))) as f:
+            slate = json.load(f)
+        self.slate = [(m["home"], m["away"]) for m in slate]
+        self.odds = {(m["home"], m["away"]): {k: tuple(v) for k, v in m["odds"].items()} for m in slate}
+        self.xg_file = os.path.join(path, os.path.basename(XG_FIXTURE))
+        with open(self.xg_file) as f:
+            self.xg = json.load(f)
+        self.seasons = [pd.read_csv(os.path.join(path, f"E0_{s}.csv")) for s in FD_SEASONS]
+        with open(os.path.join(path, os.path.basename(FBREF_FIXTURE)), "rb") as f:
+            self.fbref_page = f.read()
+        self.tmp = tempfile.mkdtemp(prefix="bench_")
+
+# ============================================================
+
+# BENCHMARKS — each returns (callable, items processed per call)
+
+# ============================================================
+
+def _slate_xg(fx):
+    return [bm.calc_xg(home, away, fx.xg) for home, away in fx.slate]
+
+def bench_build_M(fx):
+    pairs = _slate_xg(fx)
+    return lambda: [bm.build_M(h, a) for h, a in pairs], len(pairs)
+
+def bench_build_M_batch(fx):
+    hxg, axg = np.array(_slate_xg(fx)).T
+    return lambda: bm.build_M_batch(hxg, axg), len(hxg)
+
+def bench_markets(fx):
+    """wdl + three ou lines + btts_p per matrix, the way analyse_v4 reads them"""
+    Ms = [bm.build_M(h, a) for h, a in _slate_xg(fx)]
+
+    def run():
+        for M in Ms:
+            bm.wdl(M)
+            d = bm.score_dists(M)
+            bm.ou(d, 1.5); bm.ou(d, 2.5); bm.ou(d, 3.5)
+            bm.btts_p(M)
+    return run, len(Ms)
+
+def bench_cprob(fx):
+    rng = np.random.default_rng(SEED)
+    totals = np.round(rng.uniform(7.0, 13.0, 1000), 2).tolist()
+    return lambda: [bm.cprob(t, line) for t in totals for line in (8.5, 9.5, 10.5)], 3 * len(totals)
+
+def bench_analyse_v4(fx):
+    sink = io.StringIO()
+
+    def run():
+        sink.seek(0); sink.truncate()
+        with contextlib.redirect_stdout(sink):
+            for home, away in fx.slate:
+                bm.analyse_v4(home, away, fx.odds[(home, away)])
+    return run, len(fx.slate)
+
+def bench_analyse_slate(fx):
+    cal = bm.load_calibration()
+    return lambda: bm.analyse_slate(fx.slate, fx.odds, XG=fx.xg, cal=cal), len(fx.slate)
+
+def bench_team_stats(fx):
+    df = pd.concat(fx.seasons, ignore_index=True)
+    return lambda: dp.calculate_team_stats(df, FD_LEAGUE), len(df)
+
+def bench_league_state(fx):
+    """Incremental ingestion of the latest season as it grows, one 10-match round at a time"""
+    df = fx.seasons[-1]
+    rounds = [df.iloc[:end] for end in range(10, len(df) + 10, 10)]
+
+    def run():
+        state = dp.LeagueState()
+        for partial in rounds:
+            state.update(partial)
+        return state.team_stats(FD_LEAGUE)
+    return run, len(df)
+
+def bench_fbref_teams_xg(fx):
+    return lambda: fbref_parser.teams_xg(fx.fbref_page), 1
+
+def bench_json_load_xg(fx):
+    def run():
+        bm.clear_json_cache()
+        return bm.load_xg()
+    return run, 1
+
+def bench_json_load_xg_cached(fx):
+    bm.load_xg()
+    return bm.load_xg, 1
+
+def bench_snapshot_load_xg(fx):
+    """Open the league-sharded snapshot cold and read one match's two teams (one league mapped)"""
+    directory = os.path.join(fx.tmp, "snapshot_bench")
+    snapshots.write_snapshot(directory, fx.xg, {}, {league: {} for league in {v["league"] for v in fx.xg.values()}})
+    home, away = fx.slate[0]
+
+    def run():
+        snapshots._OPEN.clear()
+        ratings = snapshots.open_ratings(directory, "xg")
+        return ratings[home], ratings[away]
+    return run, 1
+
+def bench_json_save_xg(fx):
+    path = os.path.join(fx.tmp, "xg_data_live.json")
+    return lambda: bm.write_json_cached(path, fx.xg), 1
+
+BENCHMARKS = {
+    "build_M": bench_build_M,
+    "build_M_batch": bench_build_M_batch,
+    "wdl_ou_btts": bench_markets,
+    "cprob": bench_cprob,
+    "analyse_v4": bench_analyse_v4,
+    "analyse_slate": bench_analyse_slate,
+    "team_stats": bench_team_stats,
+    "league_state": bench_league_state,
+    "fbref_teams_xg": bench_fbref_teams_xg,
+    "json_load_xg": bench_json_load_xg,
+    "json_load_xg_cached": bench_json_load_xg_cached,
+    "snapshot_load_xg": bench_snapshot_load_xg,
+    "json_save_xg": bench_json_save_xg,
+}
+
+# ============================================================
+
+# STARTUP — a fresh interpreter per sample: import cost plus one CLI command,
+# with the model and pipeline pointed at the fixtures like the benchmarks above
+
+# ============================================================
+
+_MODEL_AT_FIXTURES = ("import betting_model_v4_pro as bm; bm.XG_FILE = {xg!r}; "
+                      "bm.SNAPSHOT_DIR = bm.CALIBRATION_FILE = {missing!r}; ")
+_PIPELINE_AT_FIXTURES = "import data_pipeline as dp; dp.LOG_FILE = dp.SNAPSHOT_DIR = {missing!r}; "
+
+STARTUP = {
+    "startup_python": "pass",  # The interpreter alone — the floor under every entry below
+    "import_model": "import betting_model_v4_pro",
+    "import_pipeline": "import data_pipeline",
+    "cli_list": "import cli; cli.main(['list'])",
+    "cli_check": _PIPELINE_AT_FIXTURES + "import cli; cli.main(['check'])",
+    "cli_analyse": _MODEL_AT_FIXTURES + "import cli; cli.main(['analyse', {home!r}, {away!r}])",
+}
+
+# Appended to every STARTUP child: report its own high-water RSS (Linux; fork-inherited usage doesn't count)
+_REPORT_RSS = """
+import sys
+try:
+    with open("/proc/self/status") as _f:
+        sys.stderr.write(next((l for l in _f if l.startswith("VmHWM:")), ""))
+except OSError:
+    pass
+"""
+
+def measure_startup(code, repeat=REPEAT):
+    """{"seconds": best wall time of `python -c code`, "per_second", "relative": best ratio to a
+    _reference() sample taken before the run, "peak_kb": the child's peak RSS (0 if unknown)}"""
+    best, relative, peak = float("inf"), float("inf"), 0.0
+    ref_number = _calls_per_sample(_reference, MIN_SAMPLE)
+    for n in range(repeat + 1):  # The first run only warms the OS file cache
+        ref = _timed(_reference, ref_number)
+        t0 = time.perf_counter()
+        proc = subprocess.run([sys.executable, "-c", code + _REPORT_RSS], cwd=ROOT,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        elapsed = time.perf_counter() - t0
+        if proc.returncode:
+            raise RuntimeError(f"startup benchmark failed: {code}\n{proc.stderr}")
+        if n:
+            best, relative = min(best, elapsed), min(relative, elapsed / ref)
+            rss = [line.split()[1] for line in proc.stderr.splitlines() if line.startswith("VmHWM:")]
+            peak = max([peak] + [float(kb) for kb in rss])
+    return {"seconds": best, "per_second": 1 / best, "relative": relative, "peak_kb": round(peak, 1)}
+
+# ============================================================
+
+# RUNNER
+
+# ============================================================
+
+def _reference():
+    """Fixed pure-Python work timed alongside every sample, to factor out CPU speed drift"""
+    total = 0
+    for i in range(2000):
+        total += i * i % 7
+    return total
+
+def _calls_per_sample(fn, min_sample):
+    """Calls of fn per sample so that one sample lasts at least min_sample seconds"""
+    number = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - t0
+        if elapsed >= min_sample:
+            return number
+        number *= max(2, min(10, int(min_sample / max(elapsed, 1e-9)) + 1))
+
+def _timed(fn, number):
+    t0 = time.perf_counter()
+    for _ in range(number):
+        fn()
+    return (time.perf_counter() - t0) / number
+
+def measure(fn, items, repeat=REPEAT, min_sample=MIN_SAMPLE):
+    """{"seconds": per item, "per_second": items/s, "relative": per item in _reference() calls,
+    "peak_kb": tracemalloc peak of one call}
+
+    Every sample of fn is paired with a sample of _reference() taken right
+    before it, and the gate compares the median ratio of the repeat * SAMPLES
+    pairs: on a shared or throttled CPU whole runs drift by more than any
+    threshold, and the ratio cancels that out. Like timeit, the collector is
+    paused while timing."""
+    fn()  # Warm-up: imports, caches, first-call allocations
+    gc.collect()
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        number, ref_number = _calls_per_sample(fn, min_sample), _calls_per_sample(_reference, min_sample)
+        ref, own = np.array([(_timed(_reference, ref_number), _timed(fn, number)) for _ in range(repeat * SAMPLES)]).T
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    per_call = float(np.median(own))
+
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"seconds": per_call / items, "per_second": items / per_call,
+            "relative": float(np.median(own / ref)) / items, "peak_kb": round(peak / 1024, 1)}
+
+def _slower(result, base):
+    """Fractional slowdown against the baseline entry — on the reference ratio when both have one"""
+    if "relative" in result and "relative" in base:
+        return result["relative"] / base["relative"] - 1
+    return result["seconds"] / base["seconds"] - 1
+
+def compare(name, result, baseline):
+    """List of regression messages for `name` against its baseline entry ([] if none or no baseline)"""
+    base = baseline.get(name)
+    if not base:
+        return []
+    problems = []
+    limit = THRESHOLDS.get(name, STARTUP_THRESHOLD if name in STARTUP else DEFAULT_THRESHOLD)
+    slower = _slower(result, base)
+    if slower > limit:
+        problems.append(f"{slower*100:+.0f}% time (limit +{limit*100:.0f}%)")
+    grown = result["peak_kb"] - base["peak_kb"]
+    if grown > MEMORY_FLOOR_KB and grown > base["peak_kb"] * MEMORY_THRESHOLD:
+        problems.append(f"+{grown:.0f}KB peak (limit +{MEMORY_THRESHOLD*100:.0f}%)")
+    return problems
+
+def _fmt_time(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("µs", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds/scale:.2f}{unit}"
+    return f"{seconds*1e9:.0f}ns"
+
+def run_benchmarks(names=None, baseline=None, repeat=REPEAT, fixtures=None):
+    """Run the selected benchmarks, print a table; returns ({name: result}, {name: [regressions]})"""
+    fx = fixtures or Fixtures()
+    baseline = baseline or {}
+    results, failures = {}, {}
+    # Point the model at the fixtures: no live xG file or snapshot, default calibration
+    saved = bm.XG_FILE, bm.SNAPSHOT_DIR, bm.CALIBRATION_FILE
+    bm.XG_FILE, bm.SNAPSHOT_DIR = fx.xg_file, os.path.join(fx.tmp, "snapshots")
+    bm.CALIBRATION_FILE = os.path.join(fx.tmp, "calibration.json")
+    bm.clear_json_cache()
+    try:
+        print(f"  {'Benchmark':<22} {'per item':>10} {'items/s':>12} {'peak':>10} {'vs base':>9}")
+        print(f"  {'─'*68}")
+        paths = {"xg": fx.xg_file, "missing": os.path.join(fx.tmp, "missing"),
+                 "home": fx.slate[0][0], "away": fx.slate[0][1]}
+        for name in [*BENCHMARKS, *STARTUP]:
+            if names and not any(n in name for n in names):
+                continue
+            if name in STARTUP:
+                result = measure_startup(STARTUP[name].format(**paths), repeat=repeat)
+            else:
+                fn, items = BENCHMARKS[name](fx)
+                result = measure(fn, items, repeat=repeat)
+            results[name] = result
+            problems = compare(name, result, baseline)
+            if problems:
+                failures[name] = problems
+            base = baseline.get(name)
+            delta = f"{_slower(result, base)*100:+.0f}%" if base else "—"
+            flag = "  ❌ " + "; ".join(problems) if problems else ""
+            print(f"  {name:<22} {_fmt_time(result['seconds']):>10} {result['per_second']:>12,.0f} "
+                  f"{result['peak_kb']:>8.0f}KB {delta:>9}{flag}")
+    finally:
+        bm.XG_FILE, bm.SNAPSHOT_DIR, bm.CALIBRATION_FILE = saved
+        bm.clear_json_cache()
+        if fixtures is None:
+            shutil.rmtree(fx.tmp, ignore_errors=True)
+    return results, failures
+
+def load_baseline(path=BASELINE_FILE):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f).get("benchmarks", {})
+
+def save_baseline(results, path=BASELINE_FILE):
+    """Merge `results` into the baseline file (benchmarks not re-run keep their old entry)"""
+    merged = load_baseline(path)
+    merged.update({name: {k: r[k] for k in ("seconds", "relative", "peak_kb") if k in r} for name, r in results.items()})
+    bm.write_json_atomic(path, {"recorded": time.strftime("%Y-%m-%d %H:%M"), "python": sys.version.split()[0],
+                                "benchmarks": dict(sorted(merged.items()))}, indent=2)
+
+# ============================================================
+
+# CLI
+
+# ============================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the model and pipeline hot paths")
+    parser.add_argument("--only", nargs="+", help="Run benchmarks whose name contains any of these")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help=f"Rounds of {SAMPLES} timed samples per benchmark")
+    parser.add_argument("--save-baseline", action="store_true", help="Record the results as the new baseline")
+    parser.add_argument("--make-fixtures", action="store_true", help="Regenerate bench_fixtures/ and exit")
+    args = parser.parse_args()
+
+    if args.make_fixtures:
+        make_fixtures()
+        print(f"  Fixtures written to {FIXTURES_DIR}")
+        sys.exit(0)
+
+    print("=" * 70)
+    print("  ⏱  BETTING MODEL — HOT-PATH BENCHMARKS")
+    print("=" * 70)
+    baseline = {} if args.save_baseline else load_baseline()
+    if not baseline and not args.save_baseline:
+        print("  No baseline yet — run with --save-baseline to record one")
+    results, failures = run_benchmarks(args.only, baseline, repeat=args.repeat)
+
+    if args.save_baseline:
+        save_baseline(results)
+        print(f"\n  Baseline saved to {BASELINE_FILE}")
+    elif failures:
+        print(f"\n  ❌ {len(failures)} benchmark(s) regressed beyond their threshold")
+        sys.exit(1)
+    else:
+        print(f"\n  ✅ No regressions")
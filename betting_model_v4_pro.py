@@ -0,0 +1,848 @@
+import numpy as np
+import math, json, os, csv, warnings
+from dataclasses import dataclass
+from datetime import datetime
+from markets import ScoreDists, score_dists, over_under, wdl as wdl_dists, btts as btts_dists
+from corners_engine import poisson_over
+import instrument  # Timing hooks: no-ops unless instrument.start()/recording() is active
+import snapshots
+import team_names
+warnings.filterwarnings('ignore')
+
+# ============================================================
+
+# ⚽ MULTI-LEAGUE BETTING MODEL v4.0 PRO
+
+# NEW UPGRADES:
+
+# 1. Dynamic form adjustment (rolling xG)
+
+# 2. Probability calibration (bias correction)
+
+# 3. Confidence bands (ELITE/STRONG/LEAN/NO BET)
+
+# 4. Market efficiency filter (skip odds < 1.70)
+
+# 5. Correlation-aware parlay EV
+
+# 6. Weekly model health report
+
+# ============================================================
+
+TRACKER_FILE = "/home/claude/bet_tracker.json"
+BANKROLL_FILE = "/home/claude/bankroll.json"
+XG_FILE = "/home/claude/xg_data_live.json"
+SNAPSHOT_DIR = "/home/claude/snapshots"  # Per-league ratings shards from data_pipeline.py
+CALIBRATION_FILE = "/home/claude/calibration.json"
+RESULTS_JOURNAL = "/home/claude/results_journal.jsonl"
+LEDGER_FILE = "/home/claude/bet_ledger.db"
+MODEL_CONFIG_FILE = "/home/claude/model_config.json"  # Tuned constants from sweep.py
+
+HOME_ADV = 0.15
+DC_RHO = -0.13  # Dixon-Coles low-score correction when the xG file has no fitted rho
+FORM_ALPHA = 0.3  # Weight for recent form (30% new data, 70% historical)
+MIN_ODDS = 1.70   # Skip anything below this
+CORR_PENALTY = 0.12  # 12% penalty for correlated parlay legs
+
+TUNABLE = ("HOME_ADV", "DC_RHO", "FORM_ALPHA", "MIN_ODDS", "CORR_PENALTY")
+
+def _load_model_config(path=MODEL_CONFIG_FILE):
+    """Override the constants above with sweep.py's winning configuration, if one was saved"""
+    if not os.path.exists(path): return
+    with open(path) as f:
+        cfg = json.load(f)
+    for key in TUNABLE:
+        if key in cfg: globals()[key] = float(cfg[key])
+
+_load_model_config()  # Before any def below binds DC_RHO as a default
+
+# ============================================================
+
+# INITIAL XG DATA – WILL BE UPDATED DYNAMICALLY
+
+# ============================================================
+
+DEFAULT_XG = {
+"Barcelona":{"xG_h":2.74,"xG_a":2.26,"xGA_h":0.87,"xGA_a":1.63,"league":"LaLiga"},
+"Real Madrid":{"xG_h":2.48,"xG_a":1.96,"xGA_h":1.05,"xGA_a":1.19,"league":"LaLiga"},
+"Atletico":{"xG_h":1.80,"xG_a":1.20,"xGA_h":0.90,"xGA_a":1.16,"league":"LaLiga"},
+"Villarreal":{"xG_h":1.90,"xG_a":1.38,"xGA_h":1.20,"xGA_a":1.52,"league":"LaLiga"},
+"Betis":{"xG_h":1.70,"xG_a":1.40,"xGA_h":1.10,"xGA_a":1.52,"league":"LaLiga"},
+"Celta":{"xG_h":1.40,"xG_a":1.08,"xGA_h":1.10,"xGA_a":1.50,"league":"LaLiga"},
+"Espanyol":{"xG_h":1.65,"xG_a":1.39,"xGA_h":1.20,"xGA_a":1.50,"league":"LaLiga"},
+"Real Sociedad":{"xG_h":1.50,"xG_a":1.20,"xGA_h":1.10,"xGA_a":1.56,"league":"LaLiga"},
+"Osasuna":{"xG_h":1.38,"xG_a":1.10,"xGA_h":1.20,"xGA_a":1.60,"league":"LaLiga"},
+"Athletic":{"xG_h":1.60,"xG_a":1.30,"xGA_h":0.95,"xGA_a":1.27,"league":"LaLiga"},
+"Getafe":{"xG_h":1.10,"xG_a":0.86,"xGA_h":0.85,"xGA_a":1.11,"league":"LaLiga"},
+"Girona":{"xG_h":1.20,"xG_a":0.94,"xGA_h":1.50,"xGA_a":2.00,"league":"LaLiga"},
+"Elche":{"xG_h":1.30,"xG_a":1.08,"xGA_h":1.60,"xGA_a":2.10,"league":"LaLiga"},
+"Sevilla":{"xG_h":1.35,"xG_a":1.03,"xGA_h":1.30,"xGA_a":1.86,"league":"LaLiga"},
+"Alaves":{"xG_h":1.35,"xG_a":1.09,"xGA_h":1.05,"xGA_a":1.37,"league":"LaLiga"},
+"Mallorca":{"xG_h":1.32,"xG_a":1.06,"xGA_h":1.40,"xGA_a":1.90,"league":"LaLiga"},
+"Valencia":{"xG_h":1.48,"xG_a":1.20,"xGA_h":1.10,"xGA_a":1.48,"league":"LaLiga"},
+"Rayo":{"xG_h":1.55,"xG_a":1.21,"xGA_h":1.15,"xGA_a":1.55,"league":"LaLiga"},
+"Levante":{"xG_h":1.35,"xG_a":1.09,"xGA_h":1.50,"xGA_a":2.00,"league":"LaLiga"},
+"Oviedo":{"xG_h":1.10,"xG_a":0.86,"xGA_h":1.50,"xGA_a":1.98,"league":"LaLiga"},
+"Arsenal":{"xG_h":1.90,"xG_a":1.60,"xGA_h":1.10,"xGA_a":1.30,"league":"PL"},
+"Man United":{"xG_h":1.95,"xG_a":1.60,"xGA_h":1.22,"xGA_a":1.36,"league":"PL"},
+"Liverpool":{"xG_h":2.10,"xG_a":1.75,"xGA_h":1.05,"xGA_a":1.25,"league":"PL"},
+"Man City":{"xG_h":2.20,"xG_a":1.80,"xGA_h":1.00,"xGA_a":1.20,"league":"PL"},
+"Chelsea":{"xG_h":1.85,"xG_a":1.55,"xGA_h":1.15,"xGA_a":1.40,"league":"PL"},
+"Newcastle":{"xG_h":1.75,"xG_a":1.45,"xGA_h":1.20,"xGA_a":1.45,"league":"PL"},
+"Aston Villa":{"xG_h":1.70,"xG_a":1.40,"xGA_h":1.20,"xGA_a":1.50,"league":"PL"},
+"Tottenham":{"xG_h":1.65,"xG_a":1.35,"xGA_h":1.35,"xGA_a":1.55,"league":"PL"},
+"Brighton":{"xG_h":1.60,"xG_a":1.30,"xGA_h":1.30,"xGA_a":1.55,"league":"PL"},
+"Brentford":{"xG_h":1.55,"xG_a":1.25,"xGA_h":1.35,"xGA_a":1.60,"league":"PL"},
+"Fulham":{"xG_h":1.50,"xG_a":1.20,"xGA_h":1.30,"xGA_a":1.55,"league":"PL"},
+"Bournemouth":{"xG_h":1.55,"xG_a":1.25,"xGA_h":1.40,"xGA_a":1.65,"league":"PL"},
+"Nottm Forest":{"xG_h":1.40,"xG_a":1.10,"xGA_h":1.25,"xGA_a":1.50,"league":"PL"},
+"West Ham":{"xG_h":1.45,"xG_a":1.15,"xGA_h":1.59,"xGA_a":1.76,"league":"PL"},
+"Crystal Palace":{"xG_h":1.40,"xG_a":1.10,"xGA_h":1.35,"xGA_a":1.60,"league":"PL"},
+"Everton":{"xG_h":1.30,"xG_a":1.05,"xGA_h":1.45,"xGA_a":1.70,"league":"PL"},
+"Sunderland":{"xG_h":1.35,"xG_a":1.05,"xGA_h":1.40,"xGA_a":1.65,"league":"PL"},
+"Leeds":{"xG_h":1.45,"xG_a":1.15,"xGA_h":1.50,"xGA_a":1.75,"league":"PL"},
+"Burnley":{"xG_h":1.20,"xG_a":0.97,"xGA_h":1.70,"xGA_a":2.00,"league":"PL"},
+"Wolves":{"xG_h":1.21,"xG_a":1.00,"xGA_h":1.55,"xGA_a":1.80,"league":"PL"},
+"Bayern":{"xG_h":2.41,"xG_a":2.25,"xGA_h":0.95,"xGA_a":1.04,"league":"BL"},
+"Leverkusen":{"xG_h":1.85,"xG_a":1.55,"xGA_h":1.10,"xGA_a":1.35,"league":"BL"},
+"Leipzig":{"xG_h":1.85,"xG_a":1.75,"xGA_h":1.15,"xGA_a":1.40,"league":"BL"},
+"Dortmund":{"xG_h":1.80,"xG_a":1.50,"xGA_h":1.25,"xGA_a":1.50,"league":"BL"},
+"Frankfurt":{"xG_h":1.65,"xG_a":1.35,"xGA_h":1.30,"xGA_a":1.55,"league":"BL"},
+"Stuttgart":{"xG_h":1.75,"xG_a":1.45,"xGA_h":1.20,"xGA_a":1.45,"league":"BL"},
+"Hamburg":{"xG_h":1.55,"xG_a":1.25,"xGA_h":1.35,"xGA_a":1.60,"league":"BL"},
+"Freiburg":{"xG_h":1.50,"xG_a":1.20,"xGA_h":1.25,"xGA_a":1.50,"league":"BL"},
+"Gladbach":{"xG_h":1.24,"xG_a":1.10,"xGA_h":1.40,"xGA_a":1.71,"league":"BL"},
+"Mainz":{"xG_h":1.45,"xG_a":1.15,"xGA_h":1.35,"xGA_a":1.60,"league":"BL"},
+"Wolfsburg":{"xG_h":1.35,"xG_a":1.11,"xGA_h":1.40,"xGA_a":1.65,"league":"BL"},
+"Augsburg":{"xG_h":1.40,"xG_a":1.10,"xGA_h":1.45,"xGA_a":1.70,"league":"BL"},
+"Hoffenheim":{"xG_h":1.45,"xG_a":1.15,"xGA_h":1.50,"xGA_a":1.75,"league":"BL"},
+"Union Berlin":{"xG_h":1.35,"xG_a":1.05,"xGA_h":1.45,"xGA_a":1.70,"league":"BL"},
+"Cologne":{"xG_h":1.30,"xG_a":1.05,"xGA_h":1.55,"xGA_a":1.80,"league":"BL"},
+"Heidenheim":{"xG_h":1.25,"xG_a":1.00,"xGA_h":1.77,"xGA_a":1.78,"league":"BL"},
+"Werder":{"xG_h":1.35,"xG_a":1.05,"xGA_h":1.50,"xGA_a":1.75,"league":"BL"},
+"St Pauli":{"xG_h":1.30,"xG_a":1.05,"xGA_h":1.50,"xGA_a":1.72,"league":"BL"},
+"Inter":{"xG_h":1.86,"xG_a":1.90,"xGA_h":0.92,"xGA_a":1.00,"league":"SerieA"},
+"Napoli":{"xG_h":1.80,"xG_a":1.48,"xGA_h":1.00,"xGA_a":1.28,"league":"SerieA"},
+"Juventus":{"xG_h":2.22,"xG_a":1.16,"xGA_h":1.10,"xGA_a":1.35,"league":"SerieA"},
+"Atalanta":{"xG_h":1.75,"xG_a":1.51,"xGA_h":1.10,"xGA_a":1.35,"league":"SerieA"},
+"Fiorentina":{"xG_h":1.65,"xG_a":1.21,"xGA_h":1.20,"xGA_a":1.45,"league":"SerieA"},
+"Roma":{"xG_h":1.70,"xG_a":1.32,"xGA_h":1.25,"xGA_a":1.50,"league":"SerieA"},
+"Milan":{"xG_h":1.85,"xG_a":1.61,"xGA_h":1.15,"xGA_a":1.40,"league":"SerieA"},
+"Lazio":{"xG_h":1.30,"xG_a":1.24,"xGA_h":1.20,"xGA_a":1.45,"league":"SerieA"},
+"Bologna":{"xG_h":1.65,"xG_a":1.51,"xGA_h":1.25,"xGA_a":1.50,"league":"SerieA"},
+"Torino":{"xG_h":1.45,"xG_a":1.09,"xGA_h":1.30,"xGA_a":1.55,"league":"SerieA"},
+"Como":{"xG_h":1.55,"xG_a":1.47,"xGA_h":0.94,"xGA_a":1.30,"league":"SerieA"},
+"Parma":{"xG_h":1.30,"xG_a":0.98,"xGA_h":1.60,"xGA_a":1.85,"league":"SerieA"},
+"Genoa":{"xG_h":1.35,"xG_a":1.41,"xGA_h":1.45,"xGA_a":1.70,"league":"SerieA"},
+"Udinese":{"xG_h":1.40,"xG_a":1.41,"xGA_h":1.45,"xGA_a":1.70,"league":"SerieA"},
+"Cagliari":{"xG_h":1.20,"xG_a":0.90,"xGA_h":1.40,"xGA_a":1.65,"league":"SerieA"},
+"Lecce":{"xG_h":1.15,"xG_a":0.97,"xGA_h":1.50,"xGA_a":1.75,"league":"SerieA"},
+"Sassuolo":{"xG_h":1.20,"xG_a":1.22,"xGA_h":1.55,"xGA_a":1.71,"league":"SerieA"},
+"Cremonese":{"xG_h":1.03,"xG_a":0.85,"xGA_h":1.55,"xGA_a":1.80,"league":"SerieA"},
+"Verona":{"xG_h":1.20,"xG_a":0.94,"xGA_h":1.55,"xGA_a":1.80,"league":"SerieA"},
+"Pisa":{"xG_h":1.25,"xG_a":1.08,"xGA_h":1.50,"xGA_a":1.90,"league":"SerieA"},
+}
+
+CORNER_DATA = {
+"Barcelona":{"c_h":7.80,"c_a":6.36,"ca_h":3.00,"ca_a":3.50},"Real Madrid":{"c_h":6.80,"c_a":5.60,"ca_h":3.50,"ca_a":4.00},
+"Atletico":{"c_h":6.10,"c_a":4.90,"ca_h":3.80,"ca_a":4.20},"Villarreal":{"c_h":6.20,"c_a":5.40,"ca_h":4.00,"ca_a":4.50},
+"Betis":{"c_h":5.80,"c_a":4.80,"ca_h":4.20,"ca_a":4.80},"Celta":{"c_h":5.20,"c_a":4.40,"ca_h":4.80,"ca_a":5.40},
+"Espanyol":{"c_h":5.00,"c_a":4.20,"ca_h":5.00,"ca_a":5.60},"Real Sociedad":{"c_h":4.60,"c_a":3.80,"ca_h":5.20,"ca_a":5.80},
+"Osasuna":{"c_h":4.90,"c_a":3.90,"ca_h":4.90,"ca_a":5.50},"Athletic":{"c_h":5.70,"c_a":4.82,"ca_h":4.20,"ca_a":4.60},
+"Getafe":{"c_h":4.50,"c_a":3.70,"ca_h":4.40,"ca_a":4.80},"Girona":{"c_h":4.30,"c_a":3.70,"ca_h":5.40,"ca_a":6.00},
+"Elche":{"c_h":4.60,"c_a":3.80,"ca_h":4.80,"ca_a":5.40},"Sevilla":{"c_h":5.20,"c_a":4.40,"ca_h":4.60,"ca_a":5.20},
+"Alaves":{"c_h":4.70,"c_a":3.90,"ca_h":4.50,"ca_a":5.00},"Mallorca":{"c_h":4.90,"c_a":4.10,"ca_h":4.70,"ca_a":5.30},
+"Valencia":{"c_h":5.00,"c_a":4.20,"ca_h":4.60,"ca_a":5.00},"Rayo":{"c_h":4.60,"c_a":3.80,"ca_h":5.10,"ca_a":5.70},
+"Levante":{"c_h":4.40,"c_a":3.60,"ca_h":5.20,"ca_a":5.80},"Oviedo":{"c_h":4.20,"c_a":3.40,"ca_h":5.30,"ca_a":6.00},
+"Arsenal":{"c_h":7.20,"c_a":6.00,"ca_h":3.80,"ca_a":4.20},"Man United":{"c_h":6.80,"c_a":5.60,"ca_h":4.00,"ca_a":4.50},
+"Liverpool":{"c_h":7.50,"c_a":6.20,"ca_h":3.50,"ca_a":4.00},"Man City":{"c_h":7.80,"c_a":6.50,"ca_h":3.20,"ca_a":3.80},
+"Chelsea":{"c_h":6.50,"c_a":5.50,"ca_h":4.20,"ca_a":4.80},"Newcastle":{"c_h":6.00,"c_a":5.00,"ca_h":4.50,"ca_a":5.00},
+"Aston Villa":{"c_h":6.80,"c_a":5.50,"ca_h":4.20,"ca_a":4.50},"Tottenham":{"c_h":6.20,"c_a":5.20,"ca_h":4.50,"ca_a":5.00},
+"Brighton":{"c_h":5.80,"c_a":4.80,"ca_h":4.50,"ca_a":5.20},"Brentford":{"c_h":5.50,"c_a":4.50,"ca_h":4.80,"ca_a":5.30},
+"Fulham":{"c_h":5.20,"c_a":4.20,"ca_h":5.00,"ca_a":5.50},"Bournemouth":{"c_h":5.00,"c_a":4.00,"ca_h":5.20,"ca_a":5.80},
+"Nottm Forest":{"c_h":5.00,"c_a":4.00,"ca_h":4.80,"ca_a":5.40},"West Ham":{"c_h":5.20,"c_a":4.20,"ca_h":5.50,"ca_a":6.20},
+"Crystal Palace":{"c_h":5.00,"c_a":4.00,"ca_h":5.00,"ca_a":5.60},"Everton":{"c_h":4.80,"c_a":3.80,"ca_h":5.20,"ca_a":5.80},
+"Sunderland":{"c_h":4.80,"c_a":3.80,"ca_h":5.00,"ca_a":5.50},"Leeds":{"c_h":5.00,"c_a":4.00,"ca_h":5.20,"ca_a":5.80},
+"Burnley":{"c_h":4.00,"c_a":3.20,"ca_h":5.80,"ca_a":6.50},"Wolves":{"c_h":4.20,"c_a":3.40,"ca_h":5.60,"ca_a":6.20},
+"Bayern":{"c_h":8.20,"c_a":7.40,"ca_h":2.80,"ca_a":3.20},"Leverkusen":{"c_h":6.50,"c_a":5.50,"ca_h":4.00,"ca_a":4.50},
+"Leipzig":{"c_h":6.80,"c_a":5.80,"ca_h":3.80,"ca_a":4.20},"Dortmund":{"c_h":6.50,"c_a":5.50,"ca_h":4.20,"ca_a":4.80},
+"Frankfurt":{"c_h":5.80,"c_a":4.80,"ca_h":4.50,"ca_a":5.00},"Stuttgart":{"c_h":6.20,"c_a":5.20,"ca_h":4.20,"ca_a":4.80},
+"Hamburg":{"c_h":5.50,"c_a":4.50,"ca_h":4.50,"ca_a":5.00},"Freiburg":{"c_h":5.20,"c_a":4.20,"ca_h":4.80,"ca_a":5.30},
+"Gladbach":{"c_h":4.80,"c_a":3.80,"ca_h":5.20,"ca_a":5.80},"Mainz":{"c_h":5.00,"c_a":4.00,"ca_h":5.00,"ca_a":5.50},
+"Wolfsburg":{"c_h":4.80,"c_a":3.80,"ca_h":5.20,"ca_a":5.80},"Augsburg":{"c_h":4.80,"c_a":3.80,"ca_h":5.30,"ca_a":5.90},
+"Hoffenheim":{"c_h":5.00,"c_a":4.00,"ca_h":5.20,"ca_a":5.80},"Union Berlin":{"c_h":4.80,"c_a":3.80,"ca_h":5.00,"ca_a":5.60},
+"Cologne":{"c_h":4.50,"c_a":3.60,"ca_h":5.50,"ca_a":6.20},"Heidenheim":{"c_h":4.50,"c_a":3.60,"ca_h":5.80,"ca_a":6.50},
+"Werder":{"c_h":4.80,"c_a":3.80,"ca_h":5.40,"ca_a":6.00},"St Pauli":{"c_h":4.50,"c_a":3.60,"ca_h":5.50,"ca_a":6.20},
+"Inter":{"c_h":6.50,"c_a":5.80,"ca_h":3.20,"ca_a":3.80},"Napoli":{"c_h":6.20,"c_a":5.20,"ca_h":3.80,"ca_a":4.20},
+"Juventus":{"c_h":6.80,"c_a":5.50,"ca_h":3.50,"ca_a":4.00},"Atalanta":{"c_h":5.80,"c_a":5.00,"ca_h":4.00,"ca_a":4.50},
+"Fiorentina":{"c_h":5.50,"c_a":4.50,"ca_h":4.20,"ca_a":4.80},"Roma":{"c_h":5.80,"c_a":4.80,"ca_h":4.20,"ca_a":4.80},
+"Milan":{"c_h":5.80,"c_a":5.00,"ca_h":4.00,"ca_a":4.50},"Lazio":{"c_h":5.20,"c_a":4.20,"ca_h":4.50,"ca_a":5.00},
+"Bologna":{"c_h":5.50,"c_a":4.50,"ca_h":4.50,"ca_a":5.00},"Torino":{"c_h":5.00,"c_a":4.00,"ca_h":4.80,"ca_a":5.40},
+"Como":{"c_h":5.20,"c_a":4.20,"ca_h":4.60,"ca_a":5.20},"Parma":{"c_h":4.80,"c_a":3.80,"ca_h":5.20,"ca_a":5.80},
+"Genoa":{"c_h":4.80,"c_a":3.80,"ca_h":5.20,"ca_a":5.80},"Udinese":{"c_h":5.00,"c_a":4.00,"ca_h":5.00,"ca_a":5.50},
+"Cagliari":{"c_h":4.50,"c_a":3.60,"ca_h":5.20,"ca_a":5.80},"Lecce":{"c_h":4.30,"c_a":3.40,"ca_h":5.40,"ca_a":6.00},
+"Sassuolo":{"c_h":4.50,"c_a":3.60,"ca_h":5.50,"ca_a":6.20},"Cremonese":{"c_h":4.20,"c_a":3.30,"ca_h":5.60,"ca_a":6.30},
+"Verona":{"c_h":4.30,"c_a":3.40,"ca_h":5.50,"ca_a":6.10},"Pisa":{"c_h":4.50,"c_a":3.60,"ca_h":5.60,"ca_a":6.20},
+}
+
+CARD_DATA = {"LaLiga":{"avg":4.2,"red":0.18},"PL":{"avg":3.8,"red":0.12},"BL":{"avg":3.5,"red":0.10},"SerieA":{"avg":4.8,"red":0.22}}
+
+# ============================================================
+
+# FILE CACHE – parse each JSON file once per change, not once per call
+
+# ============================================================
+
+_JSON_CACHE = {}  # path -> (mtime_ns, size, parsed data)
+
+def read_json_cached(path):
+    """Parsed JSON for path, re-read only when its mtime or size changes. None if missing.
+    The returned object is shared -- treat it as read-only and write through write_json_cached."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        _JSON_CACHE.pop(path, None)
+        return None
+    hit = _JSON_CACHE.get(path)
+    if hit and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+        return hit[2]
+    with open(path) as f: data = json.load(f)
+    _JSON_CACHE[path] = (st.st_mtime_ns, st.st_size, data)
+    return data
+
+def write_json_atomic(path, data, **dump_kw):
+    """Write JSON to a temp file in the same directory and rename it over path -- never leaves a truncated file"""
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp,"w") as f:
+        json.dump(data,f,**dump_kw)
+        f.flush(); os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+def write_json_cached(path, data):
+    """Write JSON to path and prime the cache so the next read needs no re-parse"""
+    write_json_atomic(path, data, indent=2)
+    st = os.stat(path)
+    _JSON_CACHE[path] = (st.st_mtime_ns, st.st_size, data)
+
+def clear_json_cache():
+    _JSON_CACHE.clear()
+
+# ============================================================
+
+# UPGRADE 1 – DYNAMIC FORM ADJUSTMENT
+
+# ============================================================
+
+def load_xg():
+    """Ratings by team: the pipeline's league snapshot (each league mapped on first lookup, teams it
+    lacks read from XG_FILE) unless XG_FILE was written since, then XG_FILE, then DEFAULT_XG.
+    Treat the result as read-only."""
+    with instrument.span("load", file="xg"):
+        data = snapshots.open_ratings(SNAPSHOT_DIR, "xg", newer_than=XG_FILE,
+                                      fallback=lambda: read_json_cached(XG_FILE))
+        if data is None:
+            data = read_json_cached(XG_FILE)
+    return data if data is not None else DEFAULT_XG.copy()
+
+def load_xg_for_write():
+    """A private copy of the full ratings to edit and pass to save_xg. Starts from XG_FILE, never
+    the snapshot: shard entries carry only the numeric fields, so saving them would drop the rest."""
+    data = read_json_cached(XG_FILE)
+    return dict(data if data is not None else load_xg())
+
+def save_xg(data):
+    """Write the ratings to XG_FILE, then refresh the snapshot (if there is one) so load_xg keeps
+    reading shards instead of finding XG_FILE newer than them"""
+    with instrument.span("write", file="xg"):
+        data = dict(data)
+        write_json_cached(XG_FILE, data)
+        if snapshots.read_manifest(SNAPSHOT_DIR) is not None:
+            leagues = {v["league"] for v in data.values() if v.get("league")}
+            snapshots.write_snapshot(SNAPSHOT_DIR, data, {}, {league: {} for league in leagues})
+
+def adjust_xg_after_match(home, away, home_scored, away_scored, home_conceded, away_conceded):
+    """Update xG based on actual match result – use after every settled bet"""
+    XG = load_xg_for_write()
+    _form_update(XG, home, away, home_scored, away_scored, home_conceded, away_conceded)
+    save_xg(XG)
+    print(f"\n  ✅ xG updated: {home} ({home_scored}-{home_conceded}) | {away} ({away_scored}-{away_conceded})")
+
+def _form_update(XG, home, away, home_scored, away_scored, home_conceded, away_conceded, alpha=None):
+    """FORM_ALPHA update of two teams in XG (a shallow copy -- team entries are replaced, not mutated).
+    An updated team drops its Dixon-Coles fit fields, so calc_xg uses the form-adjusted averages."""
+    alpha = FORM_ALPHA if alpha is None else alpha
+    own = lambda entry: {k: v for k, v in entry.items() if not k.startswith("dc_")}
+
+    # Update home team
+    if home in XG:
+        XG[home] = own(XG[home])
+        XG[home]["xG_h"] = round((1-alpha)*XG[home]["xG_h"] + alpha*home_scored, 2)
+        XG[home]["xGA_h"] = round((1-alpha)*XG[home]["xGA_h"] + alpha*home_conceded, 2)
+
+    # Update away team
+    if away in XG:
+        XG[away] = own(XG[away])
+        XG[away]["xG_a"] = round((1-alpha)*XG[away]["xG_a"] + alpha*away_scored, 2)
+        XG[away]["xGA_a"] = round((1-alpha)*XG[away]["xGA_a"] + alpha*away_conceded, 2)
+
+def _parse_result_date(value):
+    for fmt in ("%Y-%m-%d", "%d/%m/%Y", "%d/%m/%y"):
+        try: return datetime.strptime(str(value).strip(), fmt)
+        except ValueError: pass
+    raise ValueError(f"unrecognised date {value!r}")
+
+def _check_result(r):
+    """(date, home, away, home goals, away goals) from one result row, or ValueError saying what's wrong"""
+    if not isinstance(r, dict): raise ValueError(f"not a result row: {r!r}")
+    missing = [k for k in ("date", "home", "away", "home_goals", "away_goals") if r.get(k) in (None, "")]
+    if missing: raise ValueError(f"missing {', '.join(missing)}")
+    try: hg, ag = int(float(r["home_goals"])), int(float(r["away_goals"]))
+    except (TypeError, ValueError): raise ValueError(f"goals must be numbers: {r['home_goals']!r}-{r['away_goals']!r}")
+    if hg < 0 or ag < 0: raise ValueError(f"negative goals: {hg}-{ag}")
+    return _parse_result_date(r["date"]), str(r["home"]), str(r["away"]), hg, ag
+
+def read_results_csv(path):
+    """Results from a CSV with Football-Data columns (Date, HomeTeam, AwayTeam, FTHG, FTAG)
+    or plain ones (date, home, away, home_goals, away_goals). Values are passed on as read;
+    apply_results validates them."""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        for row in csv.DictReader(f):
+            home = row.get("HomeTeam") or row.get("home")
+            hg = row.get("FTHG", row.get("home_goals"))
+            ag = row.get("FTAG", row.get("away_goals"))
+            if not home or hg in (None, "") or ag in (None, ""):
+                continue  # Fixture not played yet
+            yield {"date": row.get("Date") or row.get("date"), "home": home,
+                   "away": row.get("AwayTeam") or row.get("away"), "home_goals": hg, "away_goals": ag}
+
+def _journal_keys(path):
+    if not os.path.exists(path): return set()
+    with open(path) as f:
+        return {json.loads(line)["key"] for line in f if line.strip()}
+
+RESULTS_KEPT = 60  # Result keys remembered per team in the ratings file (about a season and a half)
+
+def apply_results(results, journal=None):
+    """
+    Apply a batch of results to the xG ratings in chronological order: one load, one atomic write.
+    results: iterable of dicts (date, home, away, home_goals, away_goals) or a CSV path.
+    Team names may use any spelling team_names.py knows.
+
+    Each applied result's key is stored on both teams' entries ("applied_results", the last
+    RESULTS_KEPT) in the same atomic write as the ratings, then appended to RESULTS_JOURNAL.
+    A result found in either is skipped, so re-running a batch is a no-op, and a crash between
+    the two writes neither loses the batch nor applies it twice (the rerun re-journals it).
+    Rows with a bad date, goals or missing field, and results naming a team the ratings don't
+    have, are reported and left out. Returns (applied, skipped, unmatched, invalid), the last
+    two as lists of (row, reason).
+    """
+    journal = journal or RESULTS_JOURNAL
+    if isinstance(results, (str, os.PathLike)):
+        results = read_results_csv(results)
+    valid, invalid = [], []
+    for r in results:
+        try: valid.append(_check_result(r))
+        except ValueError as e: invalid.append((r, str(e)))
+    valid.sort(key=lambda v: v[0])
+
+    done = _journal_keys(journal)
+    XG = load_xg_for_write()
+    applied, rejournal, skipped, unmatched = [], [], 0, []
+    for when, home_name, away_name, hg, ag in valid:
+        home, away = team_key(home_name, XG), team_key(away_name, XG)
+        missing = [name for name, key in ((home_name, home), (away_name, away)) if key not in XG]
+        if missing:
+            unmatched.append(({"date": f"{when:%Y-%m-%d}", "home": home_name, "away": away_name,
+                               "home_goals": hg, "away_goals": ag}, f"unknown: {', '.join(missing)}"))
+            continue
+        key = f"{when:%Y-%m-%d}|{home}|{away}"
+        entry = {"key": key, "home_goals": hg, "away_goals": ag}
+        if key in done:
+            skipped += 1
+            continue
+        done.add(key)
+        if key in XG[home].get("applied_results", ()):
+            skipped += 1
+            rejournal.append(entry)  # Ratings saved, journal line lost in a crash: restore it
+            continue
+        _form_update(XG, home, away, hg, ag, ag, hg)
+        for team in (home, away):
+            XG[team] = {**XG[team], "applied_results": (list(XG[team].get("applied_results", ())) + [key])[-RESULTS_KEPT:]}
+        applied.append(entry)
+
+    if applied:
+        save_xg(XG)  # Ratings first: they carry the applied keys, so the journal can always be rebuilt
+    if applied or rejournal:
+        with open(journal, "a") as f:
+            for entry in rejournal + applied: f.write(json.dumps(entry) + "\n")
+            f.flush(); os.fsync(f.fileno())
+    print(f"\n  ✅ Results applied: {len(applied)}  |  Already applied: {skipped}  |  Unknown teams: {len(unmatched)}"
+          f"  |  Bad rows: {len(invalid)}")
+    for r, reason in unmatched:
+        print(f"  ⚠️  {r['date']} {r['home']} v {r['away']} — not applied, {reason}")
+    for r, reason in invalid:
+        print(f"  ⚠️  Bad result row — {reason}: {r!r}")
+    return len(applied), skipped, unmatched, invalid
+
+# ============================================================
+
+# UPGRADE 2 – PROBABILITY CALIBRATION
+
+# ============================================================
+
+def load_calibration():
+    with instrument.span("load", file="calibration"):
+        data = read_json_cached(CALIBRATION_FILE)
+    if data is not None: return data
+    return {
+        "home_win": 0.96,  # Model overestimates home wins by 4%
+        "draw": 1.02,
+        "away_win": 1.04,
+        "over_2.5": 1.04,
+        "under_2.5": 0.98,
+        "btts": 1.02,
+        "corners_over": 0.98,
+        "corners_under": 1.02,
+    }
+
+_CURVE_LUTS = {}  # id(curve) -> (curve, lookup table)
+
+def curve_lut(curve):
+    """0.1%-step lookup table (1001 entries) for a fitted calibration curve from calibration.py.
+    The curve only covers the probabilities bets were placed at; beyond its ends it tapers
+    linearly to the identity at 0% and 100% instead of clamping to the end values."""
+    hit = _CURVE_LUTS.get(id(curve))
+    if hit and hit[0] is curve: return hit[1]
+    if len(_CURVE_LUTS) > 256: _CURVE_LUTS.clear()
+    xs, ys = list(curve["x"]), list(curve["y"])
+    if xs[0] > 0: xs, ys = [0.0] + xs, [0.0] + ys
+    if xs[-1] < 100: xs, ys = xs + [100.0], ys + [100.0]
+    lut = np.interp(np.arange(1001)/10, xs, ys).tolist()
+    _CURVE_LUTS[id(curve)] = (curve, lut)
+    return lut
+
+def calibrate_prob(prob, market_type, cal=None):
+    """Apply historical bias correction to probabilities (fitted curve if present, else multiplicative bias)"""
+    if cal is None: cal = load_calibration()
+    key = market_type.lower().replace(" ","_")
+    curve = cal.get("curves", {}).get(key)
+    if curve:
+        return round(min(max(curve_lut(curve)[int(round(min(max(prob,0),100)*10))], 1), 99), 1)
+    bias = cal.get(key, 1.0)
+    return round(min(max(prob * bias, 1), 99), 1)
+
+# ============================================================
+
+# UPGRADE 3 – CONFIDENCE BANDS
+
+# ============================================================
+
+def confidence_tier(prob):
+    """Return confidence rating for a given probability"""
+    if prob >= 72: return "⭐⭐⭐ ELITE"
+    elif prob >= 65: return "⭐⭐ STRONG"
+    elif prob >= 58: return "⭐ LEAN"
+    else: return "❌ NO BET"
+
+# ============================================================
+
+# UPGRADE 4 – MARKET EFFICIENCY FILTER
+
+# ============================================================
+
+def market_independence(odds):
+    """Skip low-efficiency markets (odds < 1.70)"""
+    return odds >= MIN_ODDS
+
+# ============================================================
+
+# UPGRADE 5 – CORRELATION-AWARE PARLAY EV
+
+# ============================================================
+
+def parlay_ev_adjusted(combined_prob, combined_odds, same_match_legs=0):
+    """Calculate parlay EV with correlation penalty (flat approximation -- parlay.py prices same-match legs exactly)"""
+    penalty = CORR_PENALTY if same_match_legs >= 2 else 0
+    adjusted_prob = combined_prob * (1 - penalty)
+    return (adjusted_prob * combined_odds) - 1
+
+# ============================================================
+
+# UPGRADE 6 – MODEL HEALTH CHECK
+
+# ============================================================
+
+def model_health():
+    """Check model performance and recommend whether to keep betting (SQL aggregate if the ledger exists)"""
+    if os.path.exists(LEDGER_FILE):
+        import ledger  # sqlite3 only when there is a ledger to read
+        conn = ledger.connect(LEDGER_FILE)
+        n_settled, total_staked, total_pnl = ledger.settled_totals(conn)
+        conn.close()
+    elif os.path.exists(TRACKER_FILE):
+        with open(TRACKER_FILE) as f:
+            d = json.load(f)
+        settled = [b for b in d["bets"] if b["status"] in ["won","lost"]]
+        n_settled = len(settled)
+        total_staked = sum(b["stake"] for b in settled)
+        total_pnl = sum(b["pnl"] for b in settled)
+    else:
+        return "⚠️ NOT ENOUGH DATA", 0, 0
+
+    if n_settled < 30:
+        return "⚠️ NOT ENOUGH DATA", n_settled, 0
+
+    roi = (total_pnl / total_staked) if total_staked > 0 else -1
+
+    if roi > 0.05: return "🔥 MODEL HOT", n_settled, roi
+    elif roi > 0: return "✅ MODEL OK", n_settled, roi
+    else: return "❌ MODEL OFF -- RECALIBRATE", n_settled, roi
+
+# ============================================================
+
+# MATH ENGINE (UNCHANGED)
+
+# ============================================================
+
+def dc_tau(x,y,mu,nu,rho=DC_RHO):
+    if x==0 and y==0: return 1-(mu*nu*rho)
+    elif x==0 and y==1: return 1+(mu*rho)
+    elif x==1 and y==0: return 1+(nu*rho)
+    elif x==1 and y==1: return 1-rho
+    return 1.0
+
+def team_key(name,XG):
+    """XG key for any model / Football-Data / FBref spelling of a team (the name itself if unknown)"""
+    if name in XG: return name
+    team_id=team_names.resolver().find(name)
+    return team_id if team_id in XG else name
+
+def calc_xg(home,away,XG=None):
+    if XG is None: XG = load_xg()
+    h=XG[home];a=XG[away]
+    if "dc_att" in h and "dc_att" in a and h.get("league")==a.get("league"):
+        # Both rated by the same Dixon-Coles fit (dc_fitter.py): its multiplicative rates, exactly
+        hxg=math.exp(h["dc_mu"]+h["dc_home"]+h["dc_att"]+a["dc_def"])
+        axg=math.exp(a["dc_mu"]+a["dc_att"]+h["dc_def"])
+    else:
+        hxg=((h["xG_h"]+a["xGA_a"])/2)*(1+HOME_ADV)
+        axg=(a["xG_a"]+h["xGA_h"])/2
+    return round(hxg,3),round(axg,3)
+
+LOG_FACT = np.array([math.lgamma(k+1) for k in range(32)])  # log(k!) for k=0..31
+
+def poisson_pmf_batch(lam,n=9):
+    """(N,n) Poisson pmf rows for an array of N means, via precomputed log-factorials"""
+    lam=np.asarray(lam,dtype=float).reshape(-1,1)
+    k=np.arange(n)
+    lf=LOG_FACT[:n] if n<=len(LOG_FACT) else np.array([math.lgamma(i+1) for i in range(n)])
+    return np.exp(k*np.log(np.maximum(lam,np.finfo(float).tiny))-lam-lf)
+
+def build_M_batch(hxg,axg,rho=DC_RHO,n=9):
+    """Stack of N Dixon-Coles score matrices, shape (N,n,n), in one NumPy pass"""
+    with instrument.span("matrix"):
+        hxg=np.atleast_1d(np.asarray(hxg,dtype=float))
+        axg=np.atleast_1d(np.asarray(axg,dtype=float))
+        rho=np.broadcast_to(np.asarray(rho,dtype=float),hxg.shape)
+        M=poisson_pmf_batch(hxg,n)[:,:,None]*poisson_pmf_batch(axg,n)[:,None,:]
+        # Vectorised dc_tau: only the 0-0, 0-1, 1-0 and 1-1 cells are corrected
+        M[:,0,0]*=1-(hxg*axg*rho)
+        M[:,0,1]*=1+(hxg*rho)
+        M[:,1,0]*=1+(axg*rho)
+        M[:,1,1]*=1-rho
+        return M/M.sum(axis=(1,2),keepdims=True)
+
+def build_M(hxg,axg,n=9,rho=DC_RHO):
+    return build_M_batch(hxg,axg,rho=rho,n=n)[0]
+
+def match_rho(home,XG):
+    """Fitted league rho from the xG file (dc_fitter.py), else DC_RHO"""
+    return XG[home].get("rho",DC_RHO)
+
+def wdl(M):
+    hw=float(np.sum(np.tril(M,-1)));d=float(np.sum(np.diag(M)));aw=float(np.sum(np.triu(M,1)))
+    return round(hw*100,1),round(d*100,1),round(aw*100,1)
+
+def ou(M,line):
+    """Over/Under % -- pass score_dists(M) instead of M to reuse one totals reduction across lines"""
+    d=M if isinstance(M,ScoreDists) else score_dists(M)
+    ov=float(over_under(d,line)[0][0])
+    return round(ov*100,1),round((1-ov)*100,1)
+
+def btts_p(M):
+    return round(float(M[1:,1:].sum())*100,1)
+
+def corners(home,away,CD=None):
+    if CD is None: CD=CORNER_DATA
+    h=CD[home];a=CD[away]
+    hc=(h["c_h"]+a["ca_a"])/2;ac=(a["c_a"]+h["ca_h"])/2
+    return round(hc,2),round(ac,2),round(hc+ac,2)
+
+def cprob(total,line):
+    ov=poisson_over(total,line)
+    return round(ov*100,1),round((1-ov)*100,1)
+
+def ev_f(prob,odds): return round((prob/100*odds)-1,4)
+def kelly_f(prob,odds,f=0.5):
+    b=odds-1;p=prob/100;q=1-p;k=max((b*p-q)/b,0)
+    return round(k*100,1),round(k*f*100,1)
+def impl(odds): return round(100/odds,1)
+
+def market_key(mkt):
+    """Map a free-text market name to the calibration key the model prices, or None"""
+    m = mkt.lower()
+    if "home" in m and "draw" not in m: return "home_win"
+    elif "away" in m and "draw" not in m: return "away_win"
+    elif "draw" in m: return "draw"
+    elif "over 2.5" in m: return "over_2.5"
+    elif "btts" in m: return "btts"
+    return None
+
+# ============================================================
+
+# MAIN ANALYSIS ENGINE WITH ALL UPGRADES
+
+# ============================================================
+
+def analyse_v4(home, away, odds_map):
+    """Print the full analysis of one match. Returns its value bets as
+    (market, prob, odds, EV %, half-Kelly %, tier, raw prob) -- record raw prob with the bet for calibration.py."""
+    XG = load_xg()
+    cal = load_calibration()
+    home, away = team_key(home, XG), team_key(away, XG)
+    league = XG[home]["league"]
+    hxg, axg = calc_xg(home, away, XG)
+    M = build_M(hxg, axg, rho=match_rho(home, XG))
+    with instrument.span("markets"):
+        hw, d, aw = wdl(M)
+        dists = score_dists(M)
+        o15, u15 = ou(dists, 1.5)
+        o25, u25 = ou(dists, 2.5)
+        o35, u35 = ou(dists, 3.5)
+        bt = btts_p(M)
+        hc, ac, tc = corners(home, away)
+
+    print(f"\n{'━'*70}")
+    print(f"  🏟  {home.upper():>25}  vs  {away.upper():<25}")
+    print(f"  📍 {league}  |  xG: {hxg}-{axg}  |  Total: {round(hxg+axg,2)}")
+    print(f"{'━'*70}")
+
+    # Apply calibration to key probabilities
+    hw_cal = calibrate_prob(hw, "home_win", cal)
+    d_cal = calibrate_prob(d, "draw", cal)
+    aw_cal = calibrate_prob(aw, "away_win", cal)
+    o25_cal = calibrate_prob(o25, "over_2.5", cal)
+    bt_cal = calibrate_prob(bt, "btts", cal)
+
+    print(f"\n  🏆 RESULT (calibrated):")
+    print(f"     Home: {hw_cal}% {confidence_tier(hw_cal)}")
+    print(f"     Draw: {d_cal}% {confidence_tier(d_cal)}")
+    print(f"     Away: {aw_cal}% {confidence_tier(aw_cal)}")
+
+    print(f"\n  ⚽ GOALS:")
+    print(f"     O1.5: {o15}%  O2.5: {o25_cal}% {confidence_tier(o25_cal)}  O3.5: {o35}%  BTTS: {bt_cal}% {confidence_tier(bt_cal)}")
+
+    print(f"\n  🚩 CORNERS: {home}:{hc}  {away}:{ac}  Total:{tc}")
+    corner_lines = [8.5, 9.5, 10.5]
+    for line in corner_lines:
+        oc = cprob(tc, line)[0]
+        oc_cal = calibrate_prob(oc, "corners_over", cal)
+        tier = confidence_tier(oc_cal)
+        print(f"     O{line}: {oc_cal}% {tier}")
+
+    print(f"\n  💰 VALUE ENGINE (with efficiency filter & confidence)")
+    print(f"  {'Market':<28} {'Prob':>6} {'Raw':>6} {'Odds':>6} {'Pass?':>8} {'EV%':>8} {'Tier':<18} {'½K':>6}")
+    print(f"  {'─'*80}")
+
+    value_bets = []
+    cal_probs = {"home_win": hw_cal, "draw": d_cal, "away_win": aw_cal, "over_2.5": o25_cal, "btts": bt_cal}
+    raw_probs = {"home_win": hw, "draw": d, "away_win": aw, "over_2.5": o25, "btts": bt}
+    for mkt, (given_prob, odds) in odds_map.items():
+        # Apply calibration based on market type
+        key = market_key(mkt)
+        prob = cal_probs[key] if key else given_prob  # Use provided prob for other markets
+        raw_prob = raw_probs[key] if key else given_prob  # What calibration.py fits on: record it with the bet
+
+        # Market efficiency filter
+        passes_filter = market_independence(odds)
+        filter_icon = "✅" if passes_filter else "❌ <1.70"
+
+        e = ev_f(prob, odds)
+        tier = confidence_tier(prob)
+        k, hk = kelly_f(prob, odds)
+
+        # Only show as VALUE if it passes filter AND has positive EV
+        if passes_filter and e > 0:
+            flag = "✅ VALUE"
+            value_bets.append((mkt, prob, odds, round(e*100,2), hk, tier, raw_prob))
+        else:
+            flag = "❌ SKIP" if not passes_filter else "❌ -EV"
+
+        print(f"  {mkt:<28} {prob:>5}% {raw_prob:>5}% {odds:>6} {filter_icon:>8} {e*100:>+7.1f}% {tier:<18} {hk:>5}%  {flag}")
+
+    return value_bets
+
+# ============================================================
+
+# SLATE ANALYSIS -- WHOLE FIXTURE LIST, NO PRINTING
+
+# ============================================================
+
+@dataclass(slots=True)
+class MatchProbs:
+    home: str
+    away: str
+    league: str
+    hxg: float
+    axg: float
+    home_win: float
+    draw: float
+    away_win: float
+    over_1_5: float
+    over_2_5: float
+    over_3_5: float
+    btts: float
+    corners_total: float
+
+@dataclass(slots=True)
+class ValueBet:
+    home: str
+    away: str
+    market: str
+    prob: float
+    odds: float
+    ev: float
+    half_kelly: float
+    tier: str
+    raw_prob: float  # Model % before calibration (the given prob for markets the model doesn't price)
+
+def _calibrate_batch(prob, market_type, cal):
+    return [calibrate_prob(round(float(p),1), market_type, cal) for p in prob]
+
+def analyse_slate(fixtures, odds, XG=None, cal=None, CD=None):
+    """
+    Batched, print-free analyse_v4 over a whole fixture list.
+    fixtures: iterable of (home, away); odds: {(home, away): odds_map} in analyse_v4 format.
+    Team names may use any spelling team_names.py knows; records carry the XG keys.
+    Ratings and calibration are loaded once. Returns (matches, value_bets) as
+    lists of MatchProbs / ValueBet records; pass them to render_slate to print.
+    CD overrides the corner table (CORNER_DATA), e.g. with the pipeline's live corners.
+    """
+    if XG is None: XG = load_xg()
+    if CD is None: CD = CORNER_DATA
+    if cal is None: cal = load_calibration()
+    given = list(fixtures)
+    if not given: return [], []
+    fixtures = [(team_key(home, XG), team_key(away, XG)) for home, away in given]
+
+    hxg, axg = np.array([calc_xg(home, away, XG) for home, away in fixtures]).T
+    rho = np.array([match_rho(home, XG) for home, _ in fixtures])
+
+    M = build_M_batch(hxg, axg, rho=rho)
+    with instrument.span("markets"):
+        dists = score_dists(M)
+        hw, d, aw = wdl_dists(dists)
+        raw = {
+            "home_win": np.round(hw*100, 1),
+            "draw": np.round(d*100, 1),
+            "away_win": np.round(aw*100, 1),
+            "over_2.5": np.round(over_under(dists, 2.5)[0]*100, 1),
+            "btts": np.round(btts_dists(dists)*100, 1),
+        }
+        probs = {key: _calibrate_batch(p, key, cal) for key, p in raw.items()}
+        o15 = np.round(over_under(dists, 1.5)[0]*100, 1)
+        o35 = np.round(over_under(dists, 3.5)[0]*100, 1)
+
+    matches, value_bets = [], []
+    for n, (home, away) in enumerate(fixtures):
+        tc = corners(home, away, CD)[2] if home in CD and away in CD else float("nan")
+        matches.append(MatchProbs(home, away, XG[home]["league"], float(hxg[n]), float(axg[n]),
+                                  probs["home_win"][n], probs["draw"][n], probs["away_win"][n],
+                                  float(o15[n]), probs["over_2.5"][n], float(o35[n]), probs["btts"][n], tc))
+        for mkt, (given_prob, mkt_odds) in odds.get(given[n], {}).items():
+            key = market_key(mkt)
+            prob = probs[key][n] if key else given_prob
+            e = ev_f(prob, mkt_odds)
+            if market_independence(mkt_odds) and e > 0:
+                value_bets.append(ValueBet(home, away, mkt, prob, mkt_odds, round(e*100,2),
+                                           kelly_f(prob, mkt_odds)[1], confidence_tier(prob),
+                                           float(raw[key][n]) if key else given_prob))
+
+    value_bets.sort(key=lambda vb: vb.ev, reverse=True)
+    return matches, value_bets
+
+def render_slate(matches, value_bets):
+    """Print a compact slate table and the value-bet list from analyse_slate"""
+    print(f"\n{'━'*70}")
+    print(f"  📋 SLATE: {len(matches)} fixtures  |  {len(value_bets)} value bets")
+    print(f"{'━'*70}")
+    print(f"  {'Match':<34} {'xG':>11} {'1':>6} {'X':>6} {'2':>6} {'O2.5':>6} {'BTTS':>6}")
+    for m in matches:
+        print(f"  {m.home+' v '+m.away:<34} {m.hxg:>5}-{m.axg:<5} {m.home_win:>5}% {m.draw:>5}% {m.away_win:>5}% {m.over_2_5:>5}% {m.btts:>5}%")
+
+    print(f"\n  💰 VALUE BETS")
+    if not value_bets:
+        print("  No positive EV bets found")
+    for vb in value_bets:
+        print(f"  ✅ {vb.home} v {vb.away} | {vb.market}: {vb.prob}% (raw {vb.raw_prob}%) @ {vb.odds}  EV:{vb.ev:+.1f}%  {vb.tier}  Stake:{vb.half_kelly}%")
+
+# ============================================================
+
+# DEMO RUN
+
+# ============================================================
+
+if __name__ == "__main__":
+    print("="*70)
+    print("  ⚽ BETTING MODEL v4.0 PRO")
+    print("  All 6 upgrades integrated")
+    print("="*70)
+
+    # Check model health first
+    health, n_bets, roi = model_health()
+    print(f"\n  🏥 MODEL HEALTH CHECK:")
+    print(f"  Status: {health}")
+    print(f"  Settled bets: {n_bets}")
+    if roi != 0:
+        print(f"  ROI: {roi*100:+.1f}%")
+
+    if "OFF" in health:
+        print(f"\n  ⚠️  MODEL IS COLD -- betting not recommended until recalibrated")
+        print(f"  Update xG data with recent results first")
+
+    print(f"\n\n{'='*70}")
+    print("  DEMO ANALYSIS -- SHOWING ALL NEW FEATURES")
+    print("="*70)
+
+    vb = analyse_v4("Girona", "Barcelona", {
+        "Barcelona Win": (69.9, 1.45),
+        "Over 2.5 Goals": (68.0, 1.72),
+        "BTTS Yes": (69.3, 1.78),
+        "Corners Over 9.5": (51.4, 1.90),
+    })
+
+    print(f"\n\n{'='*70}")
+    print("  📊 VALUE BETS SUMMARY")
+    print("="*70)
+    if vb:
+        for mkt, prob, odds, ev, hk, tier, _ in vb:
+            print(f"  ✅ {mkt}: {prob}% @ {odds}  EV:{ev:+.1f}%  {tier}  Stake:{hk}%")
+    else:
+        print("  No positive EV bets found")
+
+    print(f"\n\n{'='*70}")
+    print("  🔧 POST-MATCH: Update xG after result")
+    print("="*70)
+    print(f"  Example: Girona 2-1 Barcelona")
+    print(f"  Run: adjust_xg_after_match('Girona','Barcelona',2,1,1,2)")
+    print(f"  This updates both teams' xG ratings for next time")
+
+    print(f"\n{'='*70}")
+    print("  ✅ V4 PRO FEATURES ACTIVE:")
+    print("  1. ✅ Dynamic form adjustment")
+    print("  2. ✅ Probability calibration")
+    print("  3. ✅ Confidence bands (ELITE/STRONG/LEAN/NO BET)")
+    print("  4. ✅ Market efficiency filter (odds >= 1.70)")
+    print("  5. ✅ Correlation-aware parlay EV")
+    print("  6. ✅ Weekly model health report")
+    print("="*70)
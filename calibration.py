@@ -0,0 +1,197 @@
+"""
+⚽ BETTING MODEL — CALIBRATION FITTER
+
+Learns the calibration.json corrections from settled bets in bet_tracker.json.
+
+WHAT IT DOES:
+
+1. Streams settled bets from the tracker: a watermark marks how far it has read, and
+   only bets appended since, plus the few still pending at the last run, are looked at
+1. Keeps per-market reliability bins (count, wins, sum of model prob) — O(1) per settlement
+1. Fits a shrunk, isotonic (monotone) curve per market from the bins
+1. Writes calibration.json: legacy multiplicative biases + "curves" for calibrate_prob
+
+HOW TO RUN:
+python calibration.py              # Ingest new settlements and refit
+python calibration.py --rebuild    # Forget state and rescan the whole tracker
+
+Each bet needs "status" (won/lost), "raw_prob" (the model % before calibration,
+as analyse_v4 / analyse_slate return it) and either "market_type" (e.g. over_2.5)
+or a "market" name the model understands. Curves are applied to raw model
+probabilities, so they are fitted on raw ones too: "prob" is the already
+calibrated number, and fitting on it would stack each refit on the last. Bets
+recorded without raw_prob are skipped (and counted).
+"""
+
+import json
+import os
+import argparse
+
+import betting_model_v4_pro as bm
+
+# ============================================================
+
+# CONFIG
+
+# ============================================================
+
+N_BINS = 20          # 5% wide reliability bins
+PRIOR_BETS = 10      # Shrink each bin towards "model is right" with this many pseudo-bets
+MIN_MARKET_BETS = 30 # Same threshold model_health uses before trusting results
+
+def state_file():
+    return os.path.join(os.path.dirname(bm.CALIBRATION_FILE), "calibration_state.json")
+
+# ============================================================
+
+# RUNNING AGGREGATES
+
+# ============================================================
+
+def bet_market_type(bet):
+    """Calibration key for a tracker bet, or None if the model doesn't price it"""
+    if bet.get("market_type"):
+        return bet["market_type"].lower().replace(" ", "_")
+    mkt = bet.get("market", "")
+    if "corner" in mkt.lower():
+        return "corners_over" if "over" in mkt.lower() else "corners_under" if "under" in mkt.lower() else None
+    if "under 2.5" in mkt.lower():
+        return "under_2.5"
+    return bm.market_key(mkt)
+
+class CalibrationFitter:
+    """Per-market reliability bins, updated one settlement at a time"""
+
+    def __init__(self, state=None):
+        state = state or {}
+        if "pos" not in state:  # State from before the watermark (bins fitted on calibrated probs): start over
+            state = {}
+        self.pos = state.get("pos", 0)              # Tracker bets before this index have been read
+        self.pending = state.get("pending", [])     # Indices below pos still pending when last read
+        self.markets = state.get("markets", {})
+        self.no_raw = state.get("no_raw", 0)        # Settled bets skipped for lacking raw_prob
+
+    def update(self, market_type, prob, won):
+        """Add one settled prediction (prob in %) — O(1)"""
+        agg = self.markets.get(market_type)
+        if agg is None:
+            agg = self.markets[market_type] = {"n": [0]*N_BINS, "w": [0]*N_BINS, "p": [0.0]*N_BINS}
+        b = min(max(int(prob / (100 / N_BINS)), 0), N_BINS - 1)
+        agg["n"][b] += 1
+        agg["w"][b] += 1 if won else 0
+        agg["p"][b] += prob / 100
+
+    def ingest(self, bets):
+        """
+        Feed the tracker's bet list (append-only). Reads the bets pending last time and those
+        appended since, never the rest. Returns how many settlements were counted.
+        """
+        new, pending = 0, []
+        for i in self.pending + list(range(self.pos, len(bets))):
+            if i >= len(bets):
+                continue
+            bet = bets[i]
+            status = bet.get("status")
+            if status not in ("won", "lost", "void"):
+                pending.append(i)
+                continue
+            key = bet_market_type(bet)
+            if status == "void" or key is None:
+                continue
+            if bet.get("raw_prob") is None:
+                self.no_raw += 1
+                continue
+            self.update(key, float(bet["raw_prob"]), status == "won")
+            new += 1
+        self.pos, self.pending = max(self.pos, len(bets)), pending
+        return new
+
+    def fit(self, market_type):
+        """
+        Isotonic curve for one market: {"x": model %, "y": calibrated %, "bias": ratio, "n": bets}.
+        None until the market has MIN_MARKET_BETS settlements.
+        """
+        agg = self.markets.get(market_type)
+        if not agg or sum(agg["n"]) < MIN_MARKET_BETS:
+            return None
+
+        # Shrunk per-bin hit rate, then pool adjacent violators so the curve is monotone
+        blocks = []  # [rate, weight, bin mean preds]
+        for n, w, p in zip(agg["n"], agg["w"], agg["p"]):
+            if n == 0:
+                continue
+            pred = p / n
+            blocks.append([(w + PRIOR_BETS * pred) / (n + PRIOR_BETS), n, [pred]])
+            while len(blocks) > 1 and blocks[-2][0] > blocks[-1][0]:
+                last = blocks.pop()
+                prev = blocks[-1]
+                wt = prev[1] + last[1]
+                prev[0] = (prev[0] * prev[1] + last[0] * last[1]) / wt
+                prev[1] = wt
+                prev[2] += last[2]
+
+        xs, ys = [], []
+        for rate, _, preds in blocks:
+            for pred in preds:
+                xs.append(round(pred * 100, 2))
+                ys.append(round(rate * 100, 2))
+
+        total_n = sum(agg["n"])
+        total_pred = sum(agg["p"])
+        bias = round(sum(agg["w"]) / total_pred, 3) if total_pred > 0 else 1.0
+        return {"x": xs, "y": ys, "bias": bias, "n": total_n}
+
+    def calibration(self, base=None):
+        """calibration.json contents: base biases overridden by fitted markets, plus curves"""
+        cal = {k: v for k, v in (base or {}).items() if k != "curves"}
+        curves = {}
+        for key in sorted(self.markets):
+            fit = self.fit(key)
+            if fit:
+                cal[key] = fit["bias"]
+                curves[key] = {"x": fit["x"], "y": fit["y"], "n": fit["n"]}
+        cal["curves"] = curves
+        return cal
+
+    def state(self):
+        return {"pos": self.pos, "pending": self.pending, "markets": self.markets, "no_raw": self.no_raw}
+
+# ============================================================
+
+# TRACKER → CALIBRATION.JSON
+
+# ============================================================
+
+def load_fitter(path=None):
+    path = path or state_file()
+    if os.path.exists(path):
+        with open(path) as f:
+            return CalibrationFitter(json.load(f))
+    return CalibrationFitter()
+
+def update_calibration(rebuild=False):
+    """
+    Ingest new settlements from TRACKER_FILE, refit and write CALIBRATION_FILE.
+    Returns (new settlements, fitted markets, settled bets skipped so far for lacking raw_prob).
+    """
+    fitter = CalibrationFitter() if rebuild else load_fitter()
+    tracker = bm.read_json_cached(bm.TRACKER_FILE) or {"bets": []}
+    new = fitter.ingest(tracker.get("bets", []))
+
+    base = bm.load_calibration()
+    cal = fitter.calibration(base)
+    bm.write_json_cached(bm.CALIBRATION_FILE, cal)
+    with open(state_file(), "w") as f:
+        json.dump(fitter.state(), f)
+    return new, sorted(cal["curves"]), fitter.no_raw
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fit calibration.json from the bet tracker")
+    parser.add_argument("--rebuild", action="store_true", help="Rescan the whole tracker from scratch")
+    args = parser.parse_args()
+
+    new, fitted, no_raw = update_calibration(rebuild=args.rebuild)
+    print(f"  ✅ {new} new settlements ingested")
+    print(f"  Fitted markets: {fitted if fitted else 'None (need 30+ bets per market)'}")
+    if no_raw:
+        print(f"  ⚠️  {no_raw} settled bets have no raw_prob (uncalibrated model %) and were not used")
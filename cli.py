@@ -0,0 +1,158 @@
+"""
+⚽ BETTING MODEL — COMMAND LINE
+
+One entry point for the everyday commands. Nothing heavy is imported up
+front: each subcommand imports what it needs when it runs, so `check` and
+`list` never load numpy or pandas, and `analyse` loads the model alone
+(no pandas, requests or lxml).
+
+HOW TO RUN:
+python cli.py analyse Girona Barcelona --odds "Barcelona Win=69.9@1.45" "Over 2.5 Goals=1.72"
+python cli.py slate fixtures.json    # [{"home", "away", "odds": {market: [prob, odds] or odds}}, ...]
+python cli.py check                  # Data freshness, per league
+python cli.py list                   # Supported leagues
+python cli.py update --league EPL    # Run the data pipeline (same flags as data_pipeline.py)
+
+ODDS:
+"Market=odds" or "Market=prob@odds" (prob in %). Bare odds only count for the
+markets the model prices itself (result, over 2.5, BTTS); analyse_v4 uses the
+given prob for anything else.
+"""
+
+import argparse
+import json
+import sys
+
+# ============================================================
+
+# HELPERS
+
+# ============================================================
+
+class UsageError(ValueError):
+    pass
+
+def parse_odds(specs):
+    """{market: (prob, odds)} from ["Market=odds", "Market=prob@odds", ...]"""
+    odds = {}
+    for spec in specs or []:
+        market, sep, value = spec.rpartition("=")
+        if not sep or not market.strip():
+            raise UsageError(f"odds must look like 'Market=odds' or 'Market=prob@odds': {spec!r}")
+        prob, _, price = value.rpartition("@")
+        try:
+            prob, price = float(prob or 0.0), float(price)
+        except ValueError:
+            raise UsageError(f"not a number in {spec!r}")
+        if price <= 1:
+            raise UsageError(f"odds for {market.strip()!r} must be above 1.0")
+        odds[market.strip()] = (prob, price)
+    return odds
+
+def read_slate(path):
+    """(pairs, {(home, away): odds map}) from a JSON fixture list (or {"fixtures": [...]}, as model_server takes)"""
+    try:
+        with open(path) as f:
+            fixtures = json.load(f)
+        if isinstance(fixtures, dict):
+            fixtures = fixtures.get("fixtures", [])
+        pairs, odds = [], {}
+        for fx in fixtures:
+            pair = (fx["home"], fx["away"])
+            pairs.append(pair)
+            odds[pair] = {m: ((0.0, v) if isinstance(v, (int, float)) else (float(v[0]), float(v[1])))
+                          for m, v in (fx.get("odds") or {}).items()}
+    except (OSError, ValueError, KeyError, TypeError, IndexError) as e:
+        raise UsageError(f"{path}: not a fixture list ({type(e).__name__}: {e})")
+    return pairs, odds
+
+def check_teams(bm, XG, teams):
+    """UsageError for the first team with no ratings under any known spelling"""
+    for team in teams:
+        if bm.team_key(team, XG) not in XG:
+            raise UsageError(f"unknown team: {team!r}")
+
+# ============================================================
+
+# SUBCOMMANDS
+
+# ============================================================
+
+def cmd_analyse(args):
+    odds = parse_odds(args.odds)  # Bad input fails before the model is imported
+    import betting_model_v4_pro as bm
+    check_teams(bm, bm.load_xg(), (args.home, args.away))
+    bm.analyse_v4(args.home, args.away, odds)
+
+def cmd_slate(args):
+    import betting_model_v4_pro as bm
+    pairs, odds = read_slate(args.file)
+    XG = bm.load_xg()
+    check_teams(bm, XG, [team for pair in pairs for team in pair])
+    matches, value_bets = bm.analyse_slate(pairs, odds, XG=XG)
+    bm.render_slate(matches, value_bets[:args.top] if args.top else value_bets)
+
+def cmd_check(args):
+    import data_pipeline as dp
+    dp.check_freshness()
+
+def cmd_list(args):
+    import data_pipeline as dp
+    print("\n  Supported leagues:")
+    for key, league in dp.LEAGUES.items():
+        print(f"  {key:<15} {league['name']} ({league['country']})")
+
+def cmd_update(args):
+    import data_pipeline as dp
+    if args.league and args.league not in dp.LEAGUES:
+        print(f"  ❌ Unknown league: {args.league}")
+        print(f"  Run: python cli.py list")
+        return 1
+    dp.run_pipeline([args.league] if args.league else None, dry_run=args.dry_run,
+                    offline=args.offline, trace=args.trace)
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Betting model command line")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("analyse", help="Full analysis of one match")
+    p.add_argument("home")
+    p.add_argument("away")
+    p.add_argument("--odds", nargs="+", metavar="MARKET=[PROB@]ODDS", help="Bookmaker prices to evaluate")
+    p.set_defaults(func=cmd_analyse)
+
+    p = sub.add_parser("slate", help="Batched analysis of a JSON fixture list")
+    p.add_argument("file")
+    p.add_argument("--top", type=int, help="Show only the N best value bets")
+    p.set_defaults(func=cmd_slate)
+
+    p = sub.add_parser("check", help="Check data freshness")
+    p.set_defaults(func=cmd_check)
+
+    p = sub.add_parser("list", help="List supported leagues")
+    p.set_defaults(func=cmd_list)
+
+    p = sub.add_parser("update", help="Run the data pipeline")
+    p.add_argument("--league", help="Update a single league (e.g. EPL, LaLiga)")
+    p.add_argument("--dry-run", action="store_true", help="Test without saving")
+    p.add_argument("--offline", action="store_true", help="Replay cached responses, no network")
+    p.add_argument("--trace", metavar="PATH", help="Append every timed stage to a JSONL trace file")
+    p.set_defaults(func=cmd_update)
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        return args.func(args)
+    except UsageError as e:
+        parser.error(str(e))
+
+# ============================================================
+
+# CLI
+
+# ============================================================
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""
+⚽ BETTING MODEL — CORNERS ENGINE
+
+Precomputed corner-count probability tables, replacing a scipy.stats call per line.
+
+A Poisson (or negative-binomial, for over-dispersed leagues) CDF table is
+built once over a grid of expected corners (0-30 in 0.01 steps) and counts
+0-60. Every line for every fixture is then one vectorised lookup with
+linear interpolation between grid points — no scipy needed. A single line
+(analyse_v4's cprob) skips the table and sums the Poisson pmf directly.
+
+Team corners use the per-side expectations from corners(); corner handicaps
+use the difference of the two sides via markets.py settlement, so quarter
+and whole lines push the same way as goals handicaps.
+
+All probabilities here are 0-1 fractions.
+"""
+
+import math
+
+import numpy as np
+
+from markets import score_dists, asian_handicap
+
+# ============================================================
+
+# CONFIG
+
+# ============================================================
+
+MU_STEP = 0.01
+MU_MAX = 30.0
+K_MAX = 60
+K_HCP = 30  # Per-side corner cap for handicaps (P(one side > 30) is negligible)
+
+# ============================================================
+
+# TABLES
+
+# ============================================================
+
+_PMF = {}  # dispersion (None = Poisson) -> (grid, K_MAX+1) pmf table
+_CDF = {}
+
+def _log_fact():
+    return np.array([math.lgamma(k + 1) for k in range(K_MAX + 1)])
+
+def pmf_table(dispersion=None):
+    """
+    pmf[g, k] = P(X = k) at mean g * MU_STEP.
+    dispersion=None is Poisson; a number r is negative binomial with variance mu + mu^2/r.
+    """
+    if dispersion not in _PMF:
+        mu = np.arange(0, MU_MAX + MU_STEP / 2, MU_STEP)[:, None]
+        k = np.arange(K_MAX + 1)
+        mu_safe = np.maximum(mu, np.finfo(float).tiny)
+        if dispersion is None:
+            logp = k * np.log(mu_safe) - mu - _log_fact()
+        else:
+            r = float(dispersion)
+            log_rising = np.concatenate([[0.0], np.cumsum(np.log(r + np.arange(K_MAX)))])  # log Γ(k+r)/Γ(r)
+            logp = log_rising - _log_fact() + r * np.log(r / (r + mu)) + k * np.log(mu_safe / (r + mu))
+        _PMF[dispersion] = np.exp(logp)
+    return _PMF[dispersion]
+
+def cdf_table(dispersion=None):
+    if dispersion not in _CDF:
+        _CDF[dispersion] = np.cumsum(pmf_table(dispersion), axis=1)
+    return _CDF[dispersion]
+
+def _lookup(table, mu):
+    """Interpolated (N, K_MAX+1) rows of a table for N expected counts"""
+    pos = np.clip(np.atleast_1d(np.asarray(mu, dtype=float)), 0, MU_MAX) / MU_STEP
+    lo = np.floor(pos).astype(int)
+    hi = np.minimum(lo + 1, len(table) - 1)
+    w = (pos - lo)[:, None]
+    return table[lo] * (1 - w) + table[hi] * w
+
+# ============================================================
+
+# LINES
+
+# ============================================================
+
+def over_probs(mu, lines, dispersion=None):
+    """(N, L) P(count > line) for N expected counts and L lines, in one lookup"""
+    idx = np.clip(np.floor(np.atleast_1d(np.asarray(lines, dtype=float))).astype(int), -1, K_MAX)
+    cdf = np.concatenate([np.zeros((len(np.atleast_1d(mu)), 1)), _lookup(cdf_table(dispersion), mu)], axis=1)
+    return 1 - cdf[:, idx + 1]
+
+def pmf_rows(mu, dispersion=None):
+    return _lookup(pmf_table(dispersion), mu)
+
+def poisson_over(mu, line):
+    """Exact Poisson P(count > line) for one expected count — plain math, no table to build"""
+    k = math.floor(line)
+    if k < 0:
+        return 1.0
+    term = cdf = math.exp(-mu)
+    for i in range(1, min(k, K_MAX) + 1):
+        term *= mu / i
+        cdf += term
+    return max(1.0 - cdf, 0.0)
+
+TOTAL_LINES = (7.5, 8.5, 9.5, 10.5, 11.5, 12.5)
+TEAM_LINES = (2.5, 3.5, 4.5, 5.5, 6.5)
+HCP_LINES = (-3.5, -2.5, -1.5, -0.5, 0.5, 1.5, 2.5)
+
+def corner_board(hc, ac, total_lines=TOTAL_LINES, team_lines=TEAM_LINES, hcp_lines=HCP_LINES, dispersion=None):
+    """
+    Total, team and handicap corner markets from per-side expected corners,
+    as {market name: (N,) array}. Push fractions for whole/quarter handicap
+    lines are stored under "<name> push".
+    """
+    hc = np.atleast_1d(np.asarray(hc, dtype=float))
+    ac = np.atleast_1d(np.asarray(ac, dtype=float))
+    board = {}
+
+    tot = over_probs(hc + ac, total_lines, dispersion)
+    home = over_probs(hc, team_lines, dispersion)
+    away = over_probs(ac, team_lines, dispersion)
+    for n, line in enumerate(total_lines):
+        board[f"Corners Over {line}"] = tot[:, n]
+        board[f"Corners Under {line}"] = 1 - tot[:, n]
+    for n, line in enumerate(team_lines):
+        board[f"Home Corners Over {line}"] = home[:, n]
+        board[f"Home Corners Under {line}"] = 1 - home[:, n]
+        board[f"Away Corners Over {line}"] = away[:, n]
+        board[f"Away Corners Under {line}"] = 1 - away[:, n]
+
+    if hcp_lines:
+        # Sides are independent, so the joint "corner score" matrix is an outer product
+        ph = pmf_rows(hc, dispersion)[:, :K_HCP + 1]
+        pa = pmf_rows(ac, dispersion)[:, :K_HCP + 1]
+        d = score_dists(ph[:, :, None] * pa[:, None, :])
+        for line in hcp_lines:
+            for side, sign in (("Home", 1), ("Away", -1)):
+                win, push, _ = asian_handicap(d, sign * line, side.lower())
+                name = f"Corners AH {side} {sign * line:+g}"
+                board[name] = win
+                if np.any(push):
+                    board[f"{name} push"] = push
+    return board
@@ -1,4 +1,4 @@
-# “””
+"""
 ⚽ BETTING MODEL V5 — LIVE DATA PIPELINE
 
 Run this script weekly to update the model with fresh data.
@@ -9,44 +9,60 @@ WHAT IT DOES:
 1. Downloads Football-Data.co.uk CSVs for corners/cards
 1. Calculates rolling 5-game form for every team
 1. Updates xg_data_live.json automatically
+1. Writes per-league binary ratings shards + manifest to snapshots/ (snapshots.py)
 1. Model uses this fresh data on next analysis run
 
 HOW TO RUN:
 python data_pipeline.py              # Full update
-python data_pipeline.py –league EPL # Single league
-python data_pipeline.py –check      # Verify data freshness
+python data_pipeline.py --league EPL # Single league
+python data_pipeline.py --check      # Verify data freshness
+python data_pipeline.py --offline    # Re-run from cached responses, no network
+python data_pipeline.py --trace run.jsonl  # Also write a per-stage JSONL trace
 
 REQUIREMENTS:
-pip install requests beautifulsoup4 pandas lxml
+pip install requests pandas lxml  (beautifulsoup4 only for fbref_parser.py benchmarks)
+--check and --list need none of them (see cli.py for the one-stop command line)
 
 SCHEDULE (recommended):
 Run every Monday morning before placing bets
 Or after every matchday to keep form data current
-“””
+"""
 
-import requests
-import pandas as pd
-from bs4 import BeautifulSoup
 import json
 import os
+import hashlib
 import time
 import argparse
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
 from datetime import datetime, timedelta
 
+# requests, pandas/numpy and lxml (fbref_parser) are imported where they are used,
+# so --check, --list and the model's imports of this module don't pay for them
+from http_cache import HttpCache, CachedResponse
+import instrument
+import snapshots
+import team_names
+
 # ============================================================
 
 # CONFIG
 
 # ============================================================
 
-DATA_DIR = os.path.dirname(os.path.abspath(**file**))
-XG_FILE = os.path.join(DATA_DIR, “xg_data_live.json”)
-CORNERS_FILE = os.path.join(DATA_DIR, “corners_data_live.json”)
-CARDS_FILE = os.path.join(DATA_DIR, “cards_data_live.json”)
-LOG_FILE = os.path.join(DATA_DIR, “pipeline_log.json”)
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+XG_FILE = os.path.join(DATA_DIR, "xg_data_live.json")
+CORNERS_FILE = os.path.join(DATA_DIR, "corners_data_live.json")
+CARDS_FILE = os.path.join(DATA_DIR, "cards_data_live.json")
+LOG_FILE = os.path.join(DATA_DIR, "pipeline_log.json")
+HTTP_CACHE_DIR = os.path.join(DATA_DIR, "http_cache")
+STATE_FILE = os.path.join(DATA_DIR, "pipeline_state.json")  # Per-league watermarks + rolling aggregates
+SNAPSHOT_DIR = os.path.join(DATA_DIR, "snapshots")  # Per-league binary shards + manifest for the model
 
 HEADERS = {
-“User-Agent”: “Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36”
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
 }
 
 # How many recent games to use for rolling form
@@ -57,6 +73,21 @@ FORM_GAMES = 5
 
 FORM_WEIGHT = 0.4  # 40% recent, 60% season
 
+# Concurrent fetching: worker threads and per-host token buckets (requests/sec, burst)
+
+MAX_WORKERS = 8
+HOST_LIMITS = {
+    "fbref.com": (1 / 4, 1),                 # FBref rate limits aggressively — one request per 4s
+    "www.football-data.co.uk": (2.0, 2),
+}
+DEFAULT_HOST_LIMIT = (1.0, 1)
+MAX_RETRIES = 3
+BACKOFF_SECONDS = 60  # Wait after a 429 when the server sends no Retry-After
+
+# Offline mode replays cached responses only (set by --offline / run_pipeline(offline=True))
+
+OFFLINE = False
+
 # ============================================================
 
 # LEAGUE CONFIG
@@ -66,256 +97,320 @@ FORM_WEIGHT = 0.4  # 40% recent, 60% season
 # ============================================================
 
 LEAGUES = {
-# TOP 5 LEAGUES
-“EPL”: {
-“name”: “Premier League”,
-“country”: “England”,
-“fbref_url”: “https://fbref.com/en/comps/9/Premier-League-Stats”,
-“fbref_squad_url”: “https://fbref.com/en/comps/9/shooting/Premier-League-Stats”,
-“fd_url”: “https://www.football-data.co.uk/mmz4281/2526/E0.csv”,
-“card_avg”: 3.8,
-“red_avg”: 0.12,
-},
-“LaLiga”: {
-“name”: “La Liga”,
-“country”: “Spain”,
-“fbref_url”: “https://fbref.com/en/comps/12/La-Liga-Stats”,
-“fbref_squad_url”: “https://fbref.com/en/comps/12/shooting/La-Liga-Stats”,
-“fd_url”: “https://www.football-data.co.uk/mmz4281/2526/SP1.csv”,
-“card_avg”: 4.2,
-“red_avg”: 0.18,
-},
-“Bundesliga”: {
-“name”: “Bundesliga”,
-“country”: “Germany”,
-“fbref_url”: “https://fbref.com/en/comps/20/Bundesliga-Stats”,
-“fbref_squad_url”: “https://fbref.com/en/comps/20/shooting/Bundesliga-Stats”,
-“fd_url”: “https://www.football-data.co.uk/mmz4281/2526/D1.csv”,
-“card_avg”: 3.5,
-“red_avg”: 0.10,
-},
-“SerieA”: {
-“name”: “Serie A”,
-“country”: “Italy”,
-“fbref_url”: “https://fbref.com/en/comps/11/Serie-A-Stats”,
-“fbref_squad_url”: “https://fbref.com/en/comps/11/shooting/Serie-A-Stats”,
-“fd_url”: “https://www.football-data.co.uk/mmz4281/2526/I1.csv”,
-“card_avg”: 4.8,
-“red_avg”: 0.22,
-},
-“Ligue1”: {
-“name”: “Ligue 1”,
-“country”: “France”,
-“fbref_url”: “https://fbref.com/en/comps/13/Ligue-1-Stats”,
-“fbref_squad_url”: “https://fbref.com/en/comps/13/shooting/Ligue-1-Stats”,
-“fd_url”: “https://www.football-data.co.uk/mmz4281/2526/F1.csv”,
-“card_avg”: 4.1,
-“red_avg”: 0.15,
-},
-
-```
-# UEFA FEEDER LEAGUES
-"Portugal": {
-    "name": "Primeira Liga",
-    "country": "Portugal",
-    "fbref_url": "https://fbref.com/en/comps/32/Primeira-Liga-Stats",
-    "fbref_squad_url": "https://fbref.com/en/comps/32/shooting/Primeira-Liga-Stats",
-    "fd_url": "https://www.football-data.co.uk/mmz4281/2526/P1.csv",
-    "card_avg": 4.5,
-    "red_avg": 0.20,
-},
-"Eredivisie": {
-    "name": "Eredivisie",
-    "country": "Netherlands",
-    "fbref_url": "https://fbref.com/en/comps/23/Eredivisie-Stats",
-    "fbref_squad_url": "https://fbref.com/en/comps/23/shooting/Eredivisie-Stats",
-    "fd_url": "https://www.football-data.co.uk/mmz4281/2526/N1.csv",
-    "card_avg": 3.6,
-    "red_avg": 0.11,
-},
-"Belgium": {
-    "name": "Belgian Pro League",
-    "country": "Belgium",
-    "fbref_url": "https://fbref.com/en/comps/37/Belgian-Pro-League-Stats",
-    "fbref_squad_url": "https://fbref.com/en/comps/37/shooting/Belgian-Pro-League-Stats",
-    "fd_url": "https://www.football-data.co.uk/mmz4281/2526/B1.csv",
-    "card_avg": 4.0,
-    "red_avg": 0.14,
-},
-"Scotland": {
-    "name": "Scottish Premiership",
-    "country": "Scotland",
-    "fbref_url": "https://fbref.com/en/comps/40/Scottish-Premiership-Stats",
-    "fbref_squad_url": "https://fbref.com/en/comps/40/shooting/Scottish-Premiership-Stats",
-    "fd_url": "https://www.football-data.co.uk/mmz4281/2526/SC0.csv",
-    "card_avg": 3.9,
-    "red_avg": 0.13,
-},
-"Turkey": {
-    "name": "Süper Lig",
-    "country": "Turkey",
-    "fbref_url": "https://fbref.com/en/comps/26/Super-Lig-Stats",
-    "fbref_squad_url": "https://fbref.com/en/comps/26/shooting/Super-Lig-Stats",
-    "fd_url": "https://www.football-data.co.uk/mmz4281/2526/T1.csv",
-    "card_avg": 5.2,
-    "red_avg": 0.25,
-},
-"Austria": {
-    "name": "Austrian Bundesliga",
-    "country": "Austria",
-    "fbref_url": "https://fbref.com/en/comps/56/Austrian-Football-Bundesliga-Stats",
-    "fbref_squad_url": "https://fbref.com/en/comps/56/shooting/Austrian-Football-Bundesliga-Stats",
-    "fd_url": "https://www.football-data.co.uk/mmz4281/2526/A1.csv",
-    "card_avg": 3.7,
-    "red_avg": 0.12,
-},
-"Greece": {
-    "name": "Super League",
-    "country": "Greece",
-    "fbref_url": "https://fbref.com/en/comps/27/Super-League-Greece-Stats",
-    "fbref_squad_url": "https://fbref.com/en/comps/27/shooting/Super-League-Greece-Stats",
-    "fd_url": "https://www.football-data.co.uk/mmz4281/2526/G1.csv",
-    "card_avg": 4.6,
-    "red_avg": 0.21,
-},
-"CzechRep": {
-    "name": "Czech First League",
-    "country": "Czech Republic",
-    "fbref_url": "https://fbref.com/en/comps/66/Czech-First-League-Stats",
-    "fbref_squad_url": "https://fbref.com/en/comps/66/shooting/Czech-First-League-Stats",
-    "fd_url": "https://www.football-data.co.uk/mmz4281/2526/CZ1.csv",
-    "card_avg": 3.8,
-    "red_avg": 0.13,
-},
-"Denmark": {
-    "name": "Superliga",
-    "country": "Denmark",
-    "fbref_url": "https://fbref.com/en/comps/50/Danish-Superliga-Stats",
-    "fbref_squad_url": "https://fbref.com/en/comps/50/shooting/Danish-Superliga-Stats",
-    "fd_url": "https://www.football-data.co.uk/mmz4281/2526/DK1.csv",
-    "card_avg": 3.5,
-    "red_avg": 0.10,
-},
-"Norway": {
-    "name": "Eliteserien",
-    "country": "Norway",
-    "fbref_url": "https://fbref.com/en/comps/28/Eliteserien-Stats",
-    "fbref_squad_url": "https://fbref.com/en/comps/28/shooting/Eliteserien-Stats",
-    "fd_url": "https://www.football-data.co.uk/mmz4281/2526/NO1.csv",
-    "card_avg": 3.4,
-    "red_avg": 0.09,
-},
-"Switzerland": {
-    "name": "Super League",
-    "country": "Switzerland",
-    "fbref_url": "https://fbref.com/en/comps/57/Swiss-Super-League-Stats",
-    "fbref_squad_url": "https://fbref.com/en/comps/57/shooting/Swiss-Super-League-Stats",
-    "fd_url": "https://www.football-data.co.uk/mmz4281/2526/SZ1.csv",
-    "card_avg": 3.6,
-    "red_avg": 0.11,
-},
-"Croatia": {
-    "name": "HNL",
-    "country": "Croatia",
-    "fbref_url": "https://fbref.com/en/comps/63/Croatian-Football-League-Stats",
-    "fbref_squad_url": "https://fbref.com/en/comps/63/shooting/Croatian-Football-League-Stats",
-    "fd_url": "https://www.football-data.co.uk/mmz4281/2526/HR1.csv",
-    "card_avg": 4.2,
-    "red_avg": 0.16,
-},
-```
+    # TOP 5 LEAGUES
+    "EPL": {
+        "name": "Premier League",
+        "country": "England",
+        "fbref_url": "https://fbref.com/en/comps/9/Premier-League-Stats",
+        "fbref_squad_url": "https://fbref.com/en/comps/9/shooting/Premier-League-Stats",
+        "fd_url": "https://www.football-data.co.uk/mmz4281/2526/E0.csv",
+        "card_avg": 3.8,
+        "red_avg": 0.12,
+    },
+    "LaLiga": {
+        "name": "La Liga",
+        "country": "Spain",
+        "fbref_url": "https://fbref.com/en/comps/12/La-Liga-Stats",
+        "fbref_squad_url": "https://fbref.com/en/comps/12/shooting/La-Liga-Stats",
+        "fd_url": "https://www.football-data.co.uk/mmz4281/2526/SP1.csv",
+        "card_avg": 4.2,
+        "red_avg": 0.18,
+    },
+    "Bundesliga": {
+        "name": "Bundesliga",
+        "country": "Germany",
+        "fbref_url": "https://fbref.com/en/comps/20/Bundesliga-Stats",
+        "fbref_squad_url": "https://fbref.com/en/comps/20/shooting/Bundesliga-Stats",
+        "fd_url": "https://www.football-data.co.uk/mmz4281/2526/D1.csv",
+        "card_avg": 3.5,
+        "red_avg": 0.10,
+    },
+    "SerieA": {
+        "name": "Serie A",
+        "country": "Italy",
+        "fbref_url": "https://fbref.com/en/comps/11/Serie-A-Stats",
+        "fbref_squad_url": "https://fbref.com/en/comps/11/shooting/Serie-A-Stats",
+        "fd_url": "https://www.football-data.co.uk/mmz4281/2526/I1.csv",
+        "card_avg": 4.8,
+        "red_avg": 0.22,
+    },
+    "Ligue1": {
+        "name": "Ligue 1",
+        "country": "France",
+        "fbref_url": "https://fbref.com/en/comps/13/Ligue-1-Stats",
+        "fbref_squad_url": "https://fbref.com/en/comps/13/shooting/Ligue-1-Stats",
+        "fd_url": "https://www.football-data.co.uk/mmz4281/2526/F1.csv",
+        "card_avg": 4.1,
+        "red_avg": 0.15,
+    },
+
+    # UEFA FEEDER LEAGUES
+    "Portugal": {
+        "name": "Primeira Liga",
+        "country": "Portugal",
+        "fbref_url": "https://fbref.com/en/comps/32/Primeira-Liga-Stats",
+        "fbref_squad_url": "https://fbref.com/en/comps/32/shooting/Primeira-Liga-Stats",
+        "fd_url": "https://www.football-data.co.uk/mmz4281/2526/P1.csv",
+        "card_avg": 4.5,
+        "red_avg": 0.20,
+    },
+    "Eredivisie": {
+        "name": "Eredivisie",
+        "country": "Netherlands",
+        "fbref_url": "https://fbref.com/en/comps/23/Eredivisie-Stats",
+        "fbref_squad_url": "https://fbref.com/en/comps/23/shooting/Eredivisie-Stats",
+        "fd_url": "https://www.football-data.co.uk/mmz4281/2526/N1.csv",
+        "card_avg": 3.6,
+        "red_avg": 0.11,
+    },
+    "Belgium": {
+        "name": "Belgian Pro League",
+        "country": "Belgium",
+        "fbref_url": "https://fbref.com/en/comps/37/Belgian-Pro-League-Stats",
+        "fbref_squad_url": "https://fbref.com/en/comps/37/shooting/Belgian-Pro-League-Stats",
+        "fd_url": "https://www.football-data.co.uk/mmz4281/2526/B1.csv",
+        "card_avg": 4.0,
+        "red_avg": 0.14,
+    },
+    "Scotland": {
+        "name": "Scottish Premiership",
+        "country": "Scotland",
+        "fbref_url": "https://fbref.com/en/comps/40/Scottish-Premiership-Stats",
+        "fbref_squad_url": "https://fbref.com/en/comps/40/shooting/Scottish-Premiership-Stats",
+        "fd_url": "https://www.football-data.co.uk/mmz4281/2526/SC0.csv",
+        "card_avg": 3.9,
+        "red_avg": 0.13,
+    },
+    "Turkey": {
+        "name": "Süper Lig",
+        "country": "Turkey",
+        "fbref_url": "https://fbref.com/en/comps/26/Super-Lig-Stats",
+        "fbref_squad_url": "https://fbref.com/en/comps/26/shooting/Super-Lig-Stats",
+        "fd_url": "https://www.football-data.co.uk/mmz4281/2526/T1.csv",
+        "card_avg": 5.2,
+        "red_avg": 0.25,
+    },
+    "Austria": {
+        "name": "Austrian Bundesliga",
+        "country": "Austria",
+        "fbref_url": "https://fbref.com/en/comps/56/Austrian-Football-Bundesliga-Stats",
+        "fbref_squad_url": "https://fbref.com/en/comps/56/shooting/Austrian-Football-Bundesliga-Stats",
+        "fd_url": "https://www.football-data.co.uk/mmz4281/2526/A1.csv",
+        "card_avg": 3.7,
+        "red_avg": 0.12,
+    },
+    "Greece": {
+        "name": "Super League",
+        "country": "Greece",
+        "fbref_url": "https://fbref.com/en/comps/27/Super-League-Greece-Stats",
+        "fbref_squad_url": "https://fbref.com/en/comps/27/shooting/Super-League-Greece-Stats",
+        "fd_url": "https://www.football-data.co.uk/mmz4281/2526/G1.csv",
+        "card_avg": 4.6,
+        "red_avg": 0.21,
+    },
+    "CzechRep": {
+        "name": "Czech First League",
+        "country": "Czech Republic",
+        "fbref_url": "https://fbref.com/en/comps/66/Czech-First-League-Stats",
+        "fbref_squad_url": "https://fbref.com/en/comps/66/shooting/Czech-First-League-Stats",
+        "fd_url": "https://www.football-data.co.uk/mmz4281/2526/CZ1.csv",
+        "card_avg": 3.8,
+        "red_avg": 0.13,
+    },
+    "Denmark": {
+        "name": "Superliga",
+        "country": "Denmark",
+        "fbref_url": "https://fbref.com/en/comps/50/Danish-Superliga-Stats",
+        "fbref_squad_url": "https://fbref.com/en/comps/50/shooting/Danish-Superliga-Stats",
+        "fd_url": "https://www.football-data.co.uk/mmz4281/2526/DK1.csv",
+        "card_avg": 3.5,
+        "red_avg": 0.10,
+    },
+    "Norway": {
+        "name": "Eliteserien",
+        "country": "Norway",
+        "fbref_url": "https://fbref.com/en/comps/28/Eliteserien-Stats",
+        "fbref_squad_url": "https://fbref.com/en/comps/28/shooting/Eliteserien-Stats",
+        "fd_url": "https://www.football-data.co.uk/mmz4281/2526/NO1.csv",
+        "card_avg": 3.4,
+        "red_avg": 0.09,
+    },
+    "Switzerland": {
+        "name": "Super League",
+        "country": "Switzerland",
+        "fbref_url": "https://fbref.com/en/comps/57/Swiss-Super-League-Stats",
+        "fbref_squad_url": "https://fbref.com/en/comps/57/shooting/Swiss-Super-League-Stats",
+        "fd_url": "https://www.football-data.co.uk/mmz4281/2526/SZ1.csv",
+        "card_avg": 3.6,
+        "red_avg": 0.11,
+    },
+    "Croatia": {
+        "name": "HNL",
+        "country": "Croatia",
+        "fbref_url": "https://fbref.com/en/comps/63/Croatian-Football-League-Stats",
+        "fbref_squad_url": "https://fbref.com/en/comps/63/shooting/Croatian-Football-League-Stats",
+        "fd_url": "https://www.football-data.co.uk/mmz4281/2526/HR1.csv",
+        "card_avg": 4.2,
+        "red_avg": 0.16,
+    },
 
 }
 
 # ============================================================
 
+# RATE-LIMITED FETCHING
+
+# ============================================================
+
+class TokenBucket:
+    """Thread-safe token bucket: acquire() blocks until the host allows another request"""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.last = time.monotonic()
+        self.delayed = 0.0  # Total 429 back-off so far; a sleeper owes whatever was added after it queued
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+
+    def acquire(self):
+        with self.lock:
+            self._refill()
+            wait = 0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+            self.tokens -= 1  # Reserve our slot; later callers queue behind it
+            owed = self.delayed
+        while wait > 0:
+            with instrument.span("sleep"):
+                time.sleep(wait)
+            with self.lock:  # A 429 while we slept pushes our slot back too
+                wait, owed = self.delayed - owed, self.delayed
+
+    def penalize(self, seconds):
+        """Push every pending and future request to this host back by `seconds` (after a 429).
+        Threads already sleeping in acquire() add it when they wake, keeping their spacing."""
+        with self.lock:
+            self._refill()
+            self.tokens = min(self.tokens, 0) - seconds * self.rate
+            self.delayed += seconds
+
+_BUCKETS = {}
+_BUCKETS_LOCK = threading.Lock()
+
+def host_bucket(url):
+    host = urlparse(url).netloc
+    with _BUCKETS_LOCK:
+        if host not in _BUCKETS:
+            _BUCKETS[host] = TokenBucket(*HOST_LIMITS.get(host, DEFAULT_HOST_LIMIT))
+        return _BUCKETS[host]
+
+HTTP_CACHE = HttpCache(HTTP_CACHE_DIR)
+
+# One pooled keep-alive session shared by every worker thread, built on the first fetch
+_SESSION = None
+_SESSION_LOCK = threading.Lock()
+
+def http_session():
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            session = requests.Session()
+            session.headers.update(HEADERS)
+            session.mount("https://", HTTPAdapter(pool_connections=len(HOST_LIMITS) + 1, pool_maxsize=MAX_WORKERS))
+            _SESSION = session
+        return _SESSION
+
+def _get(url, headers, timeout):
+    """GET through the host's token bucket, backing off and retrying on HTTP 429"""
+    session = http_session()
+    bucket = host_bucket(url)
+    for attempt in range(MAX_RETRIES + 1):
+        bucket.acquire()  # Time spent waiting here is recorded as "sleep"
+        with instrument.span("fetch"):
+            resp = session.get(url, headers=headers, timeout=timeout)
+        instrument.count(f"http_{resp.status_code}")
+        if resp.status_code != 429 or attempt == MAX_RETRIES:
+            return resp
+        instrument.count("retries")
+        retry_after = resp.headers.get("Retry-After", "")
+        wait = float(retry_after) if retry_after.isdigit() else BACKOFF_SECONDS * (2 ** attempt)
+        bucket.penalize(wait)
+
+def fetch(url, timeout=15):
+    """
+    Conditional GET through the host's token bucket, backing off and retrying on HTTP 429.
+    A 304 (or any offline fetch) returns the cached body with resp.not_modified = True;
+    fresh 200s are cached with their ETag / Last-Modified.
+    """
+    if OFFLINE:
+        resp = HTTP_CACHE.response(url) or CachedResponse(504, b"")  # Not cached: gateway-timeout, like a miss
+        instrument.count(f"http_{resp.status_code}")
+        return resp
+    resp = _get(url, HTTP_CACHE.conditional_headers(url), timeout)
+    if resp.status_code == 304:
+        cached = HTTP_CACHE.response(url)
+        if cached is not None:
+            return cached
+        resp = _get(url, {}, timeout)  # Cache entry vanished under us — refetch unconditionally
+    if resp.status_code == 200:
+        instrument.count("bytes", len(resp.content))
+        with instrument.span("cache"):
+            HTTP_CACHE.store(url, resp)
+    resp.not_modified = False
+    return resp
+
+# ============================================================
+
 # SCRAPER 1 — FBREF xG DATA
 
 # ============================================================
 
 def scrape_fbref_xg(league_key):
-“””
-Scrapes FBref squad shooting stats to get xG for/against per team.
-Returns dict: {team_name: {xG_h, xG_a, xGA_h, xGA_a}}
-“””
-league = LEAGUES[league_key]
-url = league[“fbref_squad_url”]
-
-```
-print(f"  Scraping FBref: {league['name']}...", end=" ")
-
-try:
-    time.sleep(4)  # Be respectful — FBref rate limits aggressively
-    resp = requests.get(url, headers=HEADERS, timeout=15)
-    
-    if resp.status_code == 429:
-        print("⚠️ Rate limited — waiting 60 seconds")
-        time.sleep(60)
-        resp = requests.get(url, headers=HEADERS, timeout=15)
-    
-    if resp.status_code != 200:
-        print(f"❌ HTTP {resp.status_code}")
-        return None
-    
-    soup = BeautifulSoup(resp.content, "lxml")
-    
-    # Find the squad shooting table (for xG)
-    table = soup.find("table", {"id": "stats_squads_shooting_for"})
-    if not table:
-        # Try alternative table ID
-        table = soup.find("table", id=lambda x: x and "shooting" in x)
-    
-    if not table:
-        print("❌ Table not found")
-        return None
-    
-    teams_xg = {}
-    rows = table.find("tbody").find_all("tr")
-    
-    for row in rows:
-        if row.get("class") and "thead" in row.get("class", []):
-            continue
-        
-        team_cell = row.find("td", {"data-stat": "team"})
-        xg_cell = row.find("td", {"data-stat": "xg"})
-        npxg_cell = row.find("td", {"data-stat": "npxg"})
-        
-        if not team_cell or not xg_cell:
-            continue
-        
-        team_name = team_cell.get_text(strip=True)
-        xg_val = xg_cell.get_text(strip=True)
-        
-        try:
-            xg_total = float(xg_val)
-            teams_xg[team_name] = {"xg_for": xg_total}
-        except:
-            continue
-    
-    # Now get xG against
-    table_against = soup.find("table", {"id": "stats_squads_shooting_against"})
-    if table_against:
-        rows = table_against.find("tbody").find_all("tr")
-        for row in rows:
-            team_cell = row.find("td", {"data-stat": "team"})
-            xg_cell = row.find("td", {"data-stat": "xg"})
-            if not team_cell or not xg_cell:
-                continue
-            team_name = team_cell.get_text(strip=True)
-            try:
-                xga_total = float(xg_cell.get_text(strip=True))
-                if team_name in teams_xg:
-                    teams_xg[team_name]["xg_against"] = xga_total
-            except:
-                continue
-    
-    print(f"✅ {len(teams_xg)} teams found")
+    """
+    Scrapes FBref squad shooting stats to get xG for/against per team.
+    Returns dict: {team_name: {xG_h, xG_a, xGA_h, xGA_a}}
+    """
+    league = LEAGUES[league_key]
+    teams_xg, status = _scrape_fbref_xg(league_key)
+    print(f"  Scraping FBref: {league['name']}... {status}")
     return teams_xg
-    
-except Exception as e:
-    print(f"❌ Error: {str(e)[:50]}")
-    return None
-```
+
+def _scrape_fbref_xg(league_key):
+    """scrape_fbref_xg without printing: returns (teams_xg or None, status message)"""
+    url = LEAGUES[league_key]["fbref_squad_url"]
+
+    try:
+        with instrument.tags(league=league_key, source="fbref"):
+            resp = fetch(url)  # Token bucket keeps us within FBref's rate limit
+
+            if resp.status_code != 200:
+                return None, f"❌ HTTP {resp.status_code}"
+
+            if resp.not_modified:
+                with instrument.span("cache"):
+                    cached = HTTP_CACHE.parsed(url)
+                if cached is not None:
+                    return cached, f"✅ {len(cached)} teams found (unchanged)"
+
+            # Targeted lxml extraction of the two shooting tables (also inside HTML comments)
+            import fbref_parser
+            with instrument.span("parse"):
+                teams_xg = fbref_parser.teams_xg(resp.content)
+            if not teams_xg:
+                return None, "❌ Table not found"
+
+            with instrument.span("cache"):
+                HTTP_CACHE.store_parsed(url, teams_xg)
+            return teams_xg, f"✅ {len(teams_xg)} teams found"
+
+    except Exception as e:
+        return None, f"❌ Error: {str(e)[:50]}"
 
 # ============================================================
 
@@ -324,38 +419,47 @@ except Exception as e:
 # ============================================================
 
 def download_fd_csv(league_key):
-“””
-Downloads Football-Data CSV for a league.
-Contains: home/away corners, cards, results per match.
-“””
-league = LEAGUES[league_key]
-url = league[“fd_url”]
-
-```
-print(f"  Downloading Football-Data: {league['name']}...", end=" ")
-
-try:
-    time.sleep(1)
-    resp = requests.get(url, headers=HEADERS, timeout=15)
-    
-    if resp.status_code != 200:
-        print(f"❌ HTTP {resp.status_code}")
-        return None
-    
-    # Parse CSV
-    from io import StringIO
-    df = pd.read_csv(StringIO(resp.text), on_bad_lines='skip')
-    
-    # Drop empty rows
-    df = df.dropna(subset=["HomeTeam", "AwayTeam"])
-    
-    print(f"✅ {len(df)} matches loaded")
+    """
+    Downloads Football-Data CSV for a league.
+    Contains: home/away corners, cards, results per match.
+    """
+    league = LEAGUES[league_key]
+    df, status = _download_fd_csv(league_key)
+    print(f"  Downloading Football-Data: {league['name']}... {status}")
     return df
-    
-except Exception as e:
-    print(f"❌ Error: {str(e)[:50]}")
-    return None
-```
+
+def _download_fd_csv(league_key, url=None):
+    """download_fd_csv without printing: returns (df or None, status message). url overrides the league's current season."""
+    url = url or LEAGUES[league_key]["fd_url"]
+
+    try:
+        with instrument.tags(league=league_key, source="fd"):
+            resp = fetch(url)
+
+            if resp.status_code != 200:
+                return None, f"❌ HTTP {resp.status_code}"
+
+            if resp.not_modified:
+                with instrument.span("cache"):
+                    cached = HTTP_CACHE.parsed(url)
+                if cached is not None:
+                    return cached, f"✅ {len(cached)} matches loaded (unchanged)"
+
+            # Parse CSV
+            from io import StringIO
+            import pandas as pd
+            with instrument.span("parse"):
+                df = pd.read_csv(StringIO(resp.text), on_bad_lines='skip')
+
+                # Drop empty rows
+                df = df.dropna(subset=["HomeTeam", "AwayTeam"])
+
+            with instrument.span("cache"):
+                HTTP_CACHE.store_parsed(url, df)
+            return df, f"✅ {len(df)} matches loaded"
+
+    except Exception as e:
+        return None, f"❌ Error: {str(e)[:50]}"
 
 # ============================================================
 
@@ -363,20 +467,9 @@ except Exception as e:
 
 # ============================================================
 
-def calculate_team_stats(df, league_key, n_games=FORM_GAMES):
-“””
-From raw match CSV, calculate:
-- Home/Away corners for/against
-- Home/Away cards per game
-- Last N games form
-Returns dict: {team: {c_h, c_a, ca_h, ca_a, cards_h, cards_a, form}}
-“””
-league = LEAGUES[league_key]
-team_stats = {}
-
-```
 # Column mappings (Football-Data format)
-col_maps = {
+
+COL_MAPS = {
     "home_corners": ["HC", "HCorners"],
     "away_corners": ["AC", "ACorners"],
     "home_yellow": ["HY", "HYELL"],
@@ -387,229 +480,441 @@ col_maps = {
     "away_goals": ["FTAG", "AG"],
 }
 
-def get_col(df, options):
-    for col in options:
-        if col in df.columns:
-            return col
-    return None
+def _find_cols(df):
+    """First column present for each COL_MAPS entry (None if the CSV lacks it)"""
+    return {key: next((c for c in options if c in df.columns), None) for key, options in COL_MAPS.items()}
+
+def team_match_table(df, cols=None):
+    """
+    Long format: one row per team per match, home rows then away rows, each in CSV order.
+    Columns: team, home, order (CSV row), c_for, c_against, cards (match total, home rows only),
+    scored, conceded. Missing CSV columns come through as NaN.
+    """
+    import numpy as np
+    import pandas as pd
+    cols = cols or _find_cols(df)
+    n = len(df)
+
+    def num(key):
+        return pd.to_numeric(df[cols[key]], errors="coerce").to_numpy(float) if cols[key] else np.full(n, np.nan)
+
+    hc, ac, hg, ag = num("home_corners"), num("away_corners"), num("home_goals"), num("away_goals")
+    cards = np.full(n, np.nan)
+    if cols["home_yellow"] and cols["home_red"]:
+        cards = np.nan_to_num(num("home_yellow")) + np.nan_to_num(num("home_red"))
+        if cols["away_yellow"]:
+            cards += np.nan_to_num(num("away_yellow")) + np.nan_to_num(num("away_red"))
+
+    order = np.arange(n)
+    home = pd.DataFrame({"team": df["HomeTeam"].to_numpy(), "home": True, "order": order,
+                         "c_for": hc, "c_against": ac, "cards": cards, "scored": hg, "conceded": ag})
+    away = pd.DataFrame({"team": df["AwayTeam"].to_numpy(), "home": False, "order": order,
+                         "c_for": ac, "c_against": hc, "cards": np.nan, "scored": ag, "conceded": hg})
+    return pd.concat([home, away], ignore_index=True)
 
-hc_col = get_col(df, col_maps["home_corners"])
-ac_col = get_col(df, col_maps["away_corners"])
-hy_col = get_col(df, col_maps["home_yellow"])
-ay_col = get_col(df, col_maps["away_yellow"])
-hr_col = get_col(df, col_maps["home_red"])
-ar_col = get_col(df, col_maps["away_red"])
-hg_col = get_col(df, col_maps["home_goals"])
-ag_col = get_col(df, col_maps["away_goals"])
-
-all_teams = set(df["HomeTeam"].tolist() + df["AwayTeam"].tolist())
-
-for team in all_teams:
-    home_matches = df[df["HomeTeam"] == team].tail(n_games * 3)
-    away_matches = df[df["AwayTeam"] == team].tail(n_games * 3)
-    
-    stats = {
-        "c_h": 5.0,   # Default corners home
-        "c_a": 4.0,   # Default corners away
-        "ca_h": 5.0,  # Default corners against home
-        "ca_a": 5.5,  # Default corners against away
-        "cards_h": league["card_avg"],
-        "cards_a": league["card_avg"],
-        "form": [],
-    }
-    
-    # Corners when playing at home
-    if hc_col and len(home_matches) > 0:
-        stats["c_h"] = round(home_matches[hc_col].mean(), 2)
-    if ac_col and len(home_matches) > 0:
-        stats["ca_h"] = round(home_matches[ac_col].mean(), 2)
-    
-    # Corners when playing away
-    if ac_col and len(away_matches) > 0:
-        stats["c_a"] = round(away_matches[ac_col].mean(), 2)
-    if hc_col and len(away_matches) > 0:
-        stats["ca_a"] = round(away_matches[hc_col].mean(), 2)
-    
-    # Cards per game
-    if hy_col and hr_col and len(home_matches) > 0:
-        home_cards = home_matches[hy_col].fillna(0) + home_matches[hr_col].fillna(0)
-        away_cards_in_home = home_matches[ay_col].fillna(0) + home_matches[ar_col].fillna(0) if ay_col else 0
-        stats["cards_h"] = round((home_cards + away_cards_in_home).mean(), 1)
-    
-    # Recent form (last 5 games W/D/L)
-    if hg_col and ag_col:
-        all_matches = []
-        for _, row in home_matches.iterrows():
-            try:
-                hg, ag = int(row[hg_col]), int(row[ag_col])
-                result = "W" if hg > ag else ("D" if hg == ag else "L")
-                all_matches.append({"result": result, "scored": hg, "conceded": ag})
-            except:
-                pass
-        for _, row in away_matches.iterrows():
-            try:
-                hg, ag = int(row[hg_col]), int(row[ag_col])
-                result = "W" if ag > hg else ("D" if hg == ag else "L")
-                all_matches.append({"result": result, "scored": ag, "conceded": hg})
-            except:
-                pass
-        stats["form"] = [m["result"] for m in all_matches[-5:]]
-    
-    team_stats[team] = stats
-
-return team_stats
-```
+def calculate_team_stats(df, league_key, n_games=FORM_GAMES):
+    """
+    From raw match CSV, calculate:
+    - Home/Away corners for/against (last n_games*3 home / away matches)
+    - Home cards per game
+    - Last N games form, in match order
+    Returns dict: {team: {c_h, c_a, ca_h, ca_a, cards_h, cards_a, form}}
+    One groupby over a long team-match table — no per-team masks over the whole CSV.
+    """
+    import numpy as np
+    import pandas as pd
+    league = LEAGUES[league_key]
+    cols = _find_cols(df)
+    long = team_match_table(df, cols)
+
+    # Corners / cards over each team's recent home and away matches
+    recent = long.groupby(["team", "home"], sort=False).tail(n_games * 3)
+    means = recent.groupby(["team", "home"], sort=False)[["c_for", "c_against", "cards"]].mean().to_dict("index")
+
+    # Form: last n_games with a valid score, W/D/L from the team's side
+    form = {}
+    if cols["home_goals"] and cols["away_goals"]:
+        played = long.dropna(subset=["scored", "conceded"]).sort_values("order", kind="stable")
+        played = played.assign(result=np.where(played["scored"] > played["conceded"], "W",
+                                               np.where(played["scored"] == played["conceded"], "D", "L")))
+        form = played.groupby("team", sort=False).tail(n_games).groupby("team", sort=False)["result"].agg(list).to_dict()
+
+    team_stats = {}
+    for team in pd.unique(long["team"]):
+        stats = {
+            "c_h": 5.0,   # Default corners home
+            "c_a": 4.0,   # Default corners away
+            "ca_h": 5.0,  # Default corners against home
+            "ca_a": 5.5,  # Default corners against away
+            "cards_h": league["card_avg"],
+            "cards_a": league["card_avg"],
+            "form": form.get(team, []),
+        }
+        h, a = means.get((team, True)), means.get((team, False))
+        if h is not None:
+            if cols["home_corners"]:
+                stats["c_h"] = round(h["c_for"], 2)
+            if cols["away_corners"]:
+                stats["ca_h"] = round(h["c_against"], 2)
+            if cols["home_yellow"] and cols["home_red"]:
+                stats["cards_h"] = round(h["cards"], 1)
+        if a is not None:
+            if cols["away_corners"]:
+                stats["c_a"] = round(a["c_for"], 2)
+            if cols["home_corners"]:
+                stats["ca_a"] = round(a["c_against"], 2)
+        team_stats[team] = stats
+
+    return team_stats
 
 # ============================================================
 
-# PROCESSOR — Calculate xG per team from FBref + match count
+# INCREMENTAL INGESTION — per-league watermarks and rolling windows
 
 # ============================================================
 
-def calculate_xg_per_game(fbref_data, df, team_name, league_key):
-“””
-Converts FBref season totals to per-game home/away averages
-using actual home/away match counts from the CSV.
-“””
-league = LEAGUES[league_key]
-
-```
-if not fbref_data or team_name not in fbref_data:
-    return None
-
-raw = fbref_data[team_name]
-xg_for_total = raw.get("xg_for", 0)
-xg_against_total = raw.get("xg_against", 0)
-
-if df is not None and len(df) > 0:
-    home_games = len(df[df["HomeTeam"] == team_name])
-    away_games = len(df[df["AwayTeam"] == team_name])
-    
-    if home_games > 0 and away_games > 0:
-        # Rough split (FBref totals include both home and away)
-        xg_h = round(xg_for_total / (home_games + away_games) * (1 + 0.15), 2)
-        xg_a = round(xg_for_total / (home_games + away_games) * (1 - 0.10), 2)
-        xga_h = round(xg_against_total / (home_games + away_games) * (1 - 0.15), 2)
-        xga_a = round(xg_against_total / (home_games + away_games) * (1 + 0.10), 2)
-        
+def _digest(df, cols):
+    """Fingerprint of the ingested rows; a change means the source rewrote history"""
+    import pandas as pd
+    key = ["HomeTeam", "AwayTeam"] + (["Date"] if "Date" in df.columns else []) + sorted(c for c in cols.values() if c)
+    return hashlib.sha1(pd.util.hash_pandas_object(df[key].astype(str), index=False).to_numpy().tobytes()).hexdigest()
+
+def _num(x):
+    return None if x != x else float(x)  # NaN -> None so the state stays plain JSON
+
+def _mean(values, idx):
+    vals = [v[idx] for v in values if v[idx] is not None]
+    return sum(vals) / len(vals) if vals else float("nan")
+
+class LeagueState:
+    """
+    Everything calculate_team_stats needs, kept as running windows per team:
+    the last n_games*3 home and away corner/card rows, the last n_games
+    results, and home/away match counts. New CSV rows are pushed in O(1) each.
+    """
+
+    def __init__(self, state=None, n_games=FORM_GAMES):
+        state = state or {}
+        self.n_games = n_games
+        self.rows = state.get("rows", 0)
+        self.last_date = state.get("last_date")
+        self.digest = state.get("digest")
+        self.cols = state.get("cols", {})
+        self.teams = {}
+        for team, t in state.get("teams", {}).items():
+            self._team(team, t)
+
+    def _team(self, team, t=None):
+        if team not in self.teams:
+            t = t or {}
+            self.teams[team] = {
+                "games_h": t.get("games_h", 0),
+                "games_a": t.get("games_a", 0),
+                "home": deque(t.get("home", []), maxlen=self.n_games * 3),
+                "away": deque(t.get("away", []), maxlen=self.n_games * 3),
+                "form": deque(t.get("form", []), maxlen=self.n_games),
+            }
+        return self.teams[team]
+
+    def update(self, df):
+        """Ingest rows past the watermark (rebuilding if earlier rows changed). Returns (new rows, rebuilt)."""
+        cols = _find_cols(df)
+        rebuilt = bool(self.rows) and (len(df) < self.rows or cols != self.cols or _digest(df.iloc[:self.rows], cols) != self.digest)
+        if rebuilt:
+            self.rows, self.teams = 0, {}
+        self.cols = cols
+        new = df.iloc[self.rows:]
+        if len(new):
+            long = team_match_table(new, cols).sort_values("order", kind="stable")
+            for r in long.itertuples(index=False):
+                t = self._team(r.team)
+                if r.home:
+                    t["games_h"] += 1
+                    t["home"].append((_num(r.c_for), _num(r.c_against), _num(r.cards)))
+                else:
+                    t["games_a"] += 1
+                    t["away"].append((_num(r.c_for), _num(r.c_against)))
+                if r.scored == r.scored and r.conceded == r.conceded:
+                    t["form"].append("W" if r.scored > r.conceded else ("D" if r.scored == r.conceded else "L"))
+            self.rows = len(df)
+            self.digest = _digest(df, cols)
+            if "Date" in df.columns:
+                self.last_date = str(df["Date"].iloc[-1])
+        return len(new), rebuilt
+
+    def team_stats(self, league_key):
+        """Same dict as calculate_team_stats(df, league_key) over every ingested row"""
+        league = LEAGUES[league_key]
+        cols = self.cols
+        team_stats = {}
+        for team, t in self.teams.items():
+            stats = {
+                "c_h": 5.0,   # Default corners home
+                "c_a": 4.0,   # Default corners away
+                "ca_h": 5.0,  # Default corners against home
+                "ca_a": 5.5,  # Default corners against away
+                "cards_h": league["card_avg"],
+                "cards_a": league["card_avg"],
+                "form": list(t["form"]) if cols.get("home_goals") and cols.get("away_goals") else [],
+            }
+            if t["home"]:
+                if cols.get("home_corners"):
+                    stats["c_h"] = round(_mean(t["home"], 0), 2)
+                if cols.get("away_corners"):
+                    stats["ca_h"] = round(_mean(t["home"], 1), 2)
+                if cols.get("home_yellow") and cols.get("home_red"):
+                    stats["cards_h"] = round(_mean(t["home"], 2), 1)
+            if t["away"]:
+                if cols.get("away_corners"):
+                    stats["c_a"] = round(_mean(t["away"], 0), 2)
+                if cols.get("home_corners"):
+                    stats["ca_a"] = round(_mean(t["away"], 1), 2)
+            team_stats[team] = stats
+        return team_stats
+
+    def games(self, team):
+        """(home games, away games) ingested for a team"""
+        t = self.teams.get(team)
+        return (t["games_h"], t["games_a"]) if t else (0, 0)
+
+    def state(self):
         return {
-            "xG_h": xg_h,
-            "xG_a": xg_a,
-            "xGA_h": xga_h,
-            "xGA_a": xga_a,
-            "league": league_key,
-            "last_updated": datetime.now().strftime("%Y-%m-%d"),
-            "games_h": home_games,
-            "games_a": away_games,
+            "rows": self.rows,
+            "last_date": self.last_date,
+            "digest": self.digest,
+            "cols": self.cols,
+            "teams": {team: {"games_h": t["games_h"], "games_a": t["games_a"], "home": list(t["home"]),
+                             "away": list(t["away"]), "form": list(t["form"])} for team, t in self.teams.items()},
         }
 
-return None
-```
+def load_pipeline_state():
+    if os.path.exists(STATE_FILE):
+        with open(STATE_FILE) as f:
+            return json.load(f)
+    return {}
 
 # ============================================================
 
-# MAIN PIPELINE
+# PROCESSOR — Calculate xG per team from FBref + match count
 
 # ============================================================
 
-def run_pipeline(leagues_to_update=None, dry_run=False):
-“””
-Main entry point. Updates all data files.
-“””
-print(”=”*70)
-print(”  ⚽ LIVE DATA PIPELINE — V5”)
-print(f”  {datetime.now().strftime(’%A %d %B %Y %H:%M’)}”)
-print(”=”*70)
-
-```
-# Load existing data
-existing_xg = {}
-if os.path.exists(XG_FILE):
-    with open(XG_FILE) as f:
-        existing_xg = json.load(f)
-
-existing_corners = {}
-if os.path.exists(CORNERS_FILE):
-    with open(CORNERS_FILE) as f:
-        existing_corners = json.load(f)
-
-if leagues_to_update is None:
-    leagues_to_update = list(LEAGUES.keys())
-
-updated_teams = []
-failed_leagues = []
-
-print(f"\n  Updating {len(leagues_to_update)} leagues...")
-print(f"  Strategy: FBref (xG) + Football-Data (corners/cards)\n")
-
-for league_key in leagues_to_update:
+def calculate_xg_per_game(fbref_data, df, team_name, league_key, games=None):
+    """
+    Converts FBref season totals to per-game home/away averages
+    using actual home/away match counts from the CSV.
+    games=(home, away) skips recounting them from df (the pipeline passes LeagueState.games).
+    """
     league = LEAGUES[league_key]
-    print(f"\n  📋 {league['name']} ({league['country']})")
-    print(f"  {'─'*50}")
-    
-    # Step 1: Get match data from Football-Data
-    df = download_fd_csv(league_key)
-    
-    # Step 2: Calculate corners/cards from match data
-    if df is not None:
-        team_stats = calculate_team_stats(df, league_key)
-        for team, stats in team_stats.items():
-            existing_corners[team] = {
-                "c_h": stats["c_h"],
-                "c_a": stats["c_a"],
-                "ca_h": stats["ca_h"],
-                "ca_a": stats["ca_a"],
+
+    if not fbref_data or team_name not in fbref_data:
+        return None
+
+    raw = fbref_data[team_name]
+    xg_for_total = raw.get("xg_for", 0)
+    xg_against_total = raw.get("xg_against", 0)
+
+    if games is not None or (df is not None and len(df) > 0):
+        if games is not None:
+            home_games, away_games = games
+        else:
+            home_games = len(df[df["HomeTeam"] == team_name])
+            away_games = len(df[df["AwayTeam"] == team_name])
+
+        if home_games > 0 and away_games > 0:
+            # Rough split (FBref totals include both home and away)
+            xg_h = round(xg_for_total / (home_games + away_games) * (1 + 0.15), 2)
+            xg_a = round(xg_for_total / (home_games + away_games) * (1 - 0.10), 2)
+            xga_h = round(xg_against_total / (home_games + away_games) * (1 - 0.15), 2)
+            xga_a = round(xg_against_total / (home_games + away_games) * (1 + 0.10), 2)
+
+            return {
+                "xG_h": xg_h,
+                "xG_a": xg_a,
+                "xGA_h": xga_h,
+                "xGA_a": xga_a,
                 "league": league_key,
                 "last_updated": datetime.now().strftime("%Y-%m-%d"),
+                "games_h": home_games,
+                "games_a": away_games,
             }
-        print(f"  ✅ Corners/cards updated for {len(team_stats)} teams")
-    
-    # Step 3: Get xG from FBref
-    fbref_data = scrape_fbref_xg(league_key)
-    
-    if fbref_data and df is not None:
-        for team_name, raw in fbref_data.items():
-            xg_data = calculate_xg_per_game(fbref_data, df, team_name, league_key)
-            if xg_data:
-                existing_xg[team_name] = xg_data
-                updated_teams.append(team_name)
-        print(f"  ✅ xG updated for {len(fbref_data)} teams")
-    else:
-        print(f"  ⚠️  xG scrape failed — keeping existing data")
-        failed_leagues.append(league_key)
-    
-    # Be nice to servers
-    time.sleep(3)
-
-# Save updated files
-if not dry_run:
-    with open(XG_FILE, "w") as f:
-        json.dump(existing_xg, f, indent=2)
-    
-    with open(CORNERS_FILE, "w") as f:
-        json.dump(existing_corners, f, indent=2)
-    
-    # Log the run
-    log = {
-        "last_run": datetime.now().strftime("%Y-%m-%d %H:%M"),
-        "leagues_updated": [l for l in leagues_to_update if l not in failed_leagues],
-        "leagues_failed": failed_leagues,
-        "teams_updated": len(updated_teams),
-    }
-    with open(LOG_FILE, "w") as f:
-        json.dump(log, f, indent=2)
-
-print(f"\n\n{'='*70}")
-print(f"  ✅ PIPELINE COMPLETE")
-print(f"{'='*70}")
-print(f"  Teams updated: {len(updated_teams)}")
-print(f"  Leagues failed: {failed_leagues if failed_leagues else 'None'}")
-print(f"  Files saved: xg_data_live.json, corners_data_live.json")
-print(f"\n  Run model_v4_pro.py to use fresh data")
-print("="*70)
-
-return len(updated_teams), failed_leagues
-```
+
+    return None
+
+# ============================================================
+
+# MAIN PIPELINE
+
+# ============================================================
+
+def _fd_stage(league_key, state=None):
+    """Worker: download + parse the Football-Data CSV and fold new matches into the league state while other fetches are in flight"""
+    df, status = _download_fd_csv(league_key)
+    with instrument.span("compute", league=league_key, source="fd"):
+        league_state = LeagueState(state)
+        new_rows, rebuilt = league_state.update(df) if df is not None else (0, False)
+    return df, status, league_state, new_rows, rebuilt
+
+def run_pipeline(leagues_to_update=None, dry_run=False, offline=False, trace=None):
+    """
+    Main entry point. Updates all data files.
+    Football-Data downloads and FBref scrapes for every league run concurrently,
+    each host throttled by its own token bucket; results are merged in league order.
+    Only matches past each league's watermark in STATE_FILE are processed; a
+    league is rebuilt from scratch when its source rewrote earlier rows.
+    FBref and Football-Data names are joined on team_names IDs (the model's keys).
+    offline=True replays the HTTP cache instead of touching the network.
+    Per-league stage timings and fetch counters go into LOG_FILE under "timing";
+    trace=path also appends every timed span to a JSONL file.
+    """
+    global OFFLINE
+    OFFLINE = offline
+    recorder = instrument.start(trace)
+
+    print("="*70)
+    print("  ⚽ LIVE DATA PIPELINE — V5")
+    print(f"  {datetime.now().strftime('%A %d %B %Y %H:%M')}")
+    if offline:
+        print(f"  📦 OFFLINE — replaying cached responses from {HTTP_CACHE_DIR}")
+    print("="*70)
+
+    # Load existing data
+    existing_xg = {}
+    if os.path.exists(XG_FILE):
+        with instrument.span("load", file="xg"), open(XG_FILE) as f:
+            existing_xg = json.load(f)
+
+    existing_corners = {}
+    if os.path.exists(CORNERS_FILE):
+        with instrument.span("load", file="corners"), open(CORNERS_FILE) as f:
+            existing_corners = json.load(f)
+
+    with instrument.span("load", file="state"):
+        pipeline_state = load_pipeline_state()
+    teams = team_names.resolver()
+
+    if leagues_to_update is None:
+        leagues_to_update = list(LEAGUES.keys())
+
+    updated_teams = []
+    new_matches = {}
+    failed_leagues = []
+    snapshot_meta = {}  # league -> freshness fields for the snapshot manifest
+    now = datetime.now().strftime("%Y-%m-%d %H:%M")
+
+    print(f"\n  Updating {len(leagues_to_update)} leagues...")
+    print(f"  Strategy: FBref (xG) + Football-Data (corners/cards)\n")
+
+    # Fire off every fetch up front; the token buckets pace each host
+    pool = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+    fd_jobs = {key: pool.submit(_fd_stage, key, pipeline_state.get(key)) for key in leagues_to_update}
+    fbref_jobs = {key: pool.submit(_scrape_fbref_xg, key) for key in leagues_to_update}
+
+    for league_key in leagues_to_update:
+        league = LEAGUES[league_key]
+
+        # Step 1: Get match data from Football-Data (new rows folded into the league state in the worker)
+        df, fd_status, league_state, new_rows, rebuilt = fd_jobs[league_key].result()
+
+        # Step 3 (fetched concurrently): Get xG from FBref
+        fbref_data, fbref_status = fbref_jobs[league_key].result()
+
+        print(f"\n  📋 {league['name']} ({league['country']})")
+        print(f"  {'─'*50}")
+        print(f"  Downloading Football-Data: {league['name']}... {fd_status}")
+
+        # Step 2: Corners/cards from the rolling windows
+        if df is not None:
+            pipeline_state[league_key] = league_state.state()
+            new_matches[league_key] = new_rows
+            snapshot_meta[league_key] = {"corners_updated": now, "last_match": league_state.last_date,
+                                         "matches": league_state.rows}
+            print(f"  {'🔄 Source rewritten — rebuilt from' if rebuilt else '➕ New matches:'} {new_rows} rows"
+                  f" (watermark {league_state.rows} rows, last {league_state.last_date})")
+            with instrument.span("compute", league=league_key, source="stats"):
+                team_stats = league_state.team_stats(league_key)
+                for team, stats in team_stats.items():
+                    existing_corners[teams.to_id(team, league_key, "fd")] = {
+                        "c_h": stats["c_h"],
+                        "c_a": stats["c_a"],
+                        "ca_h": stats["ca_h"],
+                        "ca_a": stats["ca_a"],
+                        "league": league_key,
+                        "last_updated": datetime.now().strftime("%Y-%m-%d"),
+                    }
+            print(f"  ✅ Corners/cards updated for {len(team_stats)} teams")
+
+        print(f"  Scraping FBref: {league['name']}... {fbref_status}")
+
+        if fbref_data and df is not None:
+            with instrument.span("compute", league=league_key, source="xg"):
+                for team_name, raw in fbref_data.items():
+                    team_id = teams.to_id(team_name, league_key, "fbref")
+                    fd_name = teams.name_for(team_id, "fd", league_key) or team_name
+                    xg_data = calculate_xg_per_game(fbref_data, df, team_name, league_key, games=league_state.games(fd_name))
+                    if xg_data:
+                        existing_xg[team_id] = xg_data
+                        updated_teams.append(team_id)
+            snapshot_meta[league_key].update(xg_updated=now, xg_source="fbref")
+            print(f"  ✅ xG updated for {len(fbref_data)} teams")
+        else:
+            print(f"  ⚠️  xG scrape failed — keeping existing data")
+            failed_leagues.append(league_key)
+
+    pool.shutdown()
+
+    # Save updated files
+    if not dry_run:
+        import betting_model_v4_pro as bm  # Atomic writes: readers (model_server) never see a half-written file
+        with instrument.span("write", file="xg"):
+            bm.write_json_cached(XG_FILE, existing_xg)
+
+        with instrument.span("write", file="corners"):
+            bm.write_json_cached(CORNERS_FILE, existing_corners)
+
+        with instrument.span("write", file="snapshot"):
+            snapshots.write_snapshot(SNAPSHOT_DIR, existing_xg, existing_corners, snapshot_meta)
+
+        with instrument.span("write", file="state"), open(STATE_FILE, "w") as f:
+            json.dump(pipeline_state, f)
+
+        with instrument.span("write", file="aliases"):
+            teams.save()
+
+    if instrument.stop() is not recorder:
+        recorder.close()  # Something else started recording mid-run; keep what we have
+    timing = recorder.summary()
+
+    if not dry_run:
+        # Log the run
+        log = {
+            "last_run": datetime.now().strftime("%Y-%m-%d %H:%M"),
+            "leagues_updated": [l for l in leagues_to_update if l not in failed_leagues],
+            "leagues_failed": failed_leagues,
+            "teams_updated": len(updated_teams),
+            "new_matches": new_matches,
+            "timing": timing,
+        }
+        with open(LOG_FILE, "w") as f:
+            json.dump(log, f, indent=2)
+
+    print(f"\n\n{'='*70}")
+    print(f"  ✅ PIPELINE COMPLETE")
+    print(f"{'='*70}")
+    print(f"  Teams updated: {len(updated_teams)}")
+    print(f"  Leagues failed: {failed_leagues if failed_leagues else 'None'}")
+    print(f"  Run time: {timing['total_seconds']:.1f}s  |  {format_stage_totals(recorder.totals())}")
+    print(f"  Files saved: xg_data_live.json, corners_data_live.json, snapshots/ ({len(snapshot_meta)} leagues)")
+    print(f"\n  Run model_v4_pro.py to use fresh data")
+    print("="*70)
+
+    return len(updated_teams), failed_leagues
+
+def format_stage_totals(totals):
+    """One line of stage totals in pipeline order, e.g. "sleep 41.2s  fetch 6.3s  parse 0.4s ..." """
+    order = ["sleep", "fetch", "cache", "parse", "compute", "load", "write"]
+    names = [n for n in order if n in totals] + sorted(n for n in totals if n not in order)
+    return "  ".join(f"{n} {totals[n]:.1f}s" for n in names) + " (thread-seconds)"
 
 # ============================================================
 
@@ -618,97 +923,87 @@ return len(updated_teams), failed_leagues
 # ============================================================
 
 def check_freshness():
-“””
-Check when data was last updated and whether it needs refreshing.
-“””
-print(”=”*70)
-print(”  🔍 DATA FRESHNESS CHECK”)
-print(”=”*70)
-
-```
-if not os.path.exists(LOG_FILE):
-    print("\n  ❌ No pipeline log found — data never updated")
-    print("  Run: python data_pipeline.py")
-    return
-
-with open(LOG_FILE) as f:
-    log = json.load(f)
-
-last_run = datetime.strptime(log["last_run"], "%Y-%m-%d %H:%M")
-days_ago = (datetime.now() - last_run).days
-
-if days_ago == 0:
-    status = "🔥 FRESH — Updated today"
-elif days_ago <= 3:
-    status = f"✅ OK — Updated {days_ago} days ago"
-elif days_ago <= 7:
-    status = f"⚠️  STALE — Updated {days_ago} days ago (update recommended)"
-else:
-    status = f"❌ VERY STALE — Updated {days_ago} days ago (must update)"
-
-print(f"\n  Status: {status}")
-print(f"  Last run: {log['last_run']}")
-print(f"  Teams in database: {log.get('teams_updated', '?')}")
-print(f"  Leagues updated: {len(log.get('leagues_updated', []))}")
-
-if log.get("leagues_failed"):
-    print(f"  ⚠️  Failed leagues: {log['leagues_failed']}")
-
-if days_ago > 3:
-    print(f"\n  👉 Run: python data_pipeline.py")
-
-print("="*70)
-```
+    """
+    Check when data was last updated and whether it needs refreshing.
+    """
+    print("="*70)
+    print("  🔍 DATA FRESHNESS CHECK")
+    print("="*70)
+
+    if not os.path.exists(LOG_FILE):
+        print("\n  ❌ No pipeline log found — data never updated")
+        print("  Run: python data_pipeline.py")
+        return
+
+    with open(LOG_FILE) as f:
+        log = json.load(f)
+
+    last_run = datetime.strptime(log["last_run"], "%Y-%m-%d %H:%M")
+    days_ago = (datetime.now() - last_run).days
+
+    print(f"\n  Status: {_staleness(days_ago)}")
+    print(f"  Last run: {log['last_run']}")
+    print(f"  Teams in database: {log.get('teams_updated', '?')}")
+    print(f"  Leagues updated: {len(log.get('leagues_updated', []))}")
+
+    if log.get("leagues_failed"):
+        print(f"  ⚠️  Failed leagues: {log['leagues_failed']}")
+
+    timing = log.get("timing")
+    if timing:
+        totals = {}
+        for group in timing["groups"].values():
+            for label, agg in group["spans"].items():
+                name = label.split(":")[0]
+                totals[name] = totals.get(name, 0.0) + agg["seconds"]
+        print(f"  Last run took {timing['total_seconds']:.1f}s  |  {format_stage_totals(totals)}")
+
+    # Per-league freshness from the snapshot manifest — a league whose scrape keeps failing goes stale on its own
+    manifest = snapshots.read_manifest(SNAPSHOT_DIR)
+    if manifest:
+        print(f"\n  Snapshot generation {manifest['generation']} (written {manifest['written']})")
+        print(f"  {'League':<14} {'xG updated':<17} {'Last match':<11} {'Teams':>5}  Status")
+        for league_key, entry in sorted(manifest["leagues"].items()):
+            xg_updated = entry.get("xg_updated")
+            league_days = (datetime.now() - datetime.strptime(xg_updated, "%Y-%m-%d %H:%M")).days if xg_updated else None
+            days_ago = max(days_ago, 8 if league_days is None else league_days)
+            print(f"  {league_key:<14} {xg_updated or 'never':<17} {entry.get('last_match') or '?':<11}"
+                  f" {len(entry.get('xg', {}).get('teams', [])):>5}  {_staleness(league_days).split(' —')[0]}")
+    else:
+        print(f"\n  ⚠️  No ratings snapshot in {SNAPSHOT_DIR} — the model falls back to the JSON files")
+
+    if days_ago > 3:
+        print(f"\n  👉 Run: python data_pipeline.py")
+
+    print("="*70)
+
+def _staleness(days_ago):
+    if days_ago is None:
+        return "❌ NEVER — no xG yet"
+    if days_ago == 0:
+        return "🔥 FRESH — Updated today"
+    elif days_ago <= 3:
+        return f"✅ OK — Updated {days_ago} days ago"
+    elif days_ago <= 7:
+        return f"⚠️  STALE — Updated {days_ago} days ago (update recommended)"
+    else:
+        return f"❌ VERY STALE — Updated {days_ago} days ago (must update)"
 
 # ============================================================
 
 # TEAM NAME NORMALIZER
 
-# Football-Data and FBref use different team names
+# Football-Data and FBref use different team names — team_names.py holds the index
 
 # ============================================================
 
-TEAM_NAME_MAP = {
-# Premier League
-“Man United”: “Manchester United”,
-“Man City”: “Manchester City”,
-“Nottm Forest”: “Nottingham Forest”,
-“Wolves”: “Wolverhampton Wanderers”,
-“Spurs”: “Tottenham Hotspur”,
-# La Liga
-“Atletico”: “Atletico Madrid”,
-“Betis”: “Real Betis”,
-“Celta”: “Celta Vigo”,
-# Bundesliga
-“Bayern”: “Bayern Munich”,
-“Dortmund”: “Borussia Dortmund”,
-“Leverkusen”: “Bayer Leverkusen”,
-“Leipzig”: “RB Leipzig”,
-“Frankfurt”: “Eintracht Frankfurt”,
-“Gladbach”: “Borussia Monchengladbach”,
-“Werder”: “Werder Bremen”,
-# Serie A
-“Inter”: “Inter Milan”,
-“Juventus”: “Juventus”,
-“Milan”: “AC Milan”,
-# Ligue 1
-“PSG”: “Paris Saint-Germain”,
-# Portugal
-“Sporting”: “Sporting CP”,
-# Turkey
-“Galatasaray”: “Galatasaray SK”,
-}
-
-def normalize_team_name(name, direction=“to_model”):
-“”“Convert between Football-Data/FBref names and model names”””
-if direction == “to_model”:
-# Reverse lookup
-for model_name, source_name in TEAM_NAME_MAP.items():
-if source_name.lower() == name.lower():
-return model_name
-return name
-else:
-return TEAM_NAME_MAP.get(name, name)
+def normalize_team_name(name, direction="to_model", league=None):
+    """Convert between Football-Data/FBref names and model names"""
+    teams = team_names.resolver()
+    if direction == "to_model":
+        return teams.find(name, league) or name
+    else:
+        return teams.name_for(name, "fbref", league) or name
 
 # ============================================================
 
@@ -716,31 +1011,31 @@ return TEAM_NAME_MAP.get(name, name)
 
 # ============================================================
 
-if **name** == “**main**”:
-parser = argparse.ArgumentParser(description=“Live data pipeline for betting model”)
-parser.add_argument(”–league”, help=“Update single league (e.g. EPL, LaLiga)”)
-parser.add_argument(”–check”, action=“store_true”, help=“Check data freshness”)
-parser.add_argument(”–dry-run”, action=“store_true”, help=“Test without saving”)
-parser.add_argument(”–list”, action=“store_true”, help=“List all supported leagues”)
-args = parser.parse_args()
-
-```
-if args.check:
-    check_freshness()
-
-elif args.list:
-    print("\n  Supported leagues:")
-    for key, league in LEAGUES.items():
-        print(f"  {key:<15} {league['name']} ({league['country']})")
-
-elif args.league:
-    if args.league not in LEAGUES:
-        print(f"  ❌ Unknown league: {args.league}")
-        print(f"  Run with --list to see all options")
-    else:
-        run_pipeline([args.league], dry_run=args.dry_run)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Live data pipeline for betting model")
+    parser.add_argument("--league", help="Update single league (e.g. EPL, LaLiga)")
+    parser.add_argument("--check", action="store_true", help="Check data freshness")
+    parser.add_argument("--dry-run", action="store_true", help="Test without saving")
+    parser.add_argument("--list", action="store_true", help="List all supported leagues")
+    parser.add_argument("--offline", action="store_true", help="Replay cached responses, no network")
+    parser.add_argument("--trace", metavar="PATH", help="Append every timed stage to a JSONL trace file")
+    args = parser.parse_args()
+
+    if args.check:
+        check_freshness()
+
+    elif args.list:
+        print("\n  Supported leagues:")
+        for key, league in LEAGUES.items():
+            print(f"  {key:<15} {league['name']} ({league['country']})")
+
+    elif args.league:
+        if args.league not in LEAGUES:
+            print(f"  ❌ Unknown league: {args.league}")
+            print(f"  Run with --list to see all options")
+        else:
+            run_pipeline([args.league], dry_run=args.dry_run, offline=args.offline, trace=args.trace)
 
-else:
-    # Full update
-    run_pipeline(dry_run=args.dry_run)
-```
\ No newline at end of file
+    else:
+        # Full update
+        run_pipeline(dry_run=args.dry_run, offline=args.offline, trace=args.trace)
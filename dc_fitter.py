@@ -0,0 +1,317 @@
+"""
+⚽ BETTING MODEL — DIXON-COLES TEAM-STRENGTH FITTER
+
+Maximum-likelihood attack / defence / home advantage / rho per league from
+Football-Data match history, replacing the hard-coded DEFAULT_XG, the fixed
+±15% / ±10% splits and the fixed rho = -0.13.
+
+MODEL (per league):
+home goals ~ exp(mu + home + att[h] + def[a]), away goals ~ exp(mu + att[a] + def[h]),
+with the Dixon-Coles low-score correction tau(rho). att and def sum to zero.
+
+1. Vectorised log-likelihood with analytic gradients (L-BFGS-B)
+1. Matches weighted by exp(-xi * days ago) — xi from a half-life in days
+1. Warm-starts from last run's parameters (dc_params.json)
+1. Leagues fitted in parallel worker processes
+
+The fit is written in the xG file format calc_xg consumes. Each entry keeps
+the fitted dc_att / dc_def with the league's dc_mu / dc_home, and calc_xg
+rebuilds exp(mu + home + att + def) exactly from them when both teams come
+from the same fit. The averaged xG_h / xG_a / xGA_h / xGA_a fields (used
+against other teams, or once a result has moved a rating) are stored as
+base * exp(2 * strength): the average of two such sides equals the product
+at the league mean, matches it to first order around it, and stays
+positive for the weakest teams. Each entry also carries the league's fitted
+rho. Teams are keyed by team_names ID, the same keys the pipeline writes.
+
+HOW TO RUN:
+python dc_fitter.py                       # Fit every league (current + previous season), update the xG file
+python dc_fitter.py --league EPL --seasons 3
+python dc_fitter.py --offline --dry-run   # Refit from cached CSVs, print only
+"""
+
+import json
+import os
+import argparse
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import minimize
+
+import data_pipeline as dp
+import snapshots
+import team_names
+from betting_model_v4_pro import HOME_ADV, write_json_cached
+
+# ============================================================
+
+# CONFIG
+
+# ============================================================
+
+DC_PARAMS_FILE = os.path.join(dp.DATA_DIR, "dc_params.json")
+HALF_LIFE_DAYS = 180   # A match this old counts half as much as today's
+SEASONS = 2            # Current season plus this many - 1 previous
+RIDGE = 1e-3           # Tiny L2 on att/def so promoted teams with few games stay finite
+RHO_BOUNDS = (-0.25, 0.25)
+MIN_SIDE_XG = 0.05     # Floor for the averaged xG-file fields
+
+# ============================================================
+
+# LIKELIHOOD
+
+# ============================================================
+
+def match_table(df, ref_date=None, half_life=HALF_LIFE_DAYS):
+    """Home/away team indices, goals and time-decay weights for every completed match"""
+    cols = dp._find_cols(df)
+    hg_col, ag_col = cols["home_goals"], cols["away_goals"]
+    if not hg_col or not ag_col:
+        raise ValueError("CSV has no full-time goals columns")
+    played = df.dropna(subset=["HomeTeam", "AwayTeam", hg_col, ag_col])
+    teams = sorted(set(played["HomeTeam"]) | set(played["AwayTeam"]))
+    index = {t: i for i, t in enumerate(teams)}
+
+    weights = np.ones(len(played))
+    if "Date" in played.columns and half_life:
+        dates = pd.to_datetime(played["Date"], dayfirst=True, format="mixed", errors="coerce")
+        ref = pd.Timestamp(ref_date) if ref_date else dates.max()
+        days = (ref - dates).dt.days.fillna(0).clip(lower=0).to_numpy(float)
+        weights = np.exp(-np.log(2) / half_life * days)
+
+    return {
+        "teams": teams,
+        "home": played["HomeTeam"].map(index).to_numpy(),
+        "away": played["AwayTeam"].map(index).to_numpy(),
+        "hg": played[hg_col].to_numpy(float),
+        "ag": played[ag_col].to_numpy(float),
+        "w": weights,
+    }
+
+def _unpack(theta, nt):
+    A, D = theta[3:3 + nt], theta[3 + nt:]
+    return theta[0], theta[1], theta[2], A - A.mean(), D - D.mean()
+
+def neg_log_likelihood(theta, data):
+    """(weighted mean negative log-likelihood, gradient) — theta = [mu, home, rho, att..., def...]"""
+    hi, ai, x, y, w = data["home"], data["away"], data["hg"], data["ag"], data["w"]
+    nt = len(data["teams"])
+    mu, home, rho, att, dfn = _unpack(theta, nt)
+
+    log_lam = mu + home + att[hi] + dfn[ai]
+    log_nu = mu + att[ai] + dfn[hi]
+    lam, nu = np.exp(log_lam), np.exp(log_nu)
+
+    m00, m01 = (x == 0) & (y == 0), (x == 0) & (y == 1)
+    m10, m11 = (x == 1) & (y == 0), (x == 1) & (y == 1)
+    tau = np.ones_like(lam)
+    tau[m00] = 1 - lam[m00] * nu[m00] * rho
+    tau[m01] = 1 + lam[m01] * rho
+    tau[m10] = 1 + nu[m10] * rho
+    tau[m11] = 1 - rho
+    tau = np.maximum(tau, 1e-10)
+
+    ll = np.log(tau) + x * log_lam - lam + y * log_nu - nu  # log(x!) log(y!) are constant
+
+    # d/d log(lambda), d/d log(nu), d/d rho per match
+    g_lam, g_nu, g_rho = x - lam, y - nu, np.zeros_like(lam)
+    c = lam[m00] * nu[m00] / tau[m00]
+    g_lam[m00] -= c * rho
+    g_nu[m00] -= c * rho
+    g_rho[m00] = -c
+    g_lam[m01] += lam[m01] * rho / tau[m01]
+    g_rho[m01] = lam[m01] / tau[m01]
+    g_nu[m10] += nu[m10] * rho / tau[m10]
+    g_rho[m10] = nu[m10] / tau[m10]
+    g_rho[m11] = -1 / tau[m11]
+
+    W = w.sum()
+    gl, gn = w * g_lam, w * g_nu
+    d_att = np.bincount(hi, gl, nt) + np.bincount(ai, gn, nt) - 2 * RIDGE * W * att
+    d_def = np.bincount(ai, gl, nt) + np.bincount(hi, gn, nt) - 2 * RIDGE * W * dfn
+    grad = np.concatenate([
+        [(gl + gn).sum(), gl.sum(), (w * g_rho).sum()],
+        d_att - d_att.mean(),  # Chain rule through the zero-sum centring
+        d_def - d_def.mean(),
+    ])
+    nll = -(w * ll).sum() + RIDGE * W * ((att ** 2).sum() + (dfn ** 2).sum())
+    return nll / W, -grad / W
+
+# ============================================================
+
+# FITTING
+
+# ============================================================
+
+def _initial(data, prev=None):
+    nt = len(data["teams"])
+    theta = np.zeros(3 + 2 * nt)
+    theta[0] = np.log(max((data["w"] * (data["hg"] + data["ag"])).sum() / (2 * data["w"].sum()), 0.1))
+    theta[2] = -0.1
+    if prev:  # Warm start: last run's values for every team we already know
+        theta[:3] = prev["mu"], prev["home"], prev["rho"]
+        for i, team in enumerate(data["teams"]):
+            if team in prev["teams"]:
+                theta[3 + i] = prev["teams"][team]["att"]
+                theta[3 + nt + i] = prev["teams"][team]["def"]
+    return theta
+
+def fit_league(df, prev=None, ref_date=None, half_life=HALF_LIFE_DAYS):
+    """
+    Fit one league's match history. prev = this league's previous fit (warm start).
+    Returns {mu, home, rho, teams: {team: {att, def}}, matches, nll, iterations, fitted}.
+    """
+    data = match_table(df, ref_date, half_life)
+    nt = len(data["teams"])
+    bounds = [(None, None), (None, None), RHO_BOUNDS] + [(None, None)] * (2 * nt)
+    res = minimize(neg_log_likelihood, _initial(data, prev), args=(data,), jac=True,
+                   method="L-BFGS-B", bounds=bounds)
+    mu, home, rho, att, dfn = _unpack(res.x, nt)
+    return {
+        "mu": float(mu),
+        "home": float(home),
+        "rho": float(rho),
+        "teams": {t: {"att": float(att[i]), "def": float(dfn[i])} for i, t in enumerate(data["teams"])},
+        "matches": int(len(data["w"])),
+        "nll": float(res.fun),
+        "iterations": int(res.nit),
+        "fitted": datetime.now().strftime("%Y-%m-%d %H:%M"),
+    }
+
+def to_xg(params, league_key, teams=None):
+    """
+    xG-file entries ({team: {xG_h, xG_a, xGA_h, xGA_a, ...}}) for one league's fit.
+    Keyed by Football-Data name, or by team ID when given a team_names resolver.
+    """
+    home_base = np.exp(params["mu"] + params["home"]) / (1 + HOME_ADV)
+    away_base = np.exp(params["mu"])
+
+    def side(base, strength):
+        return round(max(base * np.exp(2 * strength), MIN_SIDE_XG), 3)
+
+    today = datetime.now().strftime("%Y-%m-%d")
+    key = (lambda t: teams.to_id(t, league_key, "fd")) if teams else (lambda t: t)
+    return {key(team): {
+        "xG_h": side(home_base, p["att"]),
+        "xG_a": side(away_base, p["att"]),
+        "xGA_h": side(away_base, p["def"]),
+        "xGA_a": side(home_base, p["def"]),
+        "rho": round(params["rho"], 4),
+        "dc_att": round(p["att"], 6),
+        "dc_def": round(p["def"], 6),
+        "dc_mu": round(params["mu"], 6),
+        "dc_home": round(params["home"], 6),
+        "league": league_key,
+        "last_updated": today,
+        "source": "dixon-coles",
+    } for team, p in params["teams"].items()}
+
+def _fit_job(args):
+    league_key, df, prev, half_life = args
+    try:
+        return league_key, fit_league(df, prev, half_life=half_life), None
+    except Exception as e:
+        return league_key, None, str(e)[:80]
+
+def fit_leagues(frames, previous=None, half_life=HALF_LIFE_DAYS, workers=None):
+    """{league: DataFrame} -> ({league: params}, {league: error}), fitted in parallel processes"""
+    previous = previous or {}
+    jobs = [(key, df, previous.get(key), half_life) for key, df in frames.items()]
+    workers = min(len(jobs), workers or os.cpu_count() or 1) or 1
+    if workers == 1:
+        results = map(_fit_job, jobs)
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        results = pool.map(_fit_job, jobs)
+    fits, errors = {}, {}
+    for key, params, err in results:
+        if params:
+            fits[key] = params
+        else:
+            errors[key] = err
+    if workers > 1:
+        pool.shutdown()
+    return fits, errors
+
+# ============================================================
+
+# DATA + CLI
+
+# ============================================================
+
+def season_urls(fd_url, seasons=SEASONS):
+    """Football-Data URLs for the current season and the seasons - 1 before it"""
+    parts = fd_url.split("/")
+    code = parts[-2]  # e.g. "2526"
+    yy = int(code[:2])
+    urls = []
+    for k in range(seasons):
+        parts[-2] = f"{(yy - k) % 100:02d}{(yy - k + 1) % 100:02d}"
+        urls.append("/".join(parts))
+    return urls
+
+def load_history(league_key, seasons=SEASONS):
+    """All available seasons for a league as one DataFrame (oldest first), via the pipeline's cached fetch"""
+    frames = []
+    for url in reversed(season_urls(dp.LEAGUES[league_key]["fd_url"], seasons)):
+        df, _ = dp._download_fd_csv(league_key, url)
+        if df is not None:
+            frames.append(df)
+    return pd.concat(frames, ignore_index=True) if frames else None
+
+def load_params():
+    if os.path.exists(DC_PARAMS_FILE):
+        with open(DC_PARAMS_FILE) as f:
+            return json.load(f)
+    return {}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dixon-Coles team-strength fitter")
+    parser.add_argument("--league", help="Fit a single league (e.g. EPL)")
+    parser.add_argument("--seasons", type=int, default=SEASONS, help="Seasons of history to fit on")
+    parser.add_argument("--half-life", type=float, default=HALF_LIFE_DAYS, help="Time-decay half-life in days")
+    parser.add_argument("--cold", action="store_true", help="Ignore last run's parameters")
+    parser.add_argument("--offline", action="store_true", help="Use cached CSVs only")
+    parser.add_argument("--dry-run", action="store_true", help="Print fits without saving")
+    args = parser.parse_args()
+
+    dp.OFFLINE = args.offline
+    leagues = [args.league] if args.league else list(dp.LEAGUES)
+    with ThreadPoolExecutor(max_workers=dp.MAX_WORKERS) as pool:
+        frames = dict(zip(leagues, pool.map(lambda k: load_history(k, args.seasons), leagues)))
+    frames = {k: df for k, df in frames.items() if df is not None}
+
+    previous = {} if args.cold else load_params()
+    fits, errors = fit_leagues(frames, previous, args.half_life)
+
+    print("=" * 70)
+    print("  📐 DIXON-COLES FIT")
+    print("=" * 70)
+    print(f"  {'League':<14} {'Matches':>8} {'Teams':>6} {'Home':>7} {'Rho':>7} {'Iters':>6}")
+    for key, p in fits.items():
+        print(f"  {key:<14} {p['matches']:>8} {len(p['teams']):>6} {np.exp(p['home']):>7.3f} {p['rho']:>+7.3f} {p['iterations']:>6}")
+    for key in leagues:
+        if key not in fits:
+            print(f"  {key:<14} ❌ {errors.get(key, 'no data')}")
+
+    if not args.dry_run and fits:
+        xg = {}
+        if os.path.exists(dp.XG_FILE):
+            with open(dp.XG_FILE) as f:
+                xg = json.load(f)
+        teams = team_names.resolver()
+        for key, p in fits.items():
+            entries = to_xg(p, key, teams)
+            for raw in p["teams"]:  # Earlier runs keyed teams by Football-Data name
+                if raw not in entries and xg.get(raw, {}).get("source") == "dixon-coles":
+                    del xg[raw]
+            xg.update(entries)
+        write_json_cached(dp.XG_FILE, xg)
+        teams.save()
+        now = datetime.now().strftime("%Y-%m-%d %H:%M")
+        snapshots.write_snapshot(dp.SNAPSHOT_DIR, xg, {}, {key: {"xg_updated": now, "xg_source": "dixon-coles"} for key in fits})
+        with open(DC_PARAMS_FILE, "w") as f:
+            json.dump({**previous, **fits}, f, indent=2)
+        print(f"\n  ✅ {sum(len(p['teams']) for p in fits.values())} teams written to {dp.XG_FILE}")
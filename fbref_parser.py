@@ -0,0 +1,156 @@
+"""
+⚽ BETTING MODEL — FBREF SQUAD SHOOTING PARSER
+
+Pulls the squad shooting tables (stats_squads_shooting_for / _against) out of
+an FBref page without building a tree for the whole document.
+
+FBref ships most of its tables inside HTML comments (uncommented by JS), so
+each table is located in the raw text — commented or not — and only that
+slice is handed to lxml. Rows are read with one XPath over the cells that
+carry a data-stat attribute (FBref puts the team in a <th>, stats in <td>).
+
+Returns typed columns in one pass:
+{"for": {team: {"matches", "shots", "xg", "npxg"}}, "against": {...}}
+Team names in the "against" table lose their "vs " prefix.
+
+HOW TO RUN (benchmark against the BeautifulSoup path):
+python fbref_parser.py page.html [page2.html ...]
+"""
+
+import re
+import sys
+import time
+
+from lxml import html as lxml_html
+
+# ============================================================
+
+# TABLE EXTRACTION
+
+# ============================================================
+
+TABLES = {"for": "stats_squads_shooting_for", "against": "stats_squads_shooting_against"}
+COLUMNS = {"games": int, "minutes_90s": float, "shots": int, "xg": float, "npxg": float}
+
+_TABLE_END = re.compile(r"</table\s*>", re.I)
+_ANY_SHOOTING = re.compile(r"<table\b[^>]*\bid=[\"']([^\"']*shooting[^\"']*)[\"']", re.I)
+
+def _table_slice(page, table_id):
+    """Raw markup of <table id=table_id>...</table>, wherever it sits (None if absent)"""
+    m = re.search(r"<table\b[^>]*\bid=[\"']%s[\"']" % re.escape(table_id), page, re.I)
+    if not m:
+        return None
+    end = _TABLE_END.search(page, m.end())
+    return page[m.start():end.end() if end else len(page)]
+
+def _number(text, kind):
+    text = text.strip().replace(",", "")
+    if not text:
+        return None
+    try:
+        return kind(text)
+    except ValueError:
+        return None
+
+def _parse_table(markup):
+    table = lxml_html.fragment_fromstring(markup)
+    out = {}
+    for row in table.xpath(".//tbody/tr[not(contains(concat(' ', @class, ' '), ' thead '))]"):
+        cells = {c.get("data-stat"): c.text_content() for c in row.xpath("./*[@data-stat]")}
+        team = cells.get("team", "").strip()
+        if not team:
+            continue
+        if team.startswith("vs "):
+            team = team[3:]
+        stats = {k: _number(cells[k], kind) for k, kind in COLUMNS.items() if k in cells}
+        if stats.get("xg") is None:
+            continue
+        # Squad tables have no "games" column; 90s played is the match count
+        games = stats.pop("games", None)
+        nineties = stats.pop("minutes_90s", None)
+        stats["matches"] = games if games is not None else (round(nineties) if nineties is not None else None)
+        out[team] = stats
+    return out
+
+def parse_shooting(page):
+    """
+    {"for": {...}, "against": {...}} squad shooting stats from an FBref page (str or bytes).
+    If the "for" table is missing, the first table whose id mentions "shooting" is used.
+    """
+    if isinstance(page, bytes):
+        page = page.decode("utf-8", errors="replace")
+    result = {}
+    for side, table_id in TABLES.items():
+        markup = _table_slice(page, table_id)
+        if markup is None and side == "for":
+            m = _ANY_SHOOTING.search(page)
+            markup = _table_slice(page, m.group(1)) if m else None
+        result[side] = _parse_table(markup) if markup is not None else {}
+    return result
+
+def teams_xg(page):
+    """Pipeline format: {team: {xg_for, npxg_for, shots_for, matches, xg_against, ...}}"""
+    tables = parse_shooting(page)
+    teams = {}
+    for team, s in tables["for"].items():
+        teams[team] = {"xg_for": s["xg"], "npxg_for": s.get("npxg"), "shots_for": s.get("shots"),
+                       "matches": s.get("matches")}
+    for team, s in tables["against"].items():
+        if team in teams:
+            teams[team].update({"xg_against": s["xg"], "npxg_against": s.get("npxg"),
+                                "shots_against": s.get("shots")})
+    return teams
+
+# ============================================================
+
+# BENCHMARK — BEAUTIFULSOUP REFERENCE PATH
+
+# ============================================================
+
+def _bs4_teams_xg(page):
+    """The previous whole-document BeautifulSoup parse, kept for benchmarking"""
+    from bs4 import BeautifulSoup, Comment
+
+    soup = BeautifulSoup(page, "lxml")
+    for comment in soup.find_all(string=lambda s: isinstance(s, Comment) and "<table" in s):
+        comment.replace_with(BeautifulSoup(comment, "lxml"))
+    teams = {}
+    table = soup.find("table", {"id": TABLES["for"]}) or soup.find("table", id=lambda x: x and "shooting" in x)
+    for row in table.find("tbody").find_all("tr") if table else []:
+        if "thead" in row.get("class", []):
+            continue
+        team = row.find(attrs={"data-stat": "team"})
+        xg = row.find("td", {"data-stat": "xg"})
+        if team and xg and xg.get_text(strip=True):
+            teams[team.get_text(strip=True)] = {"xg_for": float(xg.get_text(strip=True))}
+    table = soup.find("table", {"id": TABLES["against"]})
+    for row in table.find("tbody").find_all("tr") if table else []:
+        if "thead" in row.get("class", []):
+            continue
+        team = row.find(attrs={"data-stat": "team"})
+        xg = row.find("td", {"data-stat": "xg"})
+        if team and xg and xg.get_text(strip=True):
+            name = team.get_text(strip=True).removeprefix("vs ")
+            if name in teams:
+                teams[name]["xg_against"] = float(xg.get_text(strip=True))
+    return teams
+
+def benchmark(page, repeat=5):
+    """(lxml seconds, BeautifulSoup seconds) per parse, best of `repeat`"""
+    timings = []
+    for parse in (teams_xg, _bs4_teams_xg):
+        best = float("inf")
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            parse(page)
+            best = min(best, time.perf_counter() - t0)
+        timings.append(best)
+    return tuple(timings)
+
+if __name__ == "__main__":
+    for path in sys.argv[1:]:
+        with open(path, "rb") as f:
+            page = f.read()
+        fast, slow = benchmark(page)
+        teams = teams_xg(page)
+        print(f"  {path}: {len(teams)} teams | lxml {fast*1000:.1f}ms | BeautifulSoup {slow*1000:.1f}ms | {slow/fast:.0f}x")
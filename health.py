@@ -0,0 +1,244 @@
+"""
+⚽ BETTING MODEL — ROLLING MODEL HEALTH
+
+Incremental health aggregates per segment, fed from the ledger's settlement log.
+
+WHAT IT TRACKS (overall, per league, per market type, per confidence tier):
+
+1. All-time count, stake, P&L, Brier score and closing-line value (CLV)
+1. The same over sliding windows of the last 30, 100 and 500 bets
+1. Each settlement is O(1) per segment — nothing rescans the history
+1. A corrected settlement (a later version in the log) takes the old values
+   out and puts the new ones in, in place; a bet still in a window is
+   found there by id (O(window)), one that has left it only moves the sums
+
+Reading a report is a walk over the segment table; decaying() flags segments
+whose recent ROI has turned negative and fallen well below their long-run ROI.
+
+HOW TO RUN:
+python health.py           # Ingest new settlements from the ledger and print the report
+python health.py --rebuild # Replay the whole settlement log
+"""
+
+import json
+import os
+import argparse
+from collections import deque
+
+import betting_model_v4_pro as bm
+import ledger
+
+# ============================================================
+
+# CONFIG
+
+# ============================================================
+
+WINDOWS = (30, 100, 500)
+DECAY_MARGIN = 0.05  # Recent ROI this far below all-time ROI (and negative) = decaying
+
+def state_file():
+    return os.path.join(os.path.dirname(bm.LEDGER_FILE), "health_state.json")
+
+# ============================================================
+
+# RUNNING SUMS
+
+# ============================================================
+
+FIELDS = ("n", "stake", "pnl", "brier", "brier_n", "clv", "clv_n")
+
+def _bet_terms(stake, pnl, brier, clv):
+    return (1, stake, pnl, brier or 0.0, 0 if brier is None else 1, clv or 0.0, 0 if clv is None else 1)
+
+def _add(sums, terms, sign=1):
+    for k, v in enumerate(terms):
+        sums[k] += sign * v
+
+class Window:
+    """Running sums over the last `size` bets, kept as (bet id, terms)"""
+
+    def __init__(self, size, bets=()):
+        self.size = size
+        self.bets = deque(maxlen=size)
+        self.sums = [0.0] * len(FIELDS)
+        for b in bets:
+            if len(b) == len(FIELDS):  # State saved before windows kept bet ids
+                b = (None, b)
+            self.push(b[0], tuple(b[1]))
+
+    def push(self, bet_id, terms):
+        if len(self.bets) == self.size:
+            _add(self.sums, self.bets[0][1], -1)
+        self.bets.append((bet_id, terms))
+        _add(self.sums, terms)
+
+    def correct(self, bet_id, terms):
+        """Replace (or, for terms=None, drop) a bet still in the window"""
+        for i, (held, old) in enumerate(self.bets):
+            if held is not None and held == bet_id:
+                _add(self.sums, old, -1)
+                if terms is None:
+                    del self.bets[i]
+                else:
+                    self.bets[i] = (bet_id, terms)
+                    _add(self.sums, terms)
+                return
+
+class Segment:
+    def __init__(self, state=None):
+        state = state or {}
+        self.sums = state.get("sums", [0.0] * len(FIELDS))
+        self.windows = {w: Window(w, state.get("windows", {}).get(str(w), [])) for w in WINDOWS}
+
+    def push(self, bet_id, terms):
+        _add(self.sums, terms)
+        for win in self.windows.values():
+            win.push(bet_id, terms)
+
+    def correct(self, bet_id, old, new):
+        """Swap a bet's counted terms for corrected ones (new=None: it no longer counts)"""
+        _add(self.sums, old, -1)
+        if new is not None:
+            _add(self.sums, new)
+        for win in self.windows.values():
+            win.correct(bet_id, new)
+
+    def state(self):
+        return {"sums": self.sums, "windows": {str(w): [[b, list(t)] for b, t in win.bets] for w, win in self.windows.items()}}
+
+def stats(sums):
+    n, stake, pnl, brier, brier_n, clv, clv_n = sums
+    return {
+        "bets": int(n),
+        "stake": round(stake, 2),
+        "pnl": round(pnl, 2),
+        "roi": round(pnl / stake, 4) if stake else 0.0,
+        "brier": round(brier / brier_n, 4) if brier_n else None,
+        "clv": round(clv / clv_n, 4) if clv_n else None,
+    }
+
+# ============================================================
+
+# HEALTH TRACKER
+
+# ============================================================
+
+def bet_segments(bet):
+    """Segment keys a settled bet counts towards"""
+    tier = bet.get("tier") or (bm.confidence_tier(bet["prob"]) if bet.get("prob") is not None else None)
+    keys = ["all"]
+    if bet.get("league"): keys.append(f"league:{bet['league']}")
+    if bet.get("market_type"): keys.append(f"market:{bet['market_type']}")
+    if tier: keys.append(f"tier:{tier}")
+    return keys
+
+class HealthTracker:
+    def __init__(self, state=None):
+        state = state or {}
+        self.seq = state.get("seq", 0)
+        self.segments = {k: Segment(v) for k, v in state.get("segments", {}).items()}
+
+    @staticmethod
+    def terms(bet):
+        """A settlement's running-sum terms, or None if it doesn't count (pending, void)"""
+        if bet.get("status") not in ledger.SETTLED:
+            return None
+        brier = None
+        if bet.get("prob") is not None:
+            brier = (bet["prob"] / 100 - (1.0 if bet["status"] == "won" else 0.0)) ** 2
+        clv = None
+        if bet.get("odds") and bet.get("closing_odds"):
+            clv = bet["odds"] / bet["closing_odds"] - 1
+        return _bet_terms(bet.get("stake") or 0.0, bet.get("pnl") or 0.0, brier, clv)
+
+    def record(self, bet, previous=None):
+        """
+        Add one settlement (dict with stake, pnl, status and optional id, prob, odds, closing_odds,
+        league, market_type, tier). previous holds the status / pnl / closing_odds it corrects.
+        """
+        old = self.terms({**bet, **previous}) if previous else None
+        new = self.terms(bet)
+        if old is None and new is None:
+            return
+        for key in bet_segments(bet):
+            seg = self.segments.get(key)
+            if seg is None:
+                seg = self.segments[key] = Segment()
+            if old is None:
+                seg.push(bet.get("id"), new)
+            else:
+                seg.correct(bet.get("id"), old, new)
+
+    def update_from_ledger(self, conn):
+        """Stream settlements logged since the last update (corrections included). Returns how many were read."""
+        rows = ledger.settlements_since(conn, self.seq)
+        for row in rows:
+            bet = dict(row)
+            previous = {c: bet.pop(f"prev_{c}") for c in ledger.LOGGED}
+            self.record(bet, previous if bet["version"] > 1 else None)
+            self.seq = row["seq"]
+        return len(rows)
+
+    def report(self, segment="all"):
+        seg = self.segments.get(segment)
+        if seg is None:
+            return None
+        out = stats(seg.sums)
+        out["windows"] = {w: stats(win.sums) for w, win in seg.windows.items()}
+        return out
+
+    def decaying(self, window=WINDOWS[0]):
+        """Segments with a full recent window whose ROI is negative and DECAY_MARGIN below their all-time ROI"""
+        flagged = []
+        for key, seg in self.segments.items():
+            win = seg.windows[window]
+            if len(win.bets) < window:
+                continue
+            recent, overall = stats(win.sums), stats(seg.sums)
+            if recent["roi"] < 0 and recent["roi"] < overall["roi"] - DECAY_MARGIN:
+                flagged.append((key, recent["roi"], overall["roi"]))
+        return sorted(flagged, key=lambda f: f[1])
+
+    def state(self):
+        return {"seq": self.seq, "segments": {k: v.state() for k, v in self.segments.items()}}
+
+def load_tracker(path=None):
+    path = path or state_file()
+    if os.path.exists(path):
+        with open(path) as f:
+            return HealthTracker(json.load(f))
+    return HealthTracker()
+
+def update_health(rebuild=False):
+    """Bring the persisted tracker up to date with the ledger. Returns (tracker, new settlements)."""
+    tracker = HealthTracker() if rebuild else load_tracker()
+    conn = ledger.connect(bm.LEDGER_FILE)
+    new = tracker.update_from_ledger(conn)
+    conn.close()
+    if new or rebuild:
+        bm.write_json_atomic(state_file(), tracker.state())
+    return tracker, new
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rolling model health per league / market / tier")
+    parser.add_argument("--rebuild", action="store_true", help="Replay the whole settlement log")
+    args = parser.parse_args()
+
+    tracker, new = update_health(rebuild=args.rebuild)
+    print("=" * 70)
+    print(f"  🏥 ROLLING MODEL HEALTH  ({new} new settlements)")
+    print("=" * 70)
+    print(f"  {'Segment':<28} {'Bets':>6} {'ROI':>8} {'ROI30':>8} {'ROI100':>8} {'Brier':>7} {'CLV':>7}")
+    for key in sorted(tracker.segments):
+        r = tracker.report(key)
+        brier = f"{r['brier']:.3f}" if r["brier"] is not None else "-"
+        clv = f"{r['clv']*100:+.1f}%" if r["clv"] is not None else "-"
+        print(f"  {key[:28]:<28} {r['bets']:>6} {r['roi']*100:>+7.1f}% {r['windows'][30]['roi']*100:>+7.1f}% "
+              f"{r['windows'][100]['roi']*100:>+7.1f}% {brier:>7} {clv:>7}")
+
+    decaying = tracker.decaying()
+    if decaying:
+        print(f"\n  ⚠️  DECAYING SEGMENTS (last {WINDOWS[0]} bets):")
+        for key, recent, overall in decaying:
+            print(f"     {key}: {recent*100:+.1f}% recent vs {overall*100:+.1f}% all-time")
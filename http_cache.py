@@ -0,0 +1,120 @@
+"""
+⚽ BETTING MODEL — HTTP RESPONSE CACHE
+
+Persistent on-disk cache for the pipeline's Football-Data and FBref fetches.
+
+WHAT IT DOES:
+
+1. Stores each response body gzip-compressed with its ETag / Last-Modified
+1. Adds If-None-Match / If-Modified-Since so unchanged sources answer 304
+1. Keeps the parsed result next to the body, so a 304 skips re-parsing
+1. Replays everything from disk in offline mode (no network at all)
+
+Layout: <cache dir>/<sha1(url)>.meta.json, .body.gz and .parsed.pkl.gz.
+The parsed sidecar is deleted whenever a new body is stored.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import pickle
+from datetime import datetime
+
+# ============================================================
+
+# RESPONSES
+
+# ============================================================
+
+class CachedResponse:
+    """Minimal stand-in for requests.Response, built from a cache entry"""
+
+    def __init__(self, status_code, content, headers=None, encoding="utf-8", not_modified=False, from_cache=True):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+        self.encoding = encoding
+        self.not_modified = not_modified  # True when the source hasn't changed since it was cached
+        self.from_cache = from_cache
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+# ============================================================
+
+# CACHE
+
+# ============================================================
+
+class HttpCache:
+    def __init__(self, cache_dir):
+        self.dir = cache_dir
+
+    def _path(self, url, suffix):
+        return os.path.join(self.dir, hashlib.sha1(url.encode()).hexdigest() + suffix)
+
+    def meta(self, url):
+        path = self._path(url, ".meta.json")
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def conditional_headers(self, url):
+        """Validators for a conditional GET ({} if nothing is cached)"""
+        meta = self.meta(url)
+        headers = {}
+        if meta and meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta and meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def response(self, url, not_modified=True):
+        """The cached body as a CachedResponse, or None"""
+        meta = self.meta(url)
+        body = self._path(url, ".body.gz")
+        if meta is None or not os.path.exists(body):
+            return None
+        with gzip.open(body, "rb") as f:
+            content = f.read()
+        return CachedResponse(200, content, meta.get("headers"), meta.get("encoding"), not_modified=not_modified)
+
+    def store(self, url, resp):
+        """Save a 200 response's body and validators; drops any stale parsed result"""
+        os.makedirs(self.dir, exist_ok=True)
+        self._write(self._path(url, ".body.gz"), gzip.compress(resp.content))
+        meta = {
+            "url": url,
+            "etag": resp.headers.get("ETag"),
+            "last_modified": resp.headers.get("Last-Modified"),
+            "encoding": resp.encoding,
+            "headers": {k: v for k, v in resp.headers.items() if k.lower() in ("content-type", "etag", "last-modified")},
+            "fetched": datetime.now().strftime("%Y-%m-%d %H:%M"),
+            "bytes": len(resp.content),
+        }
+        self._write(self._path(url, ".meta.json"), json.dumps(meta).encode())
+        parsed = self._path(url, ".parsed.pkl.gz")
+        if os.path.exists(parsed):
+            os.remove(parsed)
+
+    def parsed(self, url):
+        """Parsed result stored for the current body, or None"""
+        path = self._path(url, ".parsed.pkl.gz")
+        if not os.path.exists(path):
+            return None
+        with gzip.open(path, "rb") as f:
+            return pickle.load(f)
+
+    def store_parsed(self, url, obj):
+        os.makedirs(self.dir, exist_ok=True)
+        self._write(self._path(url, ".parsed.pkl.gz"), gzip.compress(pickle.dumps(obj)))
+
+    @staticmethod
+    def _write(path, data):
+        tmp = f"{path}.tmp{os.getpid()}"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
@@ -0,0 +1,167 @@
+"""
+⚽ BETTING MODEL — TIMING SPANS AND COUNTERS
+
+Lightweight instrumentation shared by the pipeline and the model. Nothing is
+recorded (and the hooks cost one global lookup) until a Recorder is started.
+
+HOOKS:
+
+1. span(name, **tags) — context manager timing a stage (wall and thread CPU seconds)
+1. count(name, value=1, **tags) — add to a counter (bytes, HTTP statuses, retries)
+1. tags(**tags) — context manager attaching tags (e.g. league="EPL") to every
+   span and counter recorded inside it, in this thread
+
+Spans with the same name and tags are aggregated (calls, seconds, cpu_seconds).
+With a trace path every finished span is also appended to a JSONL file as it
+closes, for timelines across worker threads.
+
+HOW TO USE:
+with instrument.recording("trace.jsonl") as rec:
+    analyse_slate(fixtures, odds)
+print(rec.summary())
+"""
+
+import contextvars
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_TAGS = contextvars.ContextVar("instrument_tags", default={})
+_NULL = nullcontext()
+_ACTIVE = None
+
+class Recorder:
+    """Thread-safe span and counter aggregation, with an optional JSONL trace"""
+
+    def __init__(self, trace=None):
+        self.lock = threading.Lock()
+        self.spans = {}     # (name, tags) -> [calls, seconds, cpu_seconds]
+        self.counters = {}  # (name, tags) -> value
+        self.started = time.perf_counter()
+        self.trace = open(trace, "a") if trace else None
+
+    @contextmanager
+    def span(self, name, **tags):
+        tags = {**_TAGS.get(), **tags}
+        t0, c0 = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            seconds, cpu = time.perf_counter() - t0, time.thread_time() - c0
+            key = (name, tuple(sorted(tags.items())))
+            with self.lock:
+                agg = self.spans.setdefault(key, [0, 0.0, 0.0])
+                agg[0] += 1
+                agg[1] += seconds
+                agg[2] += cpu
+                if self.trace:
+                    self.trace.write(json.dumps({"t": round(t0 - self.started, 6), "span": name, **tags,
+                                                 "seconds": round(seconds, 6), "cpu_seconds": round(cpu, 6),
+                                                 "thread": threading.current_thread().name}) + "\n")
+
+    def count(self, name, value=1, **tags):
+        key = (name, tuple(sorted({**_TAGS.get(), **tags}.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def close(self):
+        with self.lock:
+            if self.trace:
+                self.trace.close()
+                self.trace = None
+
+    def summary(self, group="league"):
+        """
+        {"total_seconds", "peak_rss_mb", "groups": {<group tag value or "run">: {"spans": {...}, "counters": {...}}}}
+        Within a group, entries are named "<name>:<other tag values>", e.g. "fetch:fbref".
+        Spans from worker threads overlap, so their seconds can add up to more than total_seconds.
+        """
+        groups = {}
+
+        def entry(name, tags):
+            tags = dict(tags)
+            g = str(tags.pop(group, "run"))
+            label = ":".join([name] + [str(v) for _, v in sorted(tags.items())])
+            return groups.setdefault(g, {"spans": {}, "counters": {}}), label
+
+        with self.lock:
+            for (name, tags), (calls, seconds, cpu) in sorted(self.spans.items()):
+                g, label = entry(name, tags)
+                g["spans"][label] = {"calls": calls, "seconds": round(seconds, 4), "cpu_seconds": round(cpu, 4)}
+            for (name, tags), value in sorted(self.counters.items()):
+                g, label = entry(name, tags)
+                g["counters"][label] = value
+        return {"total_seconds": round(time.perf_counter() - self.started, 3), "peak_rss_mb": peak_rss_mb(),
+                "groups": groups}
+
+    def totals(self):
+        """{span name: seconds} summed over every tag combination"""
+        out = {}
+        with self.lock:
+            for (name, _), (_, seconds, _) in self.spans.items():
+                out[name] = out.get(name, 0.0) + seconds
+        return out
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None where the platform can't say)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)  # Bytes on macOS, KB on Linux
+
+# ============================================================
+
+# MODULE-LEVEL HOOKS — no-ops while nothing is recording
+
+# ============================================================
+
+def span(name, **tags):
+    rec = _ACTIVE
+    return rec.span(name, **tags) if rec is not None else _NULL
+
+def count(name, value=1, **tags):
+    rec = _ACTIVE
+    if rec is not None:
+        rec.count(name, value, **tags)
+
+@contextmanager
+def tags(**new):
+    token = _TAGS.set({**_TAGS.get(), **new})
+    try:
+        yield
+    finally:
+        _TAGS.reset(token)
+
+def start(trace=None):
+    """Start recording process-wide (replacing any running Recorder) and return the Recorder"""
+    global _ACTIVE
+    if _ACTIVE is not None:
+        _ACTIVE.close()
+    _ACTIVE = Recorder(trace)
+    return _ACTIVE
+
+def stop():
+    """Stop recording; returns the finished Recorder (None if nothing was recording)"""
+    global _ACTIVE
+    rec, _ACTIVE = _ACTIVE, None
+    if rec is not None:
+        rec.close()
+    return rec
+
+@contextmanager
+def recording(trace=None):
+    rec = start(trace)
+    try:
+        yield rec
+    finally:
+        if _ACTIVE is rec:
+            stop()
+        else:
+            rec.close()
@@ -0,0 +1,239 @@
+"""
+⚽ BETTING MODEL — BET LEDGER
+
+SQLite-backed bet ledger replacing the monolithic bet_tracker.json.
+
+Bets are appended once and only their settlement columns are updated later.
+Every settlement is also appended to a settlements log that incremental
+consumers (health.py) stream from, one row per (bet, version): a correction
+(lost -> won, void -> won, new closing odds) adds the next version, carrying
+the settled values, and re-settling with unchanged values adds nothing.
+Indexes on status, league, market and settlement date keep health checks and
+reporting fast at tens of thousands of bets — aggregates run in SQL instead
+of loading and list-filtering the whole history.
+
+HOW TO RUN:
+python ledger.py --import          # One-shot import of bet_tracker.json (safe to re-run)
+python ledger.py --summary league  # ROI by league (or market, market_type, tier)
+"""
+
+import json
+import os
+import sqlite3
+import argparse
+from datetime import datetime
+
+# ============================================================
+
+# SCHEMA
+
+# ============================================================
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bets (
+    id           INTEGER PRIMARY KEY,
+    source_id    TEXT UNIQUE,
+    placed_at    TEXT,
+    settled_at   TEXT,
+    league       TEXT,
+    home         TEXT,
+    away         TEXT,
+    market       TEXT,
+    market_type  TEXT,
+    prob         REAL,
+    odds         REAL,
+    closing_odds REAL,
+    stake        REAL NOT NULL DEFAULT 0,
+    pnl          REAL,
+    status       TEXT NOT NULL DEFAULT 'pending',
+    tier         TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_bets_status ON bets(status);
+CREATE INDEX IF NOT EXISTS idx_bets_league ON bets(league, status);
+CREATE INDEX IF NOT EXISTS idx_bets_market ON bets(market, status);
+CREATE INDEX IF NOT EXISTS idx_bets_market_type ON bets(market_type, status);
+CREATE INDEX IF NOT EXISTS idx_bets_settled ON bets(settled_at);
+CREATE TABLE IF NOT EXISTS settlements (
+    seq          INTEGER PRIMARY KEY AUTOINCREMENT,
+    bet_id       INTEGER NOT NULL REFERENCES bets(id),
+    settled_at   TEXT,
+    version      INTEGER NOT NULL DEFAULT 1,
+    status       TEXT,
+    pnl          REAL,
+    closing_odds REAL
+);
+"""
+LOGGED = ("status", "pnl", "closing_odds")  # Settlement values each log row carries
+
+COLUMNS = ("source_id", "placed_at", "settled_at", "league", "home", "away", "market", "market_type",
+           "prob", "odds", "closing_odds", "stake", "pnl", "status", "tier")
+SETTLED = ("won", "lost")
+GROUPS = ("league", "market", "market_type", "tier")
+
+def connect(path):
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'idx_settlements_version'").fetchone():
+        _migrate_settlements(conn)
+    return conn
+
+def _migrate_settlements(conn):
+    """Bring an older settlements log to one row per (bet, version) with the settled values"""
+    cols = {r["name"] for r in conn.execute("PRAGMA table_info(settlements)")}
+    with conn:
+        if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'idx_settlements_bet'").fetchone():
+            # Ledgers that logged every settle call: keep each bet's first settlement
+            conn.execute("DELETE FROM settlements WHERE seq NOT IN (SELECT MIN(seq) FROM settlements GROUP BY bet_id)")
+        conn.execute("DROP INDEX IF EXISTS idx_settlements_bet")
+        for col, kind in (("version", "INTEGER NOT NULL DEFAULT 1"), ("status", "TEXT"), ("pnl", "REAL"), ("closing_odds", "REAL")):
+            if col not in cols:
+                conn.execute(f"ALTER TABLE settlements ADD COLUMN {col} {kind}")
+        if "status" not in cols:  # Older rows logged the bet only: its values are the bet row's
+            conn.execute(f"UPDATE settlements SET {', '.join(f'{c} = (SELECT {c} FROM bets WHERE id = bet_id)' for c in LOGGED)}")
+        conn.execute("CREATE UNIQUE INDEX idx_settlements_version ON settlements(bet_id, version)")
+
+# ============================================================
+
+# WRITES — APPEND, THEN SETTLE
+
+# ============================================================
+
+INSERT_SQL = f"INSERT OR IGNORE INTO bets ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+
+# Import: new bets are appended; for bets imported before, a settlement made since in the
+# tracker (status/pnl changed away from pending or corrected) is copied onto the existing row
+IMPORT_SQL = (f"INSERT INTO bets ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))}) "
+              f"ON CONFLICT(source_id) DO UPDATE SET status = excluded.status, pnl = excluded.pnl, "
+              f"settled_at = COALESCE(excluded.settled_at, bets.settled_at), "
+              f"closing_odds = COALESCE(excluded.closing_odds, bets.closing_odds) "
+              f"WHERE excluded.status != 'pending' AND (bets.status IS NOT excluded.status OR bets.pnl IS NOT excluded.pnl)")
+
+def _row(bet):
+    row = {k: bet.get(k) for k in COLUMNS}
+    row["placed_at"] = row["placed_at"] or datetime.now().strftime("%Y-%m-%d %H:%M")
+    row["status"] = row["status"] or "pending"
+    row["stake"] = row["stake"] or 0
+    return [row[k] for k in COLUMNS]
+
+def add_bet(conn, **bet):
+    """Append one bet; unknown keys are ignored. Returns the new row id (None if source_id already imported)."""
+    with conn:
+        cur = conn.execute(INSERT_SQL, _row(bet))
+    return cur.lastrowid if cur.rowcount else None
+
+# Log bets whose settlement differs from their latest log row (or, for won/lost bets, that have none)
+LOG_SQL = (f"INSERT INTO settlements (bet_id, version, settled_at, {', '.join(LOGGED)}) "
+           f"SELECT b.id, COALESCE(l.version, 0) + 1, COALESCE(b.settled_at, b.placed_at), "
+           f"{', '.join(f'b.{c}' for c in LOGGED)} FROM bets b "
+           f"LEFT JOIN settlements l ON l.bet_id = b.id AND l.version = (SELECT MAX(version) FROM settlements WHERE bet_id = b.id) "
+           f"WHERE {{where}} AND (l.bet_id IS NULL AND b.status IN ({', '.join(repr(s) for s in SETTLED)}) "
+           f"OR l.bet_id IS NOT NULL AND b.status != 'pending' AND ({' OR '.join(f'l.{c} IS NOT b.{c}' for c in LOGGED)})) "
+           f"ORDER BY COALESCE(b.settled_at, b.placed_at), b.id")
+
+def settle_bet(conn, bet_id, status, pnl=None, closing_odds=None, settled_at=None):
+    """Settle a bet as won/lost/void. P&L defaults to the stake at the placed odds.
+    A call that changes the bet's settlement logs its next version; repeating one logs nothing."""
+    bet = conn.execute("SELECT stake, odds FROM bets WHERE id = ?", (bet_id,)).fetchone()
+    if bet is None:
+        raise KeyError(f"No bet with id {bet_id}")
+    if pnl is None:
+        pnl = bet["stake"] * (bet["odds"] - 1) if status == "won" else -bet["stake"] if status == "lost" else 0.0
+    settled_at = settled_at or datetime.now().strftime("%Y-%m-%d %H:%M")
+    with conn:
+        conn.execute("UPDATE bets SET status = ?, pnl = ?, closing_odds = COALESCE(?, closing_odds), settled_at = ? WHERE id = ?",
+                     (status, round(pnl, 2), closing_odds, settled_at, bet_id))
+        conn.execute(LOG_SQL.format(where="b.id = ?"), (bet_id,))
+    return pnl
+
+def settlements_since(conn, seq=0):
+    """
+    Log rows appended after `seq`, oldest first: the bet's columns with the logged
+    status / pnl / closing_odds, plus seq, version and (from version 2 on) the
+    values it replaces as prev_status / prev_pnl / prev_closing_odds.
+    """
+    bet_cols = ", ".join(f"b.{c}" for c in ("id",) + COLUMNS if c not in LOGGED + ("settled_at",))
+    return conn.execute(f"SELECT s.seq, s.version, s.settled_at, {', '.join(f's.{c}' for c in LOGGED)}, {bet_cols}, "
+                        f"{', '.join(f'p.{c} AS prev_{c}' for c in LOGGED)} "
+                        f"FROM settlements s JOIN bets b ON b.id = s.bet_id "
+                        f"LEFT JOIN settlements p ON p.bet_id = s.bet_id AND p.version = s.version - 1 "
+                        f"WHERE s.seq > ? ORDER BY s.seq", (seq,)).fetchall()
+
+# ============================================================
+
+# AGGREGATES
+
+# ============================================================
+
+def settled_totals(conn):
+    """(settled bets, total staked, total P&L) in one indexed query"""
+    row = conn.execute(f"SELECT COUNT(*), COALESCE(SUM(stake), 0), COALESCE(SUM(pnl), 0) FROM bets "
+                       f"WHERE status IN ({', '.join('?' * len(SETTLED))})", SETTLED).fetchone()
+    return row[0], row[1], row[2]
+
+def summary(conn, group_by="league", since=None):
+    """Rows of {group, bets, staked, pnl, roi} for settled bets, optionally settled on/after `since`"""
+    if group_by not in GROUPS:
+        raise ValueError(f"group_by must be one of {GROUPS}")
+    where = f"status IN ({', '.join('?' * len(SETTLED))})"
+    params = list(SETTLED)
+    if since:
+        where += " AND settled_at >= ?"
+        params.append(since)
+    rows = conn.execute(f"SELECT {group_by} AS grp, COUNT(*) AS bets, SUM(stake) AS staked, SUM(pnl) AS pnl "
+                        f"FROM bets WHERE {where} GROUP BY {group_by} ORDER BY pnl DESC", params).fetchall()
+    return [{"group": r["grp"], "bets": r["bets"], "staked": r["staked"], "pnl": r["pnl"],
+             "roi": (r["pnl"] / r["staked"]) if r["staked"] else 0.0} for r in rows]
+
+# ============================================================
+
+# ONE-SHOT IMPORT FROM bet_tracker.json
+
+# ============================================================
+
+def import_json(conn, tracker_file):
+    """
+    Import every bet from the JSON tracker. Re-running adds bets not imported before and
+    copies settlements made in the tracker since onto bets already imported.
+    Returns (bets added, bets whose settlement was updated).
+    """
+    with open(tracker_file) as f:
+        bets = json.load(f).get("bets", [])
+    rows = []
+    for i, b in enumerate(bets):
+        row = dict(b)
+        row["source_id"] = str(b.get("id", i))
+        row["placed_at"] = b.get("placed_at") or b.get("date")
+        if not row.get("home") and " vs " in str(b.get("match", "")):
+            row["home"], row["away"] = b["match"].split(" vs ", 1)
+        rows.append(_row(row))
+    count = "SELECT COUNT(*) FROM bets"
+    with conn:
+        n_before, changes_before = conn.execute(count).fetchone()[0], conn.total_changes
+        conn.executemany(IMPORT_SQL, rows)
+        added = conn.execute(count).fetchone()[0] - n_before
+        updated = conn.total_changes - changes_before - added
+        # Log imported settlements and corrections in settlement order so health.py can stream them
+        conn.execute(LOG_SQL.format(where="1"))
+    return added, updated
+
+if __name__ == "__main__":
+    import betting_model_v4_pro as bm
+
+    parser = argparse.ArgumentParser(description="Bet ledger (SQLite)")
+    parser.add_argument("--import", dest="do_import", action="store_true", help="Import bet_tracker.json")
+    parser.add_argument("--summary", choices=GROUPS, help="ROI grouped by this column")
+    args = parser.parse_args()
+
+    conn = connect(bm.LEDGER_FILE)
+    if args.do_import:
+        if not os.path.exists(bm.TRACKER_FILE):
+            print(f"  ❌ No tracker at {bm.TRACKER_FILE}")
+        else:
+            added, updated = import_json(conn, bm.TRACKER_FILE)
+            print(f"  ✅ {added} bets imported, {updated} settlements updated")
+    if args.summary:
+        print(f"\n  {args.summary.upper():<20} {'Bets':>6} {'Staked':>9} {'P&L':>9} {'ROI':>8}")
+        for r in summary(conn, args.summary):
+            print(f"  {str(r['group']):<20} {r['bets']:>6} {r['staked']:>9.2f} {r['pnl']:>+9.2f} {r['roi']*100:>+7.1f}%")
@@ -0,0 +1,165 @@
+"""
+⚽ BETTING MODEL — GOALS MARKET BOARD
+
+Derives every goals market from a Dixon-Coles score matrix in one pass.
+
+A matrix (n, n) or a batched stack (N, n, n) from build_M / build_M_batch is
+reduced once to four distributions — home goals, away goals, total goals
+(anti-diagonal sums) and goal difference (diagonal sums). Every line is then
+an O(n) read of one of them, vectorised over the whole slate.
+
+All probabilities here are 0-1 fractions (the model prints percentages).
+Lines that can push (whole and quarter lines) return (win, push, lose) as
+stake-weighted fractions, so EV = win * (odds - 1) - lose.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+# ============================================================
+
+# DISTRIBUTIONS — ONE REDUCTION PER MATRIX
+
+# ============================================================
+
+_SCATTER = {}  # n -> (total one-hot, goal-diff one-hot), each (n*n, 2n-1)
+
+def _scatter(n):
+    if n not in _SCATTER:
+        i, j = np.indices((n, n))
+        tot = np.zeros((n * n, 2 * n - 1))
+        gd = np.zeros((n * n, 2 * n - 1))
+        tot[np.arange(n * n), (i + j).ravel()] = 1
+        gd[np.arange(n * n), (i - j + n - 1).ravel()] = 1
+        _SCATTER[n] = (tot, gd)
+    return _SCATTER[n]
+
+@dataclass(slots=True)
+class ScoreDists:
+    M: np.ndarray      # (N, n, n) score matrices
+    home: np.ndarray   # (N, n) home goals
+    away: np.ndarray   # (N, n) away goals
+    total: np.ndarray  # (N, 2n-1) total goals 0..2n-2
+    gd: np.ndarray     # (N, 2n-1) home minus away goals, -(n-1)..n-1
+
+    @property
+    def n(self):
+        return self.M.shape[-1]
+
+def score_dists(M):
+    """Reduce a matrix or (N, n, n) stack to its goal distributions"""
+    M = np.asarray(M, dtype=float)
+    if M.ndim == 2:
+        M = M[None]
+    N, n, _ = M.shape
+    tot, gd = _scatter(n)
+    flat = M.reshape(N, n * n)
+    return ScoreDists(M, M.sum(axis=2), M.sum(axis=1), flat @ tot, flat @ gd)
+
+# ============================================================
+
+# LINE SETTLEMENT
+
+# ============================================================
+
+def _settle(probs, values, line):
+    """(win, push, lose) for a bet that wins when value + line > 0; quarter lines split the stake"""
+    frac = round(line * 4) % 2
+    if frac:
+        a = _settle(probs, values, line - 0.25)
+        b = _settle(probs, values, line + 0.25)
+        return tuple((x + y) / 2 for x, y in zip(a, b))
+    r = values + line
+    win = probs[..., r > 1e-9].sum(axis=-1)
+    push = probs[..., np.abs(r) <= 1e-9].sum(axis=-1)
+    return win, push, 1 - win - push
+
+def over_under(d, line):
+    """(over, push, under) on total goals for any .0/.25/.5/.75 line"""
+    return _settle(d.total, np.arange(d.total.shape[-1]), -line)
+
+def asian_handicap(d, line, side="home"):
+    """(win, push, lose) for the home (or away) side getting `line` goals, e.g. -0.75"""
+    values = np.arange(d.gd.shape[-1]) - (d.n - 1)
+    if side == "away":
+        values = -values
+    return _settle(d.gd, values, line)
+
+def team_total(d, line, side="home"):
+    """(over, push, under) on one team's goals"""
+    probs = d.home if side == "home" else d.away
+    return _settle(probs, np.arange(probs.shape[-1]), -line)
+
+# ============================================================
+
+# OTHER MARKETS
+
+# ============================================================
+
+def wdl(d):
+    """(home, draw, away)"""
+    c = d.n - 1
+    return d.gd[:, c + 1:].sum(axis=1), d.gd[:, c], d.gd[:, :c].sum(axis=1)
+
+def double_chance(d):
+    """(1X, X2, 12)"""
+    hw, dr, aw = wdl(d)
+    return hw + dr, dr + aw, hw + aw
+
+def btts(d):
+    return 1 - d.home[:, 0] - d.away[:, 0] + d.M[:, 0, 0]
+
+def win_to_nil(d):
+    """(home win to nil, away win to nil)"""
+    return d.M[:, 1:, 0].sum(axis=1), d.M[:, 0, 1:].sum(axis=1)
+
+def correct_score(d, home_goals, away_goals):
+    return d.M[:, home_goals, away_goals]
+
+# ============================================================
+
+# FULL BOARD
+
+# ============================================================
+
+OU_LINES = (0.5, 1.5, 2.5, 3.5, 4.5, 5.5)
+AH_LINES = (-2.5, -2, -1.75, -1.5, -1.25, -1, -0.75, -0.5, -0.25, 0, 0.25, 0.5, 0.75, 1, 1.5)
+TEAM_LINES = (0.5, 1.5, 2.5)
+
+def market_board(M, ou_lines=OU_LINES, ah_lines=AH_LINES, team_lines=TEAM_LINES, max_cs=4):
+    """
+    Every goals market for a matrix or slate stack, as {market name: (N,) array}.
+    Lines that can push are stored as the stake-weighted win fraction under
+    "<name>" and the push fraction under "<name> push".
+    """
+    d = score_dists(M)
+    board = {}
+    hw, dr, aw = wdl(d)
+    board.update({"Home Win": hw, "Draw": dr, "Away Win": aw})
+    dc = double_chance(d)
+    board.update({"Double Chance 1X": dc[0], "Double Chance X2": dc[1], "Double Chance 12": dc[2]})
+    board["BTTS Yes"] = btts(d)
+    board["BTTS No"] = 1 - board["BTTS Yes"]
+    wtn = win_to_nil(d)
+    board.update({"Home Win to Nil": wtn[0], "Away Win to Nil": wtn[1]})
+
+    def put(name, res, lose_name=None):
+        board[name] = res[0]
+        if np.any(res[1]):
+            board[f"{name} push"] = res[1]
+        if lose_name:
+            board[lose_name] = res[2]
+
+    for line in ou_lines:
+        put(f"Over {line} Goals", over_under(d, line), f"Under {line} Goals")
+    for line in ah_lines:
+        put(f"AH Home {line:+g}", asian_handicap(d, line, "home"))
+        put(f"AH Away {-line:+g}", asian_handicap(d, -line, "away"))
+    for line in team_lines:
+        put(f"Home Over {line}", team_total(d, line, "home"), f"Home Under {line}")
+        put(f"Away Over {line}", team_total(d, line, "away"), f"Away Under {line}")
+    for h in range(max_cs + 1):
+        for a in range(max_cs + 1):
+            board[f"Correct Score {h}-{a}"] = correct_score(d, h, a)
+    return board
@@ -0,0 +1,329 @@
+"""
+⚽ BETTING MODEL — RESIDENT MODEL SERVER
+
+Keeps ratings, corners and calibration in memory and answers analysis
+requests as JSON over HTTP (TCP or a Unix socket), standard library only.
+
+ENDPOINTS:
+GET  /health   -> {"status", "version", "loaded_at", "teams", "corner_teams", "files"}
+POST /match    {"home", "away", "odds": {market: [prob, odds] or odds}}
+POST /slate    {"fixtures": [{"home", "away", "odds": {...}}, ...]}
+POST /reload   -> force a reload now
+Match and slate replies: {"version", "matches": [MatchProbs...], "value_bets": [ValueBet...]},
+from analyse_slate. Bare odds (no prob) only count for markets the model prices.
+
+HOT RELOAD:
+A watcher thread polls the data files' mtime and size. Once a change has held
+still for one poll (so every file of one pipeline run has landed) and the files parse, a
+complete new snapshot is built and swapped in with one reference assignment.
+Each request reads the snapshot once when it starts, so in-flight queries
+finish on the data they began with; a failed reload keeps the old snapshot.
+
+HOW TO RUN:
+python model_server.py                       # http://127.0.0.1:8765
+python model_server.py --port 9000 --poll 2
+python model_server.py --socket /tmp/model.sock
+curl -s localhost:8765/match -d '{"home": "Girona", "away": "Barcelona", "odds": {"Over 2.5 Goals": 1.72}}'
+"""
+
+import argparse
+import json
+import math
+import os
+import signal
+import socket
+import socketserver
+import sys
+import threading
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import betting_model_v4_pro as bm
+import data_pipeline as dp
+
+# ============================================================
+
+# CONFIG
+
+# ============================================================
+
+HOST = "127.0.0.1"
+PORT = 8765
+POLL_SECONDS = 1.0
+MAX_BODY = 1 << 20    # 1 MB request limit
+MAX_FIXTURES = 2000   # Per slate request
+
+# ============================================================
+
+# SNAPSHOT — everything one request needs, never mutated after load
+
+# ============================================================
+
+@dataclass(frozen=True, slots=True)
+class Snapshot:
+    version: int
+    loaded_at: str
+    signature: tuple  # (mtime_ns, size) per file — what was loaded
+    xg: dict
+    corners: dict
+    cal: dict
+
+def _signature(paths):
+    sig = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            sig.append((st.st_mtime_ns, st.st_size))
+        except FileNotFoundError:
+            sig.append(None)
+    return tuple(sig)
+
+def _read(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def load_snapshot(paths, version):
+    """New Snapshot from (xg, corners, calibration) paths; missing files fall back to the model's defaults"""
+    xg_path, corners_path, cal_path = paths
+    signature = _signature(paths)
+    xg = _read(xg_path)
+    live_corners = _read(corners_path) or {}
+    cal = _read(cal_path)
+    return Snapshot(
+        version=version,
+        loaded_at=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        signature=signature,
+        xg=xg if xg is not None else bm.DEFAULT_XG.copy(),
+        corners={**bm.CORNER_DATA, **live_corners},
+        cal=cal if cal is not None else bm.load_calibration(),
+    )
+
+class ModelStore:
+    """Holds the current Snapshot and swaps in a new one when the data files change"""
+
+    def __init__(self, xg_file, corners_file, cal_file, poll=POLL_SECONDS):
+        self.paths = (xg_file, corners_file, cal_file)
+        self.poll = poll
+        self.lock = threading.Lock()  # Serialises reloads; readers never take it
+        self.snapshot = load_snapshot(self.paths, 1)
+        self._pending = None
+        self._failed = None  # Signature of files that failed to load, not retried until they change
+        self._stop = threading.Event()
+
+    def reload(self, force=False):
+        """Load and swap a new snapshot if the files changed (or force). Returns True when swapped."""
+        with self.lock:
+            sig = _signature(self.paths)
+            if not force and sig == self.snapshot.signature:
+                return False
+            try:
+                snap = load_snapshot(self.paths, self.snapshot.version + 1)
+            except (OSError, ValueError) as e:  # Half-written file: keep serving the old snapshot
+                self._failed = sig
+                print(f"  ⚠️  Reload failed, keeping v{self.snapshot.version}: {e}", file=sys.stderr)
+                return False
+            self.snapshot, self._failed = snap, None
+            print(f"  🔄 Reloaded data — v{snap.version}, {len(snap.xg)} teams", file=sys.stderr)
+            return True
+
+    def _watch(self):
+        while not self._stop.wait(self.poll):
+            sig = _signature(self.paths)
+            if sig == self.snapshot.signature:
+                self._pending = None
+            elif sig == self._failed:  # Same files that failed last time: wait for them to change
+                continue
+            elif sig == self._pending:  # Unchanged for a whole poll — the writer is done
+                self.reload()
+            else:
+                self._pending = sig
+
+    def start_watching(self):
+        threading.Thread(target=self._watch, name="model-reload", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+# ============================================================
+
+# ANALYSIS
+
+# ============================================================
+
+class BadRequest(ValueError):
+    pass
+
+def _jsonable(record):
+    return {k: (None if isinstance(v, float) and math.isnan(v) else v) for k, v in asdict(record).items()}
+
+def _odds_map(raw):
+    """{market: (prob, odds)} from {market: [prob, odds]} or {market: odds}"""
+    if raw is None:
+        return {}
+    if not isinstance(raw, dict):
+        raise BadRequest("odds must be an object {market: odds or [prob, odds]}")
+    out = {}
+    for market, value in raw.items():
+        if isinstance(value, (int, float)):
+            value = (0.0, value)
+        try:
+            prob, odds = float(value[0]), float(value[1])
+        except (TypeError, ValueError, IndexError):
+            raise BadRequest(f"odds for {market!r} must be odds or [prob, odds]")
+        if odds <= 1:
+            raise BadRequest(f"odds for {market!r} must be above 1.0")
+        out[market] = (prob, odds)
+    return out
+
+def analyse(snap, fixtures):
+    """fixtures: [{"home", "away", "odds"}] -> reply dict, all on one snapshot"""
+    if not isinstance(fixtures, list) or not fixtures:
+        raise BadRequest("no fixtures")
+    if len(fixtures) > MAX_FIXTURES:
+        raise BadRequest(f"at most {MAX_FIXTURES} fixtures per request")
+    pairs, odds = [], {}
+    for fx in fixtures:
+        if not isinstance(fx, dict):
+            raise BadRequest("each fixture must be an object with home and away")
+        home, away = fx.get("home"), fx.get("away")
+        for team in (home, away):
+            if not isinstance(team, str) or bm.team_key(team, snap.xg) not in snap.xg:
+                raise BadRequest(f"unknown team: {team!r}")
+        pairs.append((home, away))
+        odds[(home, away)] = _odds_map(fx.get("odds"))
+    matches, value_bets = bm.analyse_slate(pairs, odds, XG=snap.xg, cal=snap.cal, CD=snap.corners)
+    return {"version": snap.version, "matches": [_jsonable(m) for m in matches],
+            "value_bets": [_jsonable(vb) for vb in value_bets]}
+
+# ============================================================
+
+# HTTP
+
+# ============================================================
+
+class Handler(BaseHTTPRequestHandler):
+    server_version = "BettingModel/4"
+    protocol_version = "HTTP/1.1"  # Keep-alive for clients sending many requests
+    timeout = 5  # Idle keep-alive connections close, so shutdown never waits long on them
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_body(self):
+        """The raw request body, read in full so a keep-alive connection stays in step. A body
+        we won't read (too large, bad length) closes the connection after the reply instead."""
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if not 0 <= length <= MAX_BODY:
+            self.close_connection = True
+            raise BadRequest("request body too large" if length > MAX_BODY else "bad Content-Length")
+        return self.rfile.read(length)
+
+    @staticmethod
+    def _json(raw):
+        try:
+            body = json.loads(raw or b"{}")
+        except ValueError:
+            raise BadRequest("body is not valid JSON")
+        if not isinstance(body, dict):
+            raise BadRequest("body must be a JSON object")
+        return body
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/health":
+            return self._reply(404, {"error": f"no such endpoint: {self.path}"})
+        snap = self.server.store.snapshot
+        self._reply(200, {"status": "ok", "version": snap.version, "loaded_at": snap.loaded_at,
+                          "teams": len(snap.xg), "corner_teams": len(snap.corners),
+                          "files": dict(zip(("xg", "corners", "calibration"), self.server.store.paths))})
+
+    def do_POST(self):
+        snap = self.server.store.snapshot  # One snapshot per request, even if a reload lands mid-way
+        try:
+            raw = self._read_body()  # Every path consumes its body, used or not
+            if self.path == "/match":
+                return self._reply(200, analyse(snap, [self._json(raw)]))
+            if self.path == "/slate":
+                return self._reply(200, analyse(snap, self._json(raw).get("fixtures")))
+            if self.path == "/reload":
+                swapped = self.server.store.reload(force=True)
+                return self._reply(200, {"reloaded": swapped, "version": self.server.store.snapshot.version})
+            self._reply(404, {"error": f"no such endpoint: {self.path}"})
+        except BadRequest as e:
+            self._reply(400, {"error": str(e)})
+        except Exception as e:
+            self._reply(500, {"error": f"{type(e).__name__}: {e}"})
+
+    def address_string(self):
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+class ModelServer(ThreadingHTTPServer):
+    daemon_threads = False  # server_close() waits for in-flight requests
+
+    def __init__(self, address, store, verbose=False):
+        self.store, self.verbose = store, verbose
+        super().__init__(address, Handler)
+
+class UnixModelServer(ModelServer):
+    address_family = socket.AF_UNIX
+
+    def server_bind(self):
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)  # Stale socket from a previous run
+        socketserver.TCPServer.server_bind(self)
+        self.server_name, self.server_port = "localhost", 0
+
+def serve(store, host=HOST, port=PORT, unix_socket=None, verbose=False):
+    """Run until Ctrl-C or SIGTERM; shutting down lets in-flight requests finish"""
+    server = UnixModelServer(unix_socket, store, verbose) if unix_socket else ModelServer((host, port), store, verbose)
+    store.start_watching()
+    # SIGTERM stops the accept loop from another thread (shutdown() blocks until serve_forever returns)
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown).start())
+    where = unix_socket or f"http://{host}:{port}"
+    print(f"  ⚽ Model server v{store.snapshot.version} ({len(store.snapshot.xg)} teams) on {where}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        store.stop()
+        server.server_close()
+        if unix_socket and os.path.exists(unix_socket):
+            os.unlink(unix_socket)
+
+# ============================================================
+
+# CLI
+
+# ============================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resident model server with hot reload")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--socket", help="Listen on this Unix socket instead of TCP")
+    parser.add_argument("--xg", default=dp.XG_FILE, help="Ratings file to serve and watch")
+    parser.add_argument("--corners", default=dp.CORNERS_FILE, help="Corners file to serve and watch")
+    parser.add_argument("--calibration", default=bm.CALIBRATION_FILE, help="Calibration file to serve and watch")
+    parser.add_argument("--poll", type=float, default=POLL_SECONDS, help="Seconds between file checks")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args()
+
+    store = ModelStore(args.xg, args.corners, args.calibration, poll=args.poll)
+    serve(store, args.host, args.port, args.socket, args.verbose)
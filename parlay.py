@@ -0,0 +1,228 @@
+"""
+⚽ BETTING MODEL — EXACT PARLAY ENGINE
+
+Prices parlays from the Dixon-Coles score matrices instead of the flat
+CORR_PENALTY haircut, and searches a slate for the best parlay.
+
+PRICING:
+
+1. Every leg is a 0/1 mask over the (n, n) score matrix (markets.py names)
+1. Same-match legs: joint probability = sum(M * mask_1 * mask_2 * ...)
+1. Legs on different matches are independent and multiply
+
+SEARCH:
+Each match's legs are first combined into "blocks" (every 1..k-leg
+same-match combination, priced in one batched matmul). A parlay is then
+at most one block per match. A suffix table over matches gives the best
+achievable P * odds for any remaining leg budget, and the depth-first
+search prunes every branch whose bound can't beat the current best. For
+Kelly growth the bound is the growth at that P * odds with the current
+(pre-extension) probability — growth rises with both, and adding legs
+only lowers the probability.
+
+Only binary legs are supported (no pushes): half-line totals, handicaps
+and team totals, 1X2, double chance, BTTS, win to nil and correct score.
+All probabilities here are 0-1 fractions.
+"""
+
+import heapq
+import math
+import re
+from dataclasses import dataclass
+from itertools import combinations
+
+import numpy as np
+
+# ============================================================
+
+# LEG MASKS
+
+# ============================================================
+
+_LINE = re.compile(r"^(Over|Under) (\d+\.5) Goals$")
+_TEAM_LINE = re.compile(r"^(Home|Away) (Over|Under) (\d+\.5)$")
+_AH = re.compile(r"^AH (Home|Away) ([+-]?\d+\.5)$")
+_CS = re.compile(r"^Correct Score (\d+)-(\d+)$")
+
+def leg_mask(market, n=9):
+    """(n, n) 0/1 mask of the scores (home goals i, away goals j) on which `market` wins"""
+    i, j = np.indices((n, n))
+    fixed = {
+        "Home Win": i > j,
+        "Draw": i == j,
+        "Away Win": i < j,
+        "Double Chance 1X": i >= j,
+        "Double Chance X2": i <= j,
+        "Double Chance 12": i != j,
+        "BTTS Yes": (i > 0) & (j > 0),
+        "BTTS No": (i == 0) | (j == 0),
+        "Home Win to Nil": (i > 0) & (j == 0),
+        "Away Win to Nil": (i == 0) & (j > 0),
+    }
+    if market in fixed:
+        return fixed[market].astype(float)
+    if m := _LINE.match(market):
+        over = i + j > float(m.group(2))
+        return (over if m.group(1) == "Over" else ~over).astype(float)
+    if m := _TEAM_LINE.match(market):
+        goals = i if m.group(1) == "Home" else j
+        over = goals > float(m.group(3))
+        return (over if m.group(2) == "Over" else ~over).astype(float)
+    if m := _AH.match(market):
+        diff = i - j if m.group(1) == "Home" else j - i
+        return (diff + float(m.group(2)) > 0).astype(float)
+    if m := _CS.match(market):
+        return ((i == int(m.group(1))) & (j == int(m.group(2)))).astype(float)
+    raise ValueError(f"Not a binary goals market: {market!r}")
+
+def joint_prob(M, markets):
+    """Exact probability that every same-match leg in `markets` wins"""
+    M = np.asarray(M, dtype=float)
+    mask = np.ones_like(M)
+    for market in markets:
+        mask = mask * leg_mask(market, M.shape[-1])
+    return float((M * mask).sum())
+
+def price_parlay(legs):
+    """
+    legs: {match: (M, [(market, odds), ...])} — same-match legs priced jointly,
+    matches multiplied. Returns (prob, odds, ev).
+    """
+    prob, odds = 1.0, 1.0
+    for M, match_legs in legs.values():
+        prob *= joint_prob(M, [m for m, _ in match_legs])
+        odds *= math.prod(o for _, o in match_legs)
+    return prob, odds, prob * odds - 1
+
+def kelly_growth(prob, odds):
+    """(full-Kelly stake fraction, expected log growth per bet) — (0, 0) without an edge"""
+    if prob * odds <= 1:
+        return 0.0, 0.0
+    f = (prob * odds - 1) / (odds - 1)
+    return f, prob * math.log(1 + f * (odds - 1)) + (1 - prob) * math.log(1 - f)
+
+# ============================================================
+
+# SEARCH
+
+# ============================================================
+
+@dataclass(slots=True)
+class Parlay:
+    legs: tuple        # ((match, market, odds), ...)
+    prob: float
+    odds: float
+    ev: float
+    kelly: float       # Full-Kelly stake fraction
+    growth: float      # Expected log growth at full Kelly
+
+def match_blocks(M, legs, max_legs):
+    """
+    Every 1..max_legs combination of one match's legs with nonzero joint probability,
+    as (leg indices, prob, odds). One batched mask product per combination size.
+    """
+    M = np.asarray(M, dtype=float)
+    n = M.shape[-1]
+    masks = np.stack([leg_mask(m, n).ravel() for m, _ in legs]) if legs else np.zeros((0, n * n))
+    odds = np.array([o for _, o in legs], dtype=float)
+    flat = M.ravel()
+    blocks = []
+    for size in range(1, min(max_legs, len(legs)) + 1):
+        idx = np.array(list(combinations(range(len(legs)), size)))
+        probs = masks[idx].prod(axis=1) @ flat
+        block_odds = odds[idx].prod(axis=1)
+        for k in np.flatnonzero(probs > 1e-12):
+            blocks.append((tuple(idx[k]), float(probs[k]), float(block_odds[k])))
+    return blocks
+
+def _suffix_table(best, combine):
+    """T[j, r] = best combination of per-match values best[j, s] over matches j.. using <= r legs"""
+    J, K = best.shape[0], best.shape[1] - 1
+    empty = 1.0 if combine is np.multiply else 0.0
+    T = np.full((J + 1, K + 1), empty)
+    for j in range(J - 1, -1, -1):
+        for r in range(K + 1):
+            T[j, r] = max([T[j + 1, r]] + [combine(best[j, s], T[j + 1, r - s]) for s in range(1, r + 1)])
+    return T
+
+def best_parlays(slate, min_legs=2, max_legs=4, objective="ev", top=1):
+    """
+    Best parlays on a slate by EV or Kelly growth, via branch-and-bound.
+    slate: [(match, M, [(market, odds), ...]), ...] — match is any label, e.g. (home, away).
+    Returns up to `top` Parlay records, best first (only positive-EV parlays).
+    """
+    if objective not in ("ev", "kelly"):
+        raise ValueError("objective must be 'ev' or 'kelly'")
+    kelly = objective == "kelly"
+
+    # Per block: P*odds, and max(p * log(P*odds), 0) — the block's most it can add to P * log(P*odds)
+    matches = []
+    for match, M, legs in slate:
+        blocks = [(idx, p, o, p * o, max(p * math.log(p * o), 0.0)) for idx, p, o in match_blocks(M, legs, max_legs)]
+        # Sorted by the key the bound is monotone in, so the scan can stop at the first hopeless block
+        blocks.sort(key=lambda b: -(b[4] if kelly else b[3]))
+        matches.append((match, legs, blocks))
+    # Strongest matches first: good incumbents early, and the suffix bounds shrink fastest
+    matches.sort(key=lambda m: -(m[2][0][4 if kelly else 3] if m[2] else 0.0))
+
+    J, K = len(matches), max_legs
+    best_po, best_h = np.zeros((J, K + 1)), np.zeros((J, K + 1))
+    for j, (_, _, blocks) in enumerate(matches):
+        for idx, _, _, po, h in blocks:
+            best_po[j, len(idx)] = max(best_po[j, len(idx)], po)
+            best_h[j, len(idx)] = max(best_h[j, len(idx)], h)
+    U = _suffix_table(best_po, np.multiply)  # Max product of P*odds
+    H = _suffix_table(best_h, np.add)        # Max sum of p * log(P*odds)
+
+    def bound(prob, odds, extra_po, extra_h, j, r):
+        """
+        Best score any extension can reach. EV: P*odds <= prob*odds * U.
+        Kelly: growth <= P log(P*odds) <= prob * (max(log(prob*odds), 0) + H),
+        and growth rises with P and P*odds, so it is also <= growth(prob, cap).
+        """
+        cap = prob * odds * extra_po * U[j, r]
+        if not kelly:
+            return cap - 1
+        if cap <= 1:
+            return 0.0
+        g_cap = math.log(cap) if prob >= 1 else kelly_growth(prob, cap / prob)[1]
+        return min(g_cap, prob * (max(math.log(prob * odds), 0.0) + extra_h + H[j, r]))
+
+    def score(p, o):
+        return kelly_growth(p, o)[1] if kelly else p * o - 1
+
+    results = []  # min-heap of (score, tiebreak, Parlay)
+    counter = 0
+
+    def threshold():
+        return results[0][0] if len(results) >= top else 0.0
+
+    def dfs(j, size, prob, odds, chosen):
+        nonlocal counter
+        if size >= min_legs and prob * odds > 1:
+            s = score(prob, odds)
+            if s > threshold():
+                f, g = kelly_growth(prob, odds)
+                legs = tuple((matches[m][0], matches[m][1][i][0], matches[m][1][i][1]) for m, idx in chosen for i in idx)
+                counter += 1
+                heapq.heappush(results, (s, counter, Parlay(legs, prob, odds, prob * odds - 1, f, g)))
+                if len(results) > top:
+                    heapq.heappop(results)
+        if size == K:
+            return
+        for j2 in range(j, J):
+            if bound(prob, odds, 1.0, 0.0, j2, K - size) <= threshold():
+                return  # Nothing from here on can beat the incumbents
+            for idx, p, o, po, h in matches[j2][2]:
+                r = K - size - 1
+                # Sort key alone (other term at its loosest) — once this fails, every later block fails too
+                key_bound = (prob * (max(math.log(prob * odds), 0.0) + h + H[j2 + 1, r]) if kelly
+                             else prob * odds * po * U[j2 + 1, r] - 1)
+                if key_bound <= threshold():
+                    break
+                if size + len(idx) > K or bound(prob, odds, po, h, j2 + 1, r) <= threshold():
+                    continue
+                dfs(j2 + 1, size + len(idx), prob * p, odds * o, chosen + [(j2, idx)])
+
+    dfs(0, 0, 1.0, 1.0, [])
+    return [r[2] for r in sorted(results, key=lambda r: -r[0])]
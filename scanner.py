@@ -0,0 +1,279 @@
+"""
+⚽ BETTING MODEL — MULTI-BOOKMAKER SLATE SCANNER
+
+Scans Football-Data's upcoming-fixtures price sheet (fixtures.csv) for value
+across every bookmaker, instead of one hand-typed odds_map per match.
+
+HOW IT WORKS:
+
+1. The sheet is loaded into columnar arrays: prices[fixture, market, bookmaker]
+   (NaN where a book has no price). Bookmakers are discovered from the column
+   names — any prefix with a full H/D/A or >2.5/<2.5 set
+1. Best-price index: the highest price and its bookmaker per fixture and market
+   (market aggregates — Max, Avg — are reported, never treated as a bookmaker)
+1. The batched model (build_M_batch + score_dists, calibrated) prices every
+   fixture once; EV for every fixture x market x bookmaker is one broadcast
+1. MIN_ODDS filter, EV > 0 and half-Kelly at the best price give the ranked value list
+
+Team names go through team_names.py; fixtures whose teams aren't in the xG
+file are skipped and listed.
+Probabilities, EV and stakes are percentages, as in analyse_v4.
+
+HOW TO RUN:
+python scanner.py                      # This weekend, every league in the pipeline
+python scanner.py --league EPL --top 20
+python scanner.py --csv fixtures.csv   # A saved price sheet
+python scanner.py --every-book         # One row per value price, not just the best
+"""
+
+import argparse
+import re
+import time
+from dataclasses import dataclass
+from io import StringIO
+
+import numpy as np
+import pandas as pd
+
+import betting_model_v4_pro as bm
+import data_pipeline as dp
+import team_names
+
+# ============================================================
+
+# CONFIG
+
+# ============================================================
+
+FIXTURES_URL = "https://www.football-data.co.uk/fixtures.csv"
+
+# market: (column suffix, calibration key)
+MARKETS = {
+    "Home Win": ("H", "home_win"),
+    "Draw": ("D", "draw"),
+    "Away Win": ("A", "away_win"),
+    "Over 2.5 Goals": (">2.5", "over_2.5"),
+    "Under 2.5 Goals": ("<2.5", "under_2.5"),
+}
+# Column prefixes that summarise the market rather than quote a price you can take
+AGGREGATES = ("Max", "Avg", "BbMx", "BbAv")
+# Bookmakers whose Over/Under columns use a different prefix (Pinnacle: PSH but P>2.5)
+OU_ALIASES = {"PS": "P", "PSC": "PC"}
+
+# Football-Data division code -> pipeline league key (E0.csv -> "E0": "EPL")
+DIVISIONS = {cfg["fd_url"].rsplit("/", 1)[-1].removesuffix(".csv"): key for key, cfg in dp.LEAGUES.items()}
+
+_SETS = ((("H", "D", "A"), re.compile(r"^(.+)H$")), ((">2.5", "<2.5"), re.compile(r"^(.+)>2\.5$")))
+_NON_BOOK = {"FT", "HT", ""}  # FTHG/HTHG-style result columns, never prices
+
+# ============================================================
+
+# PRICE SHEET
+
+# ============================================================
+
+@dataclass(slots=True)
+class PriceSheet:
+    div: np.ndarray       # (F,) division codes
+    date: np.ndarray      # (F,) match dates as strings
+    home: np.ndarray      # (F,) team names as in the CSV
+    away: np.ndarray
+    markets: list         # K market names (MARKETS order)
+    books: list           # B bookmaker column prefixes
+    prices: np.ndarray    # (F, K, B) decimal odds, NaN where missing
+    aggregates: dict      # {"Max"/"Avg"/...: (F, K) prices}
+
+    def best(self):
+        """Best-price index: ((F, K) best odds, (F, K) bookmaker index, -1 where no book prices it)"""
+        filled = np.where(np.isnan(self.prices), -np.inf, self.prices)
+        idx = filled.argmax(axis=2)
+        odds = np.take_along_axis(filled, idx[..., None], axis=2)[..., 0]
+        missing = ~np.isfinite(odds)
+        return np.where(missing, np.nan, odds), np.where(missing, -1, idx)
+
+    def subset(self, keep):
+        """The sheet restricted to fixtures where boolean mask `keep` is True"""
+        return PriceSheet(self.div[keep], self.date[keep], self.home[keep], self.away[keep], self.markets,
+                          self.books, self.prices[keep], {a: v[keep] for a, v in self.aggregates.items()})
+
+    def best_prices(self, n):
+        """{market: (odds, bookmaker)} for fixture n — the per-fixture view of the index"""
+        odds, idx = self.best()
+        return {m: (float(odds[n, k]), self.books[idx[n, k]]) for k, m in enumerate(self.markets) if idx[n, k] >= 0}
+
+def bookmakers(columns):
+    """Column prefixes carrying a complete price set for at least one market group, in sheet order"""
+    columns = list(columns)
+    present = set(columns)
+    canonical = {alias: book for book, alias in OU_ALIASES.items()}
+    books = []
+    for suffixes, pattern in _SETS:
+        for col in columns:
+            m = pattern.match(col)
+            if not m or m.group(1) in _NON_BOOK:
+                continue
+            book = canonical.get(m.group(1), m.group(1)) if suffixes[0] == ">2.5" else m.group(1)
+            if book not in books and all(m.group(1) + s in present for s in suffixes):
+                books.append(book)
+    # Closing-price columns (PSCH, B365CH, AvgC>2.5) mirror an opening prefix — not a price you can take now
+    return [b for b in books if not (b.endswith("C") and b[:-1] in books)]
+
+def _prices(df, book):
+    """(F, K) prices for one column prefix, NaN for markets it doesn't quote"""
+    out = np.full((len(df), len(MARKETS)), np.nan)
+    for k, (suffix, _) in enumerate(MARKETS.values()):
+        for prefix in (book, OU_ALIASES.get(book)):
+            if prefix and prefix + suffix in df.columns:
+                out[:, k] = pd.to_numeric(df[prefix + suffix], errors="coerce").to_numpy(float)
+                break
+    return out
+
+def load_sheet(df):
+    """PriceSheet from a Football-Data fixtures/results DataFrame"""
+    df = df.rename(columns=lambda c: c.strip().lstrip("\ufeff"))
+    df = df.dropna(subset=["HomeTeam", "AwayTeam"]).reset_index(drop=True)
+    prefixes = bookmakers(df.columns)
+    books = [b for b in prefixes if b not in AGGREGATES]
+    prices = np.stack([_prices(df, b) for b in books], axis=2) if books else np.full((len(df), len(MARKETS), 0), np.nan)
+    prices[prices <= 1.0] = np.nan  # Blank or placeholder quotes
+    return PriceSheet(
+        div=df["Div"].astype(str).to_numpy() if "Div" in df.columns else np.full(len(df), ""),
+        date=df["Date"].astype(str).to_numpy() if "Date" in df.columns else np.full(len(df), ""),
+        home=df["HomeTeam"].astype(str).str.strip().to_numpy(),
+        away=df["AwayTeam"].astype(str).str.strip().to_numpy(),
+        markets=list(MARKETS), books=books, prices=prices,
+        aggregates={a: _prices(df, a) for a in prefixes if a in AGGREGATES},
+    )
+
+def download_fixtures(url=FIXTURES_URL):
+    """The upcoming-fixtures sheet through the pipeline's cached, rate-limited fetch (None on failure)"""
+    resp = dp.fetch(url)
+    if resp.status_code != 200:
+        return None
+    return pd.read_csv(StringIO(resp.text), on_bad_lines="skip")
+
+# ============================================================
+
+# SCAN
+
+# ============================================================
+
+@dataclass(slots=True)
+class ScanBet:
+    date: str
+    league: str
+    home: str
+    away: str
+    market: str
+    bookmaker: str
+    odds: float
+    avg_odds: float     # Market average (NaN if the sheet has none)
+    books: int          # Bookmakers pricing this market
+    prob: float
+    ev: float
+    half_kelly: float
+    tier: str
+
+def _model_team(name, league, XG):
+    """Model (xG file) key for a Football-Data team name, or None"""
+    if name in XG:
+        return name
+    team_id = team_names.resolver().to_id(name, league, "fd") if league else team_names.resolver().find(name)
+    return team_id if team_id in XG else None
+
+def model_probs(homes, aways, XG, cal):
+    """(F, K) calibrated model probabilities (%) in MARKETS order, one batched pass"""
+    hxg, axg = np.array([bm.calc_xg(h, a, XG) for h, a in zip(homes, aways)]).reshape(-1, 2).T
+    rho = np.array([bm.match_rho(h, XG) for h in homes])
+    dists = bm.score_dists(bm.build_M_batch(hxg, axg, rho=rho))
+    hw, d, aw = bm.wdl_dists(dists)
+    over, _, under = bm.over_under(dists, 2.5)
+    raw = {"home_win": hw, "draw": d, "away_win": aw, "over_2.5": over, "under_2.5": under}
+    return np.column_stack([bm._calibrate_batch(raw[key] * 100, key, cal) for _, key in MARKETS.values()])
+
+def scan(sheet, XG=None, cal=None, every_book=False):
+    """
+    Ranked value bets on a PriceSheet: (list of ScanBet by EV, best first; skipped fixtures as (home, away)).
+    every_book=True lists every value price rather than only the best one per fixture and market.
+    """
+    if XG is None: XG = bm.load_xg()
+    if cal is None: cal = bm.load_calibration()
+    leagues = [DIVISIONS.get(d) for d in sheet.div]
+    names = [(_model_team(h, lg, XG), _model_team(a, lg, XG)) for h, a, lg in zip(sheet.home, sheet.away, leagues)]
+    known = np.array([h is not None and a is not None for h, a in names], dtype=bool)
+    skipped = [(h, a) for h, a, k in zip(sheet.home, sheet.away, known) if not k]
+    rows = np.flatnonzero(known)
+    if not len(rows) or not sheet.books:
+        return [], skipped
+
+    prob = model_probs([names[n][0] for n in rows], [names[n][1] for n in rows], XG, cal)  # (F, K)
+    prices = sheet.prices[rows]                                                          # (F, K, B)
+    p = prob[..., None] / 100
+    ev = p * prices - 1                                                                  # NaN where unpriced
+    value = (prices >= bm.MIN_ODDS) & (ev > 0)
+    if not every_book:
+        best_odds, best_idx = sheet.best()
+        best_odds, best_idx = best_odds[rows], best_idx[rows]
+        value = value & (np.arange(len(sheet.books)) == best_idx[..., None])
+    b = prices - 1
+    half_kelly = np.maximum((b * p - (1 - p)) / b, 0) * 0.5 * 100
+    n_books = (~np.isnan(prices)).sum(axis=2)
+    avg = sheet.aggregates.get("Avg", sheet.aggregates.get("BbAv"))
+    avg = avg[rows] if avg is not None else np.full(prob.shape, np.nan)
+
+    bets = []
+    for f, k, j in zip(*np.nonzero(value)):
+        n = rows[f]
+        pr = float(prob[f, k])
+        bets.append(ScanBet(sheet.date[n], DIVISIONS.get(sheet.div[n], sheet.div[n]), names[n][0], names[n][1],
+                            sheet.markets[k], sheet.books[j], float(prices[f, k, j]), float(avg[f, k]),
+                            int(n_books[f, k]), pr, round(float(ev[f, k, j]) * 100, 2),
+                            round(float(half_kelly[f, k, j]), 1), bm.confidence_tier(pr)))
+    bets.sort(key=lambda vb: vb.ev, reverse=True)
+    return bets, skipped
+
+def render_scan(bets, skipped, top=None):
+    print(f"\n  {'Date':<10} {'Match':<32} {'Market':<16} {'Book':<6} {'Odds':>6} {'Avg':>6} "
+          f"{'Prob':>6} {'EV%':>7} {'½K':>6}  Tier")
+    for vb in bets[:top]:
+        avg = f"{vb.avg_odds:.2f}" if vb.avg_odds == vb.avg_odds else "—"
+        print(f"  {vb.date:<10} {vb.home+' v '+vb.away:<32} {vb.market:<16} {vb.bookmaker:<6} {vb.odds:>6.2f} {avg:>6} "
+              f"{vb.prob:>5}% {vb.ev:>+6.1f}% {vb.half_kelly:>5}%  {vb.tier}")
+    if not bets:
+        print("  No positive EV prices found")
+    if skipped:
+        print(f"\n  ⚠️  {len(skipped)} fixtures skipped (teams not in the xG file): "
+              + ", ".join(f"{h} v {a}" for h, a in skipped[:8]) + (" ..." if len(skipped) > 8 else ""))
+
+# ============================================================
+
+# CLI
+
+# ============================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scan every bookmaker's prices for value")
+    parser.add_argument("--league", help="Only this pipeline league (e.g. EPL)")
+    parser.add_argument("--csv", help="Price sheet to scan instead of downloading fixtures.csv")
+    parser.add_argument("--top", type=int, default=40, help="Value bets to print")
+    parser.add_argument("--every-book", action="store_true", help="List every value price, not just the best")
+    parser.add_argument("--offline", action="store_true", help="Use the cached fixtures sheet only")
+    args = parser.parse_args()
+
+    dp.OFFLINE = args.offline
+    df = pd.read_csv(args.csv, on_bad_lines="skip") if args.csv else download_fixtures()
+    if df is None:
+        raise SystemExit("  ❌ Could not load the fixtures sheet")
+
+    t0 = time.perf_counter()
+    sheet = load_sheet(df)
+    if args.league:
+        sheet = sheet.subset(np.array([DIVISIONS.get(d) == args.league for d in sheet.div], dtype=bool))
+    bets, skipped = scan(sheet, every_book=args.every_book)
+    elapsed = time.perf_counter() - t0
+
+    print("=" * 70)
+    print(f"  🔎 SLATE SCANNER — {len(sheet.home)} fixtures x {len(sheet.markets)} markets x {len(sheet.books)} bookmakers")
+    print(f"  {len(bets)} value prices  |  scanned in {elapsed*1000:.0f}ms")
+    print("=" * 70)
+    render_scan(bets, skipped, args.top)
@@ -0,0 +1,240 @@
+"""
+⚽ BETTING MODEL — LEAGUE-SHARDED RATINGS SNAPSHOTS
+
+Binary, per-league copies of the ratings and corners files for the model to
+read. Each league is stored as one structured .npy array per kind (xg, corners),
+one row per team ID, plus a small JSON manifest listing every shard's file and
+team order with per-league freshness.
+
+LAYOUT (snapshots/):
+manifest.json                 {"format", "generation", "written", "leagues": {league: {...}}}
+EPL.xg.<hash>.npy             xG_h xG_a xGA_h xGA_a rho games_h games_a
+                              dc_att dc_def dc_mu dc_home   (NaN = not set)
+EPL.corners.<hash>.npy        c_h c_a ca_h ca_a
+
+Shard names carry a hash of their contents, so a rewrite never touches a file
+a reader may have mapped: new shards go in beside the old ones, then the
+manifest is renamed over in one step. Unreferenced shards are pruned once
+they are SHARD_GRACE_SECONDS old.
+
+Readers memory-map a league's shard the first time one of its teams is
+looked up, so analysing one LaLiga game maps LaLiga alone.
+
+HOW TO USE:
+ratings = snapshots.open_ratings("snapshots", "xg")   # Mapping {team ID: {"xG_h", ...}}
+ratings["barcelona"]["xG_h"]
+"""
+
+import json
+import os
+import time
+from collections.abc import Mapping
+from datetime import datetime
+
+import instrument  # numpy is imported by the functions that touch shards: read_manifest stays light for --check
+
+# ============================================================
+
+# CONFIG
+
+# ============================================================
+
+FORMAT = 2  # 2: Dixon-Coles fit fields in the xg shards
+MANIFEST = "manifest.json"
+SHARD_GRACE_SECONDS = 24 * 3600  # Keep replaced shards this long for readers still on an older manifest
+
+FIELDS = {
+    "xg": ("xG_h", "xG_a", "xGA_h", "xGA_a", "rho", "games_h", "games_a", "dc_att", "dc_def", "dc_mu", "dc_home"),
+    "corners": ("c_h", "c_a", "ca_h", "ca_a"),
+}
+INT_FIELDS = {"games_h", "games_a"}
+
+def dtype(kind):
+    import numpy as np
+    return np.dtype([(f, "<f8") for f in FIELDS[kind]])
+
+# ============================================================
+
+# WRITER
+
+# ============================================================
+
+def _write_atomic(path, data):
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush(); os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+def read_manifest(directory):
+    """The directory's manifest dict, or None if no snapshot has been written (or only an older format's,
+    which the next write_snapshot replaces)"""
+    path = os.path.join(directory, MANIFEST)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        manifest = json.load(f)
+    if manifest.get("format", 0) < FORMAT:
+        return None
+    if manifest.get("format") != FORMAT:
+        raise ValueError(f"{path}: snapshot format {manifest.get('format')}, expected {FORMAT}")
+    return manifest
+
+def write_shard(directory, league, kind, entries):
+    """Save one league's {team: entry} as a structured .npy; returns its manifest entry {"file", "teams"}"""
+    import hashlib, io
+    import numpy as np
+    teams = sorted(entries)
+    arr = np.empty(len(teams), dtype=dtype(kind))
+    for field in FIELDS[kind]:
+        arr[field] = [v if isinstance(v := entries[t].get(field), (int, float)) else np.nan for t in teams]
+    buf = io.BytesIO()
+    np.save(buf, arr)
+    data = buf.getvalue()
+    digest = hashlib.sha1(data + "\n".join(teams).encode()).hexdigest()[:12]
+    name = f"{league}.{kind}.{digest}.npy"
+    if not os.path.exists(os.path.join(directory, name)):  # Same contents as a live shard: nothing to write
+        _write_atomic(os.path.join(directory, name), data)
+    return {"file": name, "teams": teams}
+
+def write_snapshot(directory, xg, corners, meta):
+    """
+    Rewrite the shards of the leagues in meta ({league: freshness fields}) from the
+    merged xg/corners dicts (entries carry "league"), then swap in the new manifest.
+    Other leagues keep their current shards and freshness; one with teams in the
+    dicts but no shard of that kind yet gets one. Returns the manifest.
+    """
+    os.makedirs(directory, exist_ok=True)
+    manifest = read_manifest(directory) or {"format": FORMAT, "generation": 0, "leagues": {}}
+    leagues = dict(meta)
+    for data in (xg, corners):
+        for v in data.values():
+            league = v.get("league")
+            if league and league not in leagues:
+                leagues[league] = {}
+    for league, fresh in leagues.items():
+        entry = {**manifest["leagues"].get(league, {}), **fresh}
+        for kind, data in (("xg", xg), ("corners", corners)):
+            if league not in meta and kind in entry:
+                continue
+            rows = {team: v for team, v in data.items() if v.get("league") == league}
+            if rows:
+                entry[kind] = write_shard(directory, league, kind, rows)
+        manifest["leagues"][league] = entry
+    manifest["generation"] += 1
+    manifest["written"] = datetime.now().strftime("%Y-%m-%d %H:%M")
+    _write_atomic(os.path.join(directory, MANIFEST), json.dumps(manifest, indent=1).encode())
+    prune(directory, manifest)
+    return manifest
+
+def prune(directory, manifest):
+    """Delete shards the manifest no longer references once they are past the grace period"""
+    live = {e[kind]["file"] for e in manifest["leagues"].values() for kind in FIELDS if kind in e}
+    cutoff = time.time() - SHARD_GRACE_SECONDS
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if name.endswith(".npy") and name not in live and os.path.getmtime(path) < cutoff:
+            os.remove(path)
+
+# ============================================================
+
+# READER
+
+# ============================================================
+
+class Ratings(Mapping):
+    """
+    Read-only {team ID: entry dict} over one kind of shard. Membership and
+    iteration use the manifest alone; a league's shard is memory-mapped on
+    first lookup and each team's entry is built once (shared — don't mutate).
+    Teams no shard holds come from fallback() ({team: entry}, e.g. the JSON
+    ratings file), called on the first miss or full iteration.
+    """
+
+    def __init__(self, directory, kind, manifest, fallback=None):
+        self.directory, self.kind, self.manifest = directory, kind, manifest
+        self.fallback, self._extra = fallback, None
+        self.where = {}  # team -> (league, row)
+        for league, entry in manifest["leagues"].items():
+            for row, team in enumerate(entry.get(kind, {}).get("teams", [])):
+                self.where[team] = (league, row)
+        self.shards = {}   # league -> memory-mapped structured array
+        self.entries = {}  # team -> entry dict
+
+    def shard(self, league):
+        arr = self.shards.get(league)
+        if arr is None:
+            import numpy as np
+            info = self.manifest["leagues"][league][self.kind]
+            with instrument.span("load", file=f"{self.kind}-shard", league=league):
+                arr = np.load(os.path.join(self.directory, info["file"]), mmap_mode="r")
+            if arr.dtype != dtype(self.kind) or len(arr) != len(info["teams"]):
+                raise ValueError(f"{info['file']}: does not match the manifest")
+            self.shards[league] = arr
+        return arr
+
+    def extra(self):
+        """Fallback entries for teams without a shard (loaded once)"""
+        if self._extra is None:
+            data = (self.fallback() if self.fallback else None) or {}
+            self._extra = {team: v for team, v in data.items() if team not in self.where}
+        return self._extra
+
+    def __getitem__(self, team):
+        entry = self.entries.get(team)
+        if entry is None:
+            if team not in self.where:
+                return self.extra()[team]
+            league, row = self.where[team]
+            rec = self.shard(league)[row]
+            entry = {}
+            for field in FIELDS[self.kind]:
+                v = float(rec[field])
+                if v == v:
+                    entry[field] = int(v) if field in INT_FIELDS else v
+            entry["league"] = league
+            updated = self.manifest["leagues"][league].get(f"{self.kind}_updated")
+            if updated:
+                entry["last_updated"] = updated[:10]
+            self.entries[team] = entry
+        return entry
+
+    def __contains__(self, team):
+        return team in self.where or team in self.extra()
+
+    def __iter__(self):
+        yield from self.where
+        yield from self.extra()
+
+    def __len__(self):
+        return len(self.where) + len(self.extra())
+
+    def leagues_loaded(self):
+        return sorted(self.shards)
+
+_OPEN = {}  # (directory, kind) -> (manifest mtime_ns, size, Ratings)
+
+def open_ratings(directory, kind="xg", newer_than=None, fallback=None):
+    """
+    Ratings for the directory's current manifest (reused until the manifest changes),
+    or None when there is no snapshot, it has no shards of this kind, or the file
+    newer_than was modified after it (e.g. a JSON ratings file edited since).
+    fallback supplies teams the shards lack (see Ratings).
+    """
+    try:
+        st = os.stat(os.path.join(directory, MANIFEST))
+    except FileNotFoundError:
+        return None
+    if newer_than and os.path.exists(newer_than) and os.stat(newer_than).st_mtime_ns > st.st_mtime_ns:
+        return None
+    hit = _OPEN.get((directory, kind))
+    if hit and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+        return hit[2]
+    manifest = read_manifest(directory)
+    if manifest is None:
+        return None
+    ratings = Ratings(directory, kind, manifest, fallback)
+    if not ratings.where:
+        return None
+    _OPEN[(directory, kind)] = (st.st_mtime_ns, st.st_size, ratings)
+    return ratings
@@ -0,0 +1,300 @@
+"""
+⚽ BETTING MODEL — HYPER-PARAMETER SWEEP
+
+Grid or random search over the model's hand-picked constants on historical
+Football-Data matches, evaluated in a process pool.
+
+TUNED: HOME_ADV, FORM_ALPHA, DC_RHO (dc_tau rho), MIN_ODDS and CORR_PENALTY.
+
+HOW A CONFIGURATION IS SCORED (walk-forward, no lookahead):
+
+1. Ratings replay the model's own result update (_form_update): a FORM_ALPHA
+   exponential average of goals for and against per team and venue
+1. Each match is predicted from pre-match ratings with calc_xg's formula (HOME_ADV)
+   and build_M_batch (DC_RHO)
+1. Log-loss over 1X2, Over 2.5 and same-match doubles priced with CORR_PENALTY
+1. Flat-stake ROI on every +EV price at or above MIN_ODDS
+
+Match arrays live in one shared-memory block that every worker maps. Results
+are appended to sweep_results.jsonl as they finish, so an interrupted sweep
+resumes where it stopped. The winner is the lowest log-loss configuration,
+with MIN_ODDS (which only affects betting) chosen by ROI among its runs; it
+is written to model_config.json, which the model loads at startup.
+
+LIMITS: the replay rates teams from Football-Data goals alone. It does not
+rebuild the FBref xG ratings the pipeline writes or the Dixon-Coles fits, so
+the tuned HOME_ADV and FORM_ALPHA are best for goal-based ratings and may not
+transfer exactly to the live ones. The pipeline's own constants (FORM_GAMES,
+FORM_WEIGHT) are not tuned.
+
+HOW TO RUN:
+python sweep.py                        # Grid over every league (last 3 seasons)
+python sweep.py --random 200 --seed 1  # Random search
+python sweep.py --offline --league EPL
+"""
+
+import json
+import os
+import argparse
+import itertools
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from functools import lru_cache
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+import betting_model_v4_pro as bm
+import data_pipeline as dp
+import backtest as bt
+
+# ============================================================
+
+# CONFIG
+
+# ============================================================
+
+RESULTS_FILE = os.path.join(dp.DATA_DIR, "sweep_results.jsonl")
+CONFIG_FILE = bm.MODEL_CONFIG_FILE
+
+GRID = {
+    "HOME_ADV": (0.05, 0.10, 0.15, 0.20, 0.25),
+    "FORM_ALPHA": (0.1, 0.2, 0.3, 0.4),
+    "DC_RHO": (-0.2, -0.13, -0.05, 0.0),
+    "MIN_ODDS": (1.5, 1.7, 1.9, 2.2),
+    "CORR_PENALTY": (0.0, 0.06, 0.12, 0.2),
+}
+# Random search draws uniformly from these ranges
+RANGES = {
+    "HOME_ADV": (0.0, 0.35),
+    "FORM_ALPHA": (0.05, 0.6),
+    "DC_RHO": (-0.25, 0.05),
+    "MIN_ODDS": (1.3, 2.6),
+    "CORR_PENALTY": (0.0, 0.3),
+}
+BETTING_ONLY = ("MIN_ODDS",)  # Doesn't change probabilities, so it's picked by ROI, not log-loss
+
+PRIOR = (1.45, 1.15)   # Home / away goals per game for a team with no history yet
+MIN_TEAM_GAMES = 5     # Matches before a team's fixtures are scored
+# Same-match doubles scored with CORR_PENALTY: (market a, market b)
+DOUBLES = (("home_win", "over_2_5"), ("away_win", "over_2_5"), ("btts", "over_2_5"))
+
+# Shared match array columns
+COLS = ("home", "away", "hg", "ag", "odds_h", "odds_d", "odds_a", "odds_o25")
+
+# ============================================================
+
+# SHARED MATCH ARRAYS
+
+# ============================================================
+
+def match_arrays(frames):
+    """(N, len(COLS)) float array of every match, chronological; team ids are unique per league"""
+    parts, teams = [], {}
+    for league_key, seasons in frames.items():
+        for _, df in seasons:
+            df = bt._prepare(df)
+            odds_cols = [bt._first_col(df, bt.ODDS_COLUMNS[m][0]) for m in bt.ODDS_COLUMNS]
+            part = pd.DataFrame({
+                "_date": df["_date"].to_numpy(),
+                "home": [teams.setdefault((league_key, t), len(teams)) for t in df["HomeTeam"]],
+                "away": [teams.setdefault((league_key, t), len(teams)) for t in df["AwayTeam"]],
+                "hg": df["_hg"].to_numpy(float),
+                "ag": df["_ag"].to_numpy(float),
+            })
+            for name, col in zip(COLS[4:], odds_cols):
+                part[name] = pd.to_numeric(df[col], errors="coerce").to_numpy(float) if col else np.nan
+            parts.append(part)
+    data = pd.concat(parts, ignore_index=True).sort_values("_date", kind="stable")
+    return np.ascontiguousarray(data[list(COLS)].to_numpy(float)), len(teams)
+
+_SHARED = {}  # Worker-side: {"shm", "data", "teams"}
+
+def _attach(name, shape, n_teams):
+    shm = shared_memory.SharedMemory(name=name)
+    _SHARED.update(shm=shm, data=np.ndarray(shape, dtype=float, buffer=shm.buf), teams=n_teams)
+
+# ============================================================
+
+# EVALUATION
+
+# ============================================================
+
+@lru_cache(maxsize=16)
+def _ratings(alpha):
+    """
+    Pre-match (home xG_h, home xGA_h, away xG_a, away xGA_a) for every match, and which
+    matches have enough history to score. Cached per worker: only FORM_ALPHA changes
+    the ratings.
+    """
+    data, T = _SHARED["data"], _SHARED["teams"]
+    home, away = data[:, 0].astype(int).tolist(), data[:, 1].astype(int).tolist()
+    hg, ag = data[:, 2].tolist(), data[:, 3].tolist()
+    # Per team: form [xG_h, xGA_h, xG_a, xGA_a], games at home / away
+    form = [[PRIOR[0], PRIOR[1], PRIOR[1], PRIOR[0]] for _ in range(T)]
+    games = [[0, 0] for _ in range(T)]
+    out = np.empty((len(home), 4))
+    ok = np.zeros(len(home), dtype=bool)
+
+    for n in range(len(home)):
+        h, a, x, y = home[n], away[n], hg[n], ag[n]
+        out[n] = form[h][0], form[h][1], form[a][2], form[a][3]
+        ok[n] = sum(games[h]) >= MIN_TEAM_GAMES and sum(games[a]) >= MIN_TEAM_GAMES
+        fh, fa = form[h], form[a]
+        fh[0], fh[1] = (1 - alpha) * fh[0] + alpha * x, (1 - alpha) * fh[1] + alpha * y
+        fa[2], fa[3] = (1 - alpha) * fa[2] + alpha * y, (1 - alpha) * fa[3] + alpha * x
+        games[h][0] += 1; games[a][1] += 1
+    return out, ok
+
+def evaluate(cfg):
+    """Log-loss and flat-stake ROI of one configuration over the shared matches"""
+    data = _SHARED["data"]
+    r, ok = _ratings(round(cfg["FORM_ALPHA"], 6))
+    r, data = r[ok], data[ok]
+    hg, ag = data[:, 2], data[:, 3]
+
+    hxg = np.maximum((r[:, 0] + r[:, 3]) / 2 * (1 + cfg["HOME_ADV"]), 0.05)  # calc_xg: home attack vs away defence
+    axg = np.maximum((r[:, 2] + r[:, 1]) / 2, 0.05)
+    d = bm.score_dists(bm.build_M_batch(hxg, axg, rho=cfg["DC_RHO"]))
+    hw, dr, aw = bm.wdl_dists(d)
+    p = {"home_win": hw, "draw": dr, "away_win": aw, "over_2_5": bm.over_under(d, 2.5)[0], "btts": bm.btts_dists(d)}
+    won = {"home_win": hg > ag, "draw": hg == ag, "away_win": hg < ag, "over_2_5": hg + ag > 2.5, "btts": (hg > 0) & (ag > 0)}
+
+    eps = 1e-12
+    ll_1x2 = -np.log(np.maximum(np.select([won["home_win"], won["draw"]], [hw, dr], aw), eps)).mean()
+    ll_ou = -np.mean(np.where(won["over_2_5"], np.log(np.maximum(p["over_2_5"], eps)), np.log(np.maximum(1 - p["over_2_5"], eps))))
+    ll_dbl = 0.0
+    for a, b in DOUBLES:
+        joint = np.clip(p[a] * p[b] * (1 - cfg["CORR_PENALTY"]), eps, 1 - eps)
+        hit = won[a] & won[b]
+        ll_dbl += -np.mean(np.where(hit, np.log(joint), np.log(1 - joint))) / len(DOUBLES)
+
+    staked = pnl = 0.0
+    for col, key in ((4, "home_win"), (5, "draw"), (6, "away_win"), (7, "over_2_5")):
+        odds = data[:, col]
+        bet = np.isfinite(odds) & (odds >= cfg["MIN_ODDS"]) & (p[key] * odds > 1)
+        staked += bet.sum()
+        pnl += np.where(won[key][bet], odds[bet] - 1, -1).sum()
+
+    return {
+        "log_loss": float(ll_1x2 + ll_ou + ll_dbl),
+        "log_loss_1x2": float(ll_1x2),
+        "log_loss_ou": float(ll_ou),
+        "log_loss_doubles": float(ll_dbl),
+        "roi": float(pnl / staked) if staked else 0.0,
+        "bets": int(staked),
+        "matches": int(ok.sum()),
+    }
+
+def _job(cfg):
+    return cfg, evaluate(cfg)
+
+# ============================================================
+
+# SWEEP DRIVER
+
+# ============================================================
+
+def config_key(cfg):
+    return json.dumps({k: round(cfg[k], 6) for k in sorted(cfg)})
+
+def grid_configs(grid=GRID):
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+def random_configs(n, seed=0, ranges=RANGES):
+    """Deterministic for a given seed, so a resumed random sweep sees the same list"""
+    rng = random.Random(seed)
+    return [{k: round(rng.uniform(lo, hi), 4) for k, (lo, hi) in ranges.items()} for _ in range(n)]
+
+def load_results(path=RESULTS_FILE):
+    """{config key: (config, metrics)} from earlier (possibly interrupted) runs"""
+    done = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Half-written last line from an interrupted run
+                done[config_key(rec["config"])] = (rec["config"], rec["metrics"])
+    return done
+
+def run_sweep(frames, configs, results_file=RESULTS_FILE, workers=None):
+    """Evaluate every config not already in results_file. Returns {key: (config, metrics)} for all of them."""
+    done = load_results(results_file)
+    todo = [c for c in configs if config_key(c) not in done]
+    if todo:
+        data, n_teams = match_arrays(frames)
+        shm = shared_memory.SharedMemory(create=True, size=data.nbytes)
+        try:
+            np.ndarray(data.shape, dtype=float, buffer=shm.buf)[:] = data
+            init = (shm.name, data.shape, n_teams)
+            with open(results_file, "a") as out, \
+                    ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_attach, initargs=init) as pool:
+                for fut in as_completed([pool.submit(_job, c) for c in todo]):
+                    cfg, metrics = fut.result()
+                    out.write(json.dumps({"config": cfg, "metrics": metrics}) + "\n")
+                    out.flush()
+                    done[config_key(cfg)] = (cfg, metrics)
+        finally:
+            shm.close()
+            shm.unlink()
+    wanted = {config_key(c) for c in configs}
+    return {k: v for k, v in done.items() if k in wanted}
+
+def pick_winner(results):
+    """Lowest log-loss configuration; its betting-only settings are then the best ROI among runs sharing its probability settings"""
+    best_cfg, best_m = min(results.values(), key=lambda r: r[1]["log_loss"])
+    prob_key = lambda c: tuple(round(c[k], 6) for k in sorted(c) if k not in BETTING_ONLY)
+    siblings = [r for r in results.values() if prob_key(r[0]) == prob_key(best_cfg)]
+    roi_cfg, roi_m = max(siblings, key=lambda r: r[1]["roi"])
+    winner = dict(best_cfg)
+    for k in BETTING_ONLY:
+        winner[k] = roi_cfg[k]
+    return winner, {**best_m, "roi": roi_m["roi"], "bets": roi_m["bets"]}
+
+def save_winner(cfg, metrics, path=CONFIG_FILE):
+    """Write the winner where the model loads it"""
+    out = dict(cfg)
+    out["_sweep"] = {**metrics, "saved": datetime.now().strftime("%Y-%m-%d %H:%M")}
+    bm.write_json_atomic(path, out, indent=2)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hyper-parameter sweep over the model constants")
+    parser.add_argument("--league", help="Single league (e.g. EPL)")
+    parser.add_argument("--seasons", type=int, default=bt.SEASONS, help="Seasons of history per league")
+    parser.add_argument("--random", type=int, metavar="N", help="Random search with N configs instead of the grid")
+    parser.add_argument("--seed", type=int, default=0, help="Random search seed")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: all cores)")
+    parser.add_argument("--offline", action="store_true", help="Use cached CSVs only")
+    parser.add_argument("--no-save", action="store_true", help="Don't write model_config.json")
+    args = parser.parse_args()
+
+    dp.OFFLINE = args.offline
+    leagues = [args.league] if args.league else list(dp.LEAGUES)
+    frames = {k: v for k in leagues if (v := bt.load_seasons(k, args.seasons))}
+    if not frames:
+        print("  ❌ No match data (run the pipeline first, or drop --offline)")
+        raise SystemExit(1)
+
+    configs = random_configs(args.random, args.seed) if args.random else grid_configs()
+    results = run_sweep(frames, configs, workers=args.workers)
+
+    ranked = sorted(results.values(), key=lambda r: r[1]["log_loss"])
+    print("=" * 70)
+    print(f"  🔬 SWEEP — {len(results)} configurations over {len(frames)} leagues")
+    print("=" * 70)
+    print(f"  {'HOME_ADV':>8} {'ALPHA':>6} {'RHO':>6} {'MINODD':>6} {'CORR':>5} {'LogLoss':>8} {'ROI':>7}")
+    for cfg, m in ranked[:10]:
+        print(f"  {cfg['HOME_ADV']:>8.3f} {cfg['FORM_ALPHA']:>6.2f} {cfg['DC_RHO']:>+6.2f} "
+              f"{cfg['MIN_ODDS']:>6.2f} {cfg['CORR_PENALTY']:>5.2f} {m['log_loss']:>8.4f} {m['roi']*100:>+6.1f}%")
+
+    winner, metrics = pick_winner(results)
+    print(f"\n  🏆 Winner: {', '.join(f'{k}={v}' for k, v in winner.items())}")
+    print(f"     Log-loss {metrics['log_loss']:.4f} | ROI {metrics['roi']*100:+.1f}% over {metrics['bets']} bets")
+    if not args.no_save:
+        save_winner(winner, metrics)
+        print(f"  ✅ Saved to {CONFIG_FILE} (loaded by the model at startup)")
@@ -0,0 +1,279 @@
+"""
+⚽ BETTING MODEL — TEAM NAME RESOLVER
+
+FBref ("Manchester Utd"), Football-Data ("Man United") and the model's own
+keys (DEFAULT_XG / CORNER_DATA: "Man United") rarely agree. Every source name
+resolves to one stable team ID per league — the model key where the model
+knows the club, otherwise the first name the club was seen under.
+
+INDEX:
+
+1. Per-league alias index: (league, normalised alias) -> team ID, O(1)
+1. Reverse index: (league, team ID) -> {source: name}, O(1)
+1. Names are normalised before lookup: case, accents, punctuation, spacing
+1. Unseen names fall back to a fuzzy match within the league (difflib, plus
+   word containment for "Leeds" / "Leeds United"); the result joins the index,
+   so each name is matched once, and learned aliases are saved to ALIASES_FILE
+1. A name with no match becomes a new team ID, also persisted, so IDs are stable
+
+HOW TO RUN (resolve names from the command line):
+python team_names.py EPL "Manchester Utd" "Nott'ham Forest" "Man United"
+"""
+
+import atexit
+import difflib
+import json
+import os
+import re
+import sys
+import threading
+import unicodedata
+
+# ============================================================
+
+# CONFIG
+
+# ============================================================
+
+ALIASES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "team_aliases.json")
+FUZZY_CUTOFF = 0.82  # difflib ratio needed for a fuzzy match
+
+# league: {team ID: (Football-Data name, FBref name, other aliases...)}
+SEED = {
+    "EPL": {
+        "Arsenal": ("Arsenal", "Arsenal"),
+        "Man United": ("Man United", "Manchester Utd", "Manchester United"),
+        "Liverpool": ("Liverpool", "Liverpool"),
+        "Man City": ("Man City", "Manchester City"),
+        "Chelsea": ("Chelsea", "Chelsea"),
+        "Newcastle": ("Newcastle", "Newcastle Utd", "Newcastle United"),
+        "Aston Villa": ("Aston Villa", "Aston Villa"),
+        "Tottenham": ("Tottenham", "Tottenham", "Tottenham Hotspur", "Spurs"),
+        "Brighton": ("Brighton", "Brighton", "Brighton and Hove Albion"),
+        "Brentford": ("Brentford", "Brentford"),
+        "Fulham": ("Fulham", "Fulham"),
+        "Bournemouth": ("Bournemouth", "Bournemouth"),
+        "Nottm Forest": ("Nott'm Forest", "Nott'ham Forest", "Nottingham Forest"),
+        "West Ham": ("West Ham", "West Ham", "West Ham United"),
+        "Crystal Palace": ("Crystal Palace", "Crystal Palace"),
+        "Everton": ("Everton", "Everton"),
+        "Sunderland": ("Sunderland", "Sunderland"),
+        "Leeds": ("Leeds", "Leeds United"),
+        "Burnley": ("Burnley", "Burnley"),
+        "Wolves": ("Wolves", "Wolves", "Wolverhampton Wanderers"),
+    },
+    "LaLiga": {
+        "Barcelona": ("Barcelona", "Barcelona"),
+        "Real Madrid": ("Real Madrid", "Real Madrid"),
+        "Atletico": ("Ath Madrid", "Atlético Madrid"),
+        "Villarreal": ("Villarreal", "Villarreal"),
+        "Betis": ("Betis", "Betis", "Real Betis"),
+        "Celta": ("Celta", "Celta Vigo"),
+        "Espanyol": ("Espanol", "Espanyol"),
+        "Real Sociedad": ("Sociedad", "Real Sociedad"),
+        "Osasuna": ("Osasuna", "Osasuna"),
+        "Athletic": ("Ath Bilbao", "Athletic Club", "Athletic Bilbao"),
+        "Getafe": ("Getafe", "Getafe"),
+        "Girona": ("Girona", "Girona"),
+        "Elche": ("Elche", "Elche"),
+        "Sevilla": ("Sevilla", "Sevilla"),
+        "Alaves": ("Alaves", "Alavés"),
+        "Mallorca": ("Mallorca", "Mallorca"),
+        "Valencia": ("Valencia", "Valencia"),
+        "Rayo": ("Vallecano", "Rayo Vallecano"),
+        "Levante": ("Levante", "Levante"),
+        "Oviedo": ("Oviedo", "Oviedo", "Real Oviedo"),
+    },
+    "Bundesliga": {
+        "Bayern": ("Bayern Munich", "Bayern Munich"),
+        "Leverkusen": ("Leverkusen", "Leverkusen", "Bayer Leverkusen"),
+        "Leipzig": ("RB Leipzig", "RB Leipzig"),
+        "Dortmund": ("Dortmund", "Dortmund", "Borussia Dortmund"),
+        "Frankfurt": ("Ein Frankfurt", "Eint Frankfurt", "Eintracht Frankfurt"),
+        "Stuttgart": ("Stuttgart", "Stuttgart"),
+        "Hamburg": ("Hamburg", "Hamburger SV"),
+        "Freiburg": ("Freiburg", "Freiburg"),
+        "Gladbach": ("M'gladbach", "Gladbach", "Borussia Monchengladbach"),
+        "Mainz": ("Mainz", "Mainz 05"),
+        "Wolfsburg": ("Wolfsburg", "Wolfsburg"),
+        "Augsburg": ("Augsburg", "Augsburg"),
+        "Hoffenheim": ("Hoffenheim", "Hoffenheim"),
+        "Union Berlin": ("Union Berlin", "Union Berlin"),
+        "Cologne": ("FC Koln", "Köln"),
+        "Heidenheim": ("Heidenheim", "Heidenheim"),
+        "Werder": ("Werder Bremen", "Werder Bremen"),
+        "St Pauli": ("St Pauli", "St. Pauli"),
+    },
+    "SerieA": {
+        "Inter": ("Inter", "Inter", "Inter Milan"),
+        "Napoli": ("Napoli", "Napoli"),
+        "Juventus": ("Juventus", "Juventus"),
+        "Atalanta": ("Atalanta", "Atalanta"),
+        "Fiorentina": ("Fiorentina", "Fiorentina"),
+        "Roma": ("Roma", "Roma"),
+        "Milan": ("Milan", "Milan", "AC Milan"),
+        "Lazio": ("Lazio", "Lazio"),
+        "Bologna": ("Bologna", "Bologna"),
+        "Torino": ("Torino", "Torino"),
+        "Como": ("Como", "Como"),
+        "Parma": ("Parma", "Parma"),
+        "Genoa": ("Genoa", "Genoa"),
+        "Udinese": ("Udinese", "Udinese"),
+        "Cagliari": ("Cagliari", "Cagliari"),
+        "Lecce": ("Lecce", "Lecce"),
+        "Sassuolo": ("Sassuolo", "Sassuolo"),
+        "Cremonese": ("Cremonese", "Cremonese"),
+        "Verona": ("Verona", "Hellas Verona"),
+        "Pisa": ("Pisa", "Pisa"),
+    },
+    "Ligue1": {
+        "PSG": ("Paris SG", "Paris S-G", "Paris Saint-Germain"),
+    },
+    "Portugal": {
+        "Sporting": ("Sp Lisbon", "Sporting CP"),
+    },
+    "Turkey": {
+        "Galatasaray": ("Galatasaray", "Galatasaray", "Galatasaray SK"),
+    },
+}
+
+# The model's DEFAULT_XG league labels -> pipeline league keys
+MODEL_LEAGUES = {"PL": "EPL", "BL": "Bundesliga", "LaLiga": "LaLiga", "SerieA": "SerieA"}
+
+_PUNCT = re.compile(r"[^\w\s]")
+_SPACE = re.compile(r"\s+")
+
+def normalise(name):
+    """Lookup form of a name: accents stripped, casefolded, punctuation dropped, single spaces"""
+    name = unicodedata.normalize("NFKD", str(name)).encode("ascii", "ignore").decode()
+    return _SPACE.sub(" ", _PUNCT.sub("", name.casefold())).strip()
+
+# ============================================================
+
+# RESOLVER
+
+# ============================================================
+
+class TeamResolver:
+    """
+    Bidirectional, league-scoped team-name index.
+    to_id(name, league, source) -> team ID; name_for(team_id, source, league) -> that source's name.
+    """
+
+    def __init__(self, seed=SEED, aliases_file=ALIASES_FILE):
+        self.aliases_file = aliases_file
+        self.lock = threading.Lock()
+        self.index = {}    # (league, normalised alias) -> team ID
+        self.names = {}    # (league, team ID) -> {source: name}
+        self.by_league = {}  # league -> {normalised alias: team ID}, the fuzzy-match candidates
+        self.learned = {}  # league -> {alias: [team ID, source]} — persisted
+        self.dirty = False
+        for league, teams in seed.items():
+            for team_id, names in teams.items():
+                fd, fbref, *extra = names
+                self._add(league, team_id, team_id, "model")
+                self._add(league, team_id, fd, "fd")
+                self._add(league, team_id, fbref, "fbref")
+                for alias in extra:
+                    self._add(league, team_id, alias)
+        for league, aliases in self._read_learned().items():
+            for alias, (team_id, source) in aliases.items():
+                self._add(league, team_id, alias, source)
+                self.learned.setdefault(league, {})[alias] = [team_id, source]
+
+    def _read_learned(self):
+        if not self.aliases_file or not os.path.exists(self.aliases_file):
+            return {}
+        try:
+            with open(self.aliases_file) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}  # Corrupt file: start over rather than refuse to run
+
+    def _add(self, league, team_id, alias, source=None):
+        key = normalise(alias)
+        self.index.setdefault((league, key), team_id)
+        self.by_league.setdefault(league, {}).setdefault(key, team_id)
+        names = self.names.setdefault((league, team_id), {})
+        if source and source not in names:
+            names[source] = alias
+
+    def _fuzzy(self, league, key):
+        """Best existing team ID for an unseen normalised name in `league`, or None"""
+        candidates = self.by_league.get(league, {})
+        close = difflib.get_close_matches(key, candidates, n=1, cutoff=FUZZY_CUTOFF)
+        if close:
+            return candidates[close[0]]
+        # "Leeds" vs "Leeds United": one name's words all appear in the other, and only one team fits
+        words = set(key.split())
+        hits = {team_id for alias, team_id in candidates.items()
+                if words and (words <= set(alias.split()) or set(alias.split()) <= words)}
+        return hits.pop() if len(hits) == 1 else None
+
+    def to_id(self, name, league, source=None):
+        """
+        Stable team ID for `name` in `league`. Unseen names are fuzzy-matched, then
+        registered as new teams; either way the alias is learned and persisted.
+        `source` ("fd", "fbref") records the name as that source's spelling.
+        """
+        key = normalise(name)
+        team_id = self.index.get((league, key))
+        if team_id is None:
+            with self.lock:  # The index doubles as the fuzzy-match cache: each unseen name is matched once
+                team_id = self.index.get((league, key)) or self._fuzzy(league, key) or str(name).strip()
+                self._add(league, team_id, name, source)
+                self.learned.setdefault(league, {})[str(name)] = [team_id, source]
+                self.dirty = True
+        elif source and source not in self.names.get((league, team_id), {}):
+            with self.lock:
+                self._add(league, team_id, name, source)
+        return team_id
+
+    def name_for(self, team_id, source, league=None):
+        """`source`'s spelling of a team ID (None if that source has never named it); league=None searches every league"""
+        if league is not None:
+            return self.names.get((league, team_id), {}).get(source)
+        for lg in self.by_league:
+            name = self.names.get((lg, team_id), {}).get(source)
+            if name is not None:
+                return name
+        return None
+
+    def find(self, name, league=None):
+        """Team ID for a known name without learning anything: within `league`, else any league (None if absent)"""
+        key = normalise(name)
+        if league is not None:
+            return self.index.get((league, key))
+        for lg in self.by_league:
+            team_id = self.index.get((lg, key))
+            if team_id is not None:
+                return team_id
+        return None
+
+    def save(self):
+        """Persist learned aliases if any are new (temp file + rename, never a truncated file)"""
+        if not self.aliases_file or not self.dirty:
+            return
+        self.dirty = False
+        tmp = f"{self.aliases_file}.tmp{os.getpid()}"
+        with open(tmp, "w") as f:
+            json.dump(self.learned, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.aliases_file)
+
+_RESOLVER = None
+
+def resolver():
+    """The shared TeamResolver, built on first use; learned aliases are saved at exit"""
+    global _RESOLVER
+    if _RESOLVER is None:
+        _RESOLVER = TeamResolver()
+        atexit.register(_RESOLVER.save)
+    return _RESOLVER
+
+if __name__ == "__main__":
+    league, names = sys.argv[1], sys.argv[2:]
+    teams = resolver()
+    for name in names:
+        team_id = teams.to_id(name, league)
+        print(f"  {name:<28} -> {team_id:<20} FD: {teams.name_for(team_id, 'fd', league)}  "
+              f"FBref: {teams.name_for(team_id, 'fbref', league)}")
@@ -0,0 +1,15 @@
+import backtest
+
+def bet(tier, stake, pnl, odds=2.0, closing=None):
+    return {"tier": tier, "stake": stake, "pnl": pnl, "odds": odds, "closing_odds": closing}
+
+def test_tier_table_breaks_out_roi_and_clv():
+    bets = [bet("⭐ LEAN", 10, -10), bet("⭐⭐⭐ ELITE", 5, 5, closing=1.6),
+            bet("⭐ LEAN", 10, 12, closing=2.5), bet("⭐⭐ STRONG", 4, -4)]
+    table = backtest.tier_table(bets)
+    assert [row[:4] for row in table] == [("⭐⭐⭐ ELITE", 1, 5, 5), ("⭐⭐ STRONG", 1, 4, -4), ("⭐ LEAN", 2, 20, 2)]
+    assert table[0][4:] == (1.0, 2.0 / 1.6 - 1)
+    assert table[1][5] is None and table[2][4] == 0.1
+
+def test_no_bet_tier_is_the_live_one():
+    assert backtest.NO_BET == backtest.bm.confidence_tier(50) != backtest.bm.confidence_tier(58)
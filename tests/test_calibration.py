@@ -0,0 +1,41 @@
+import betting_model_v4_pro as bm
+import calibration
+
+def settled(raw_prob, won, market_type="over_2.5", **extra):
+    return {"market_type": market_type, "raw_prob": raw_prob, "status": "won" if won else "lost", **extra}
+
+def test_curves_taper_to_identity_outside_the_fitted_range():
+    curve = {"x": [55.0, 60.0, 70.0], "y": [60.0, 64.0, 72.0], "n": 100}
+    cal = {"curves": {"over_2.5": curve}}
+    for prob in range(2, 99):
+        shift = abs(bm.calibrate_prob(prob, "over_2.5", cal) - prob)
+        if prob < 55:
+            assert shift <= 5.0 + 0.15  # No further than the curve moves its low end
+        elif prob > 70:
+            assert shift <= 2.0 + 0.15
+    assert bm.calibrate_prob(10, "over_2.5", cal) < 15
+
+def test_ingest_streams_from_the_watermark():
+    fitter = calibration.CalibrationFitter()
+    bets = [settled(60, True), {"market_type": "over_2.5", "raw_prob": 62, "status": "pending"}, settled(55, False)]
+    assert fitter.ingest(bets) == 2
+    assert (fitter.pos, fitter.pending) == (3, [1])
+    assert fitter.ingest(bets) == 0
+
+    bets[1]["status"] = "won"
+    bets.append(settled(70, True))
+    fitter = calibration.CalibrationFitter(fitter.state())
+    assert fitter.ingest(bets) == 2
+    assert (fitter.pos, fitter.pending) == (4, [])
+    assert sum(fitter.markets["over_2.5"]["n"]) == 4
+
+def test_fits_on_raw_prob_not_the_calibrated_one():
+    fitter = calibration.CalibrationFitter()
+    bets = [settled(40, True, prob=55) for _ in range(30)] + [{"market_type": "btts", "prob": 60, "status": "won"}]
+    assert fitter.ingest(bets) == 30
+    assert fitter.no_raw == 1
+    assert fitter.fit("over_2.5")["x"] == [40.0]
+
+def test_state_from_before_the_watermark_starts_over():
+    fitter = calibration.CalibrationFitter({"seen": ["0"], "markets": {"btts": {"n": [1] * 20, "w": [0] * 20, "p": [0.5] * 20}}})
+    assert (fitter.pos, fitter.markets) == (0, {})
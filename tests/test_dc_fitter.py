@@ -0,0 +1,56 @@
+import math
+
+import numpy as np
+
+import betting_model_v4_pro as bm
+import dc_fitter as dc
+import snapshots
+
+PARAMS = {
+    "mu": 0.18,
+    "home": 0.24,
+    "rho": -0.11,
+    "teams": {
+        "Strong": {"att": 0.45, "def": -0.40},
+        "Average": {"att": 0.0, "def": 0.0},
+        "Weak": {"att": -0.40, "def": 0.35},
+        "Hopeless": {"att": -0.80, "def": 0.60},
+    },
+}
+
+def fitted(home, away, params=PARAMS):
+    h, a = params["teams"][home], params["teams"][away]
+    return (math.exp(params["mu"] + params["home"] + h["att"] + a["def"]),
+            math.exp(params["mu"] + a["att"] + h["def"]))
+
+def test_calc_xg_reproduces_fitted_rates():
+    xg = dc.to_xg(PARAMS, "EPL")
+    for home in PARAMS["teams"]:
+        for away in PARAMS["teams"]:
+            if home != away:
+                assert bm.calc_xg(home, away, xg) == tuple(round(x, 3) for x in fitted(home, away))
+
+def averaged(xg):
+    """The entries without their fit fields, as calc_xg sees a team after a form update"""
+    return {team: {k: v for k, v in e.items() if not k.startswith("dc_")} for team, e in xg.items()}
+
+def test_averaged_sides_match_the_product_on_the_diagonal():
+    # att = def = -0.4 used to give 24% too little (and anything below -ln 2 collapsed to MIN_SIDE_XG)
+    params = {**PARAMS, "teams": {"A": {"att": -0.4, "def": -0.4}, "B": {"att": -0.4, "def": -0.4}}}
+    hxg, axg = bm.calc_xg("A", "B", averaged(dc.to_xg(params, "EPL")))
+    assert np.allclose((hxg, axg), fitted("A", "B", params), rtol=5e-3)
+
+def test_averaged_sides_stay_above_the_floor():
+    sides = [v for e in dc.to_xg(PARAMS, "EPL").values() for k, v in e.items() if k.startswith("xG")]
+    assert min(sides) > dc.MIN_SIDE_XG
+
+def test_fit_fields_survive_the_snapshot(tmp_path):
+    xg = dc.to_xg(PARAMS, "EPL")
+    snapshots.write_snapshot(str(tmp_path), xg, {}, {"EPL": {}})
+    ratings = snapshots.open_ratings(str(tmp_path), "xg")
+    assert bm.calc_xg("Strong", "Weak", ratings) == bm.calc_xg("Strong", "Weak", xg)
+
+def test_form_update_drops_the_fit_fields():
+    xg = dc.to_xg(PARAMS, "EPL")
+    bm._form_update(xg, "Strong", "Weak", 3, 0, 0, 3)
+    assert not any(k.startswith("dc_") for k in xg["Strong"]) and "dc_att" in xg["Average"]
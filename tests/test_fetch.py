@@ -0,0 +1,35 @@
+import threading
+import time
+import types
+
+import data_pipeline as dp
+from http_cache import HttpCache
+
+def test_penalty_reaches_threads_already_sleeping():
+    bucket = dp.TokenBucket(rate=10, capacity=1)
+    bucket.acquire()  # Spend the burst: the next caller sleeps ~0.1s
+    done = []
+    sleeper = threading.Thread(target=lambda: (bucket.acquire(), done.append(time.monotonic())))
+    start = time.monotonic()
+    sleeper.start()
+    time.sleep(0.03)
+    bucket.penalize(0.3)  # A 429 while it sleeps
+    sleeper.join()
+    assert done[0] - start >= 0.38
+
+def test_refetch_after_a_lost_304_goes_through_the_retry_loop(tmp_path, monkeypatch):
+    replies = iter([(304, {}), (429, {"Retry-After": "0"}), (200, {})])
+    calls = []
+
+    def get(url, headers=None, timeout=None):
+        status, resp_headers = next(replies)
+        calls.append(headers)
+        return types.SimpleNamespace(status_code=status, headers=resp_headers, content=b"ok", text="ok",
+                                     encoding="utf-8")
+
+    monkeypatch.setattr(dp, "_SESSION", types.SimpleNamespace(get=get))
+    monkeypatch.setattr(dp, "HTTP_CACHE", HttpCache(str(tmp_path)))
+    monkeypatch.setattr(dp, "OFFLINE", False)
+    monkeypatch.setitem(dp._BUCKETS, "fetch.test", dp.TokenBucket(1000, 10))
+    resp = dp.fetch("https://fetch.test/page")
+    assert resp.status_code == 200 and len(calls) == 3
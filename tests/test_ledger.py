@@ -0,0 +1,54 @@
+import health
+import ledger
+
+def new_ledger(tmp_path, n=4):
+    conn = ledger.connect(str(tmp_path / "ledger.db"))
+    ids = [ledger.add_bet(conn, source_id=str(i), league="EPL", market_type="1X2", prob=55.0, odds=2.0, stake=10)
+           for i in range(n)]
+    return conn, ids
+
+def assert_health_matches_sql(conn, tracker):
+    n, staked, pnl = ledger.settled_totals(conn)
+    report = tracker.report()
+    assert (report["bets"], report["stake"], report["pnl"]) == (n, round(staked, 2), round(pnl, 2))
+    assert report["windows"][30]["pnl"] == round(pnl, 2)
+
+def test_corrections_reach_health_once(tmp_path):
+    conn, (a, b, c, d) = new_ledger(tmp_path)
+    tracker = health.HealthTracker()
+    ledger.settle_bet(conn, a, "lost")
+    ledger.settle_bet(conn, b, "won")
+    ledger.settle_bet(conn, c, "void")
+    tracker.update_from_ledger(conn)
+    assert_health_matches_sql(conn, tracker)
+
+    ledger.settle_bet(conn, a, "won")   # lost -> won
+    ledger.settle_bet(conn, a, "won")   # repeated: nothing new to log
+    ledger.settle_bet(conn, b, "void")  # won -> void: no longer counts
+    ledger.settle_bet(conn, c, "lost")  # void -> lost: counts from now on
+    ledger.settle_bet(conn, d, "won", closing_odds=1.8)
+    ledger.settle_bet(conn, d, "won", closing_odds=1.9)  # Only CLV changes
+    assert tracker.update_from_ledger(conn) == 5
+    assert tracker.update_from_ledger(conn) == 0
+    assert_health_matches_sql(conn, tracker)
+    assert tracker.report()["clv"] == round(2.0 / 1.9 - 1, 4)
+
+    rebuilt = health.HealthTracker()
+    rebuilt.update_from_ledger(conn)
+    assert rebuilt.state()["segments"] == tracker.state()["segments"]
+    reloaded = health.HealthTracker(tracker.state())
+    assert reloaded.report() == tracker.report()
+
+def test_reimport_logs_tracker_corrections(tmp_path):
+    import json
+    conn = ledger.connect(str(tmp_path / "ledger.db"))
+    path = tmp_path / "bet_tracker.json"
+    bet = {"id": 7, "league": "EPL", "prob": 60.0, "odds": 2.0, "stake": 10}
+    path.write_text(json.dumps({"bets": [{**bet, "status": "lost", "pnl": -10}]}))
+    ledger.import_json(conn, str(path))
+    path.write_text(json.dumps({"bets": [{**bet, "status": "won", "pnl": 10}]}))
+    assert ledger.import_json(conn, str(path)) == (0, 1)
+    assert ledger.import_json(conn, str(path)) == (0, 0)
+    tracker = health.HealthTracker()
+    tracker.update_from_ledger(conn)
+    assert_health_matches_sql(conn, tracker)
@@ -0,0 +1,59 @@
+import http.client
+import json
+import threading
+import time
+
+import pytest
+
+import betting_model_v4_pro as bm
+import model_server as ms
+
+@pytest.fixture
+def store(tmp_path):
+    paths = [str(tmp_path / name) for name in ("xg.json", "corners.json", "calibration.json")]
+    bm.write_json_atomic(paths[0], bm.DEFAULT_XG)
+    return ms.ModelStore(*paths, poll=0.05)
+
+@pytest.fixture
+def conn(store):
+    server = ms.ModelServer(("127.0.0.1", 0), store)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=5)
+    yield client
+    client.close()
+    server.shutdown()
+    server.server_close()
+
+def post(conn, path, body):
+    data = body if isinstance(body, bytes) else json.dumps(body).encode()
+    conn.request("POST", path, body=data, headers={"Content-Type": "application/json"})
+    resp = conn.getresponse()
+    return resp.status, json.loads(resp.read()), resp.getheader("Connection")
+
+def test_unused_bodies_do_not_leak_into_the_next_request(conn):
+    assert post(conn, "/reload", {"ignored": "x" * 100})[0] == 200
+    assert post(conn, "/nowhere", {"ignored": True})[0] == 404
+    status, reply, _ = post(conn, "/match", {"home": "Girona", "away": "Barcelona"})
+    assert status == 200 and reply["matches"][0]["home"] == "Girona"
+
+def test_oversized_body_closes_the_connection(conn, monkeypatch):
+    monkeypatch.setattr(ms, "MAX_BODY", 10)
+    status, _, connection = post(conn, "/match", {"home": "Girona", "away": "Barcelona"})
+    assert (status, connection) == (400, "close")
+
+def test_bad_odds_and_bodies_are_400s(conn):
+    assert post(conn, "/match", {"home": "Girona", "away": "Barcelona", "odds": [1.9]})[0] == 400
+    assert post(conn, "/slate", [1, 2])[0] == 400
+
+def test_failed_reload_is_not_retried_until_the_files_change(store, capsys):
+    store.start_watching()
+    try:
+        with open(store.paths[0], "w") as f:
+            f.write("{not json")
+        time.sleep(0.6)
+        assert capsys.readouterr().err.count("Reload failed") == 1
+        bm.write_json_atomic(store.paths[0], bm.DEFAULT_XG)
+        time.sleep(0.3)
+        assert "Reloaded" in capsys.readouterr().err
+    finally:
+        store.stop()
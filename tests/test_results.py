@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+import betting_model_v4_pro as bm
+
+@pytest.fixture
+def ratings(tmp_path, monkeypatch):
+    monkeypatch.setattr(bm, "XG_FILE", str(tmp_path / "xg.json"))
+    monkeypatch.setattr(bm, "SNAPSHOT_DIR", str(tmp_path / "snapshots"))
+    bm.write_json_cached(bm.XG_FILE, bm.DEFAULT_XG)
+    return str(tmp_path / "journal.jsonl")
+
+RESULTS = [
+    {"date": "2025-09-01", "home": "Girona", "away": "Barcelona", "home_goals": 2, "away_goals": 1},
+    {"date": "02/09/2025", "home": "Arsenal", "away": "Chelsea", "home_goals": "1", "away_goals": "1"},
+]
+
+def test_bad_rows_are_reported_not_fatal(ratings):
+    rows = RESULTS + [
+        {"date": None, "home": "Girona", "away": "Barcelona", "home_goals": 1, "away_goals": 0},
+        {"home": "Girona", "away": "Barcelona", "home_goals": 1, "away_goals": 0},
+        {"date": "yesterday", "home": "Girona", "away": "Barcelona", "home_goals": 1, "away_goals": 0},
+        {"date": "2025-09-03", "home": "Girona", "away": "Barcelona", "home_goals": "x", "away_goals": 0},
+        {"date": "2025-09-03", "home": "Nowhere FC", "away": "Barcelona", "home_goals": 1, "away_goals": 0},
+    ]
+    applied, skipped, unmatched, invalid = bm.apply_results(rows, journal=ratings)
+    assert (applied, skipped, len(unmatched), len(invalid)) == (2, 0, 1, 4)
+    assert "Nowhere FC" in unmatched[0][1]
+
+def test_rerun_is_a_no_op(ratings):
+    assert bm.apply_results(RESULTS, journal=ratings)[:2] == (2, 0)
+    before = json.load(open(bm.XG_FILE))
+    assert bm.apply_results(RESULTS, journal=ratings)[:2] == (0, 2)
+    assert json.load(open(bm.XG_FILE)) == before
+
+def test_crash_before_the_journal_write_neither_loses_nor_repeats(ratings):
+    bm.apply_results(RESULTS, journal=ratings)
+    after = json.load(open(bm.XG_FILE))
+    open(ratings, "w").close()  # The ratings were saved but the journal lines never landed
+    assert bm.apply_results(RESULTS, journal=ratings)[:2] == (0, 2)
+    assert json.load(open(bm.XG_FILE)) == after
+    assert len(open(ratings).read().splitlines()) == 2